@@ -2,16 +2,23 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from fastapi import FastAPI, Request, HTTPException, Depends
+from fastapi import FastAPI, Request, HTTPException, Depends, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
 from shared.config import APIGatewaySettings
 from shared.utils.http_client import ServiceClient, propagate_user_context
-from shared.security import validate_token_middleware
+from shared.security import validate_token_middleware, TokenRevocationList
+import asyncio
 import uvicorn
 
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
 
 settings = APIGatewaySettings()
 
@@ -21,6 +28,12 @@ user_service = ServiceClient(settings.USER_SERVICE_URL)
 trip_service = ServiceClient(settings.TRIP_SERVICE_URL)
 notification_service = ServiceClient(settings.NOTIFICATION_SERVICE_URL)
 
+# Logged-out tokens, replicated from the auth service as a Bloom filter
+revoked_tokens = TokenRevocationList(
+    settings.AUTH_SERVICE_URL,
+    sync_interval=float(os.getenv("REVOCATION_SYNC_INTERVAL_SECONDS", "5"))
+)
+
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -39,13 +52,28 @@ app.add_middleware(
 
 security = HTTPBearer()
 
+# Upstream headers kept when a response is relayed as a stream
+STREAMED_RESPONSE_HEADERS = ("content-type", "content-disposition", "content-encoding")
+
+@app.on_event("startup")
+async def start_revocation_sync():
+    app.state.revocation_sync = asyncio.create_task(revoked_tokens.run_sync())
+
+@app.on_event("shutdown")
+async def stop_revocation_sync():
+    task = getattr(app.state, "revocation_sync", None)
+    if task:
+        task.cancel()
+
 async def get_user_context(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Validate token and extract user context"""
     try:
         user_context = validate_token_middleware(credentials.credentials)
-        return user_context
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid authentication token")
+    if await revoked_tokens.is_revoked(user_context["jti"], user_context["exp"]):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return user_context
 
 
 @app.middleware("http")
@@ -72,6 +100,11 @@ async def add_user_context_headers(request: Request, call_next):
                 status_code=401,
                 content={"detail": "Invalid authentication token"}
             )
+        if await revoked_tokens.is_revoked(user_context["jti"], user_context["exp"]):
+            return JSONResponse(
+                status_code=401,
+                content={"detail": "Token has been revoked"}
+            )
     else:
         
         return JSONResponse(
@@ -97,11 +130,20 @@ async def proxy_auth_service(request: Request, path: str):
             content=await request.body(),
             params=request.query_params
         )
-        
-        return JSONResponse(
-            content=response.json() if response.content else {},
-            status_code=response.status_code
-        )
+    
+    if path == "logout" and response.status_code == 200:
+        # Stop accepting the token here at once instead of after the next sync
+        try:
+            user_context = validate_token_middleware(request.headers.get("authorization", "").split(" ")[-1])
+            if user_context["jti"]:
+                revoked_tokens.revoke_locally(user_context["jti"], user_context["exp"])
+        except Exception:
+            pass
+    
+    return JSONResponse(
+        content=response.json() if response.content else {},
+        status_code=response.status_code
+    )
 
 
 @app.api_route("/users/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
@@ -148,7 +190,49 @@ async def proxy_user_service(request: Request, path: str):
         )
 
 
-@app.api_route("/trips/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+def forward_headers(request: Request) -> dict:
+    """Incoming headers plus the authenticated user's context"""
+    headers = dict(request.headers)
+    if hasattr(request.state, 'user_id'):
+        headers.update({
+            "X-User-ID": str(request.state.user_id),
+            "X-User-Role": request.state.user_role,
+            "X-User-Email": request.state.user_email
+        })
+    return headers
+
+
+async def stream_upstream(request: Request, url: str) -> StreamingResponse:
+    """Relay a response chunk by chunk, for bodies that aren't JSON or are too large to buffer"""
+    client = httpx.AsyncClient(timeout=None)
+    try:
+        response = await client.send(
+            client.build_request(request.method, url, headers=forward_headers(request), params=request.query_params),
+            stream=True
+        )
+    except Exception:
+        await client.aclose()
+        raise
+
+    async def close():
+        await response.aclose()
+        await client.aclose()
+
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers={name: response.headers[name] for name in STREAMED_RESPONSE_HEADERS if name in response.headers},
+        background=BackgroundTask(close)
+    )
+
+
+@app.get("/trips/export")
+async def proxy_trip_export(request: Request):
+    """Stream trip exports (CSV/Parquet) from the trip service"""
+    return await stream_upstream(request, f"{settings.TRIP_SERVICE_URL}/api/trips/export")
+
+
+@app.api_route("/trips/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
 async def proxy_trip_service(request: Request, path: str):
     """Proxy requests to trip service"""
     url = f"{settings.TRIP_SERVICE_URL}/api/trips/{path}"
@@ -177,6 +261,83 @@ async def proxy_trip_service(request: Request, path: str):
         )
 
 
+@app.get("/locations/trips/{trip_id}/track")
+async def proxy_trip_track(request: Request, trip_id: int):
+    """Stream a trip's recorded GPS track (JSON or CSV) from the trip service"""
+    return await stream_upstream(request, f"{settings.TRIP_SERVICE_URL}/api/locations/trips/{trip_id}/track")
+
+
+@app.api_route("/locations/{path:path}", methods=["GET", "POST"])
+async def proxy_location_service(request: Request, path: str):
+    """Proxy driver location requests to trip service"""
+    url = f"{settings.TRIP_SERVICE_URL}/api/locations/{path}"
+    
+    async with httpx.AsyncClient() as client:
+        response = await client.request(
+            method=request.method,
+            url=url,
+            headers=forward_headers(request),
+            content=await request.body(),
+            params=request.query_params
+        )
+        
+        return JSONResponse(
+            content=response.json() if response.content else {},
+            status_code=response.status_code
+        )
+
+
+@app.websocket("/locations/ws")
+async def proxy_location_stream(websocket: WebSocket):
+    """Relay a driver's GPS ping stream to trip service; the token comes as a Bearer header or ?token="""
+    token = websocket.query_params.get("token") or websocket.headers.get("authorization", "").split(" ")[-1]
+    try:
+        user_context = validate_token_middleware(token)
+    except Exception:
+        await websocket.close(code=1008)
+        return
+    if await revoked_tokens.is_revoked(user_context["jti"], user_context["exp"]):
+        await websocket.close(code=1008)
+        return
+    if websockets is None:
+        await websocket.close(code=1011)
+        return
+    
+    url = settings.TRIP_SERVICE_URL.replace("http", "ws", 1) + "/api/locations/ws"
+    headers = {
+        "X-User-ID": str(user_context["user_id"]),
+        "X-User-Role": user_context["role"],
+        "X-User-Email": user_context["email"]
+    }
+    try:
+        upstream = await websockets.connect(url, additional_headers=headers)
+    except Exception:
+        await websocket.close(code=1011)
+        return
+    await websocket.accept()
+    
+    async def client_to_upstream():
+        while True:
+            await upstream.send(await websocket.receive_text())
+    
+    async def upstream_to_client():
+        async for message in upstream:
+            await websocket.send_text(message)
+    
+    relays = [asyncio.create_task(client_to_upstream()), asyncio.create_task(upstream_to_client())]
+    try:
+        await asyncio.wait(relays, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for relay in relays:
+            relay.cancel()
+        await asyncio.gather(*relays, return_exceptions=True)
+        await upstream.close()
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+
 @app.api_route("/notifications/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def proxy_notification_service(request: Request, path: str):
     
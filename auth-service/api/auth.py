@@ -1,9 +1,34 @@
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import delete, func, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from models.user import User
-from shared.schemas.auth import UserCreate, UserLogin, Token, UserResponse
+from shared.schemas.auth import UserCreate, UserLogin, Token, UserResponse, BatchRegistrationResult
 from shared.security import verify_password, get_password_hash, create_access_token
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import asyncio
+import os
+
+
+# bcrypt is CPU bound and holds the GIL, so batch hashing runs in separate processes
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    """Get the shared password hashing process pool, starting it on first use"""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1)))
+    return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    """Stop the hashing worker processes (called on service shutdown)"""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
 
 
 def authenticate_user(db: Session, email: str, password: str) -> User:
@@ -50,6 +75,92 @@ def create_user(db: Session, user_data: UserCreate) -> User:
     return db_user
 
 
+async def create_users_batch(db: Session, users: List[UserCreate]) -> List[BatchRegistrationResult]:
+    """Create many user accounts in one transaction, returning a result per item"""
+    results: Dict[int, BatchRegistrationResult] = {}
+    
+    # Duplicates within the batch, ignoring case: the first occurrence wins
+    pending: Dict[str, int] = {}
+    for index, user_data in enumerate(users):
+        email = user_data.email.lower()
+        if email in pending:
+            results[index] = BatchRegistrationResult(index=index, success=False, error="Email already registered")
+        else:
+            pending[email] = index
+    
+    # Hash all passwords in parallel while the database checks run
+    loop = asyncio.get_running_loop()
+    pool = get_hash_pool()
+    hashes = {
+        email: loop.run_in_executor(pool, get_password_hash, users[index].password)
+        for email, index in pending.items()
+    }
+    
+    # A concurrent registration can claim an email between the check and the
+    # insert; in that case re-check once and insert the rest again
+    for attempt in range(2):
+        existing = {
+            email for (email,) in db.query(func.lower(User.email)).filter(func.lower(User.email).in_(list(pending))).all()
+        } if pending else set()
+        for email in existing:
+            index = pending.pop(email)
+            hashes.pop(email).cancel()
+            results[index] = BatchRegistrationResult(index=index, success=False, error="Email already registered")
+        if not pending:
+            break
+        
+        hashed_passwords = await asyncio.gather(*hashes.values())
+        rows = [
+            {
+                "email": email,
+                "hashed_password": hashed_password,
+                "role": users[index].role,
+                "is_active": True
+            }
+            for (email, index), hashed_password in zip(pending.items(), hashed_passwords)
+        ]
+        try:
+            created = db.execute(
+                insert(User).returning(User.id, User.created_at, sort_by_parameter_order=True),
+                rows
+            ).all()
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Concurrent registration conflict, please retry"
+                )
+            continue
+        
+        for row, (user_id, created_at) in zip(rows, created):
+            index = pending[row["email"]]
+            results[index] = BatchRegistrationResult(
+                index=index,
+                success=True,
+                user=UserResponse(
+                    id=user_id,
+                    email=row["email"],
+                    role=row["role"],
+                    is_active=True,
+                    created_at=created_at
+                )
+            )
+        break
+    
+    return [results[index] for index in sorted(results)]
+
+
+def delete_users_batch(db: Session, user_ids: List[int]) -> int:
+    """Remove accounts whose registration could not be completed elsewhere"""
+    if not user_ids:
+        return 0
+    deleted = db.execute(delete(User).where(User.id.in_(user_ids))).rowcount
+    db.commit()
+    return deleted
+
+
 def login_user(db: Session, email: str, password: str) -> Token:
     """Login user and return JWT token"""
     user = authenticate_user(db, email, password)
@@ -98,8 +209,14 @@ def validate_token_and_get_user(db: Session, token: str) -> UserResponse:
     from shared.security import verify_token
     
     try:
+        from api.revocation import is_token_revoked
         payload = verify_token(token)
         user_id = payload.get("sub")
+        if is_token_revoked(db, payload.get("jti")):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked"
+            )
         
         user = get_user_by_id(db, user_id)
         if not user or not user.is_active:
@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.revoked_token import RevokedToken
+from shared.security import verify_token
+from shared.utils.bloom_filter import BloomFilter
+import os
+
+
+# False positives only cost the gateway an exact check, so a small filter is fine
+REVOCATION_FILTER_ERROR_RATE = float(os.getenv("REVOCATION_FILTER_ERROR_RATE", "0.001"))
+MIN_FILTER_CAPACITY = 1024
+
+# Last built filter, rebuilt only when the set of revoked tokens changes
+_filter_cache = {"etag": None, "data": None}
+
+
+def revoke_token(db: Session, token: str) -> None:
+    """Record a token's jti as revoked until the token's own expiry"""
+    payload = verify_token(token)
+    jti = payload.get("jti")
+    if not jti:
+        # Issued before tokens carried an id; it expires on its own shortly
+        return
+    now = datetime.utcnow()
+    db.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+    db.add(RevokedToken(
+        jti=jti,
+        user_id=int(payload["sub"]),
+        expires_at=datetime.utcfromtimestamp(payload["exp"])
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Logged out twice
+        db.rollback()
+
+
+def is_token_revoked(db: Session, jti: Optional[str]) -> bool:
+    if not jti:
+        return False
+    return db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first() is not None
+
+
+def get_revocation_filter(db: Session) -> Tuple[str, bytes]:
+    """(etag, serialized Bloom filter) of every revoked token that has not expired"""
+    now = datetime.utcnow()
+    count, last_id = db.query(func.count(RevokedToken.id), func.max(RevokedToken.id)).filter(
+        RevokedToken.expires_at >= now
+    ).one()
+    etag = f'"{last_id or 0}-{count}"'
+    if _filter_cache["etag"] != etag:
+        jtis = [jti for (jti,) in db.query(RevokedToken.jti).filter(RevokedToken.expires_at >= now)]
+        bloom = BloomFilter.from_keys(jtis, max(len(jtis), MIN_FILTER_CAPACITY), REVOCATION_FILTER_ERROR_RATE)
+        _filter_cache.update(etag=etag, data=bloom.to_bytes())
+    return _filter_cache["etag"], _filter_cache["data"]
@@ -9,6 +9,8 @@ from shared.config import AuthServiceSettings
 from shared.database.base import create_database_engine, create_session_factory, Base
 from routers.auth_router import router as auth_router
 from models.user import User
+from models.revoked_token import RevokedToken
+from api.auth import shutdown_hash_pool
 import uvicorn
 
 # Initialize settings
@@ -52,6 +54,10 @@ app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 from routers.auth_router import get_db as router_get_db
 app.dependency_overrides[router_get_db] = get_db
 
+@app.on_event("shutdown")
+async def stop_hash_pool():
+    shutdown_hash_pool()
+
 @app.get("/")
 async def root():
     return {"service": "Auth Service", "status": "running", "version": "1.0.0"}
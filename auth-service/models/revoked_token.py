@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, func
+from shared.database.base import Base
+
+
+class RevokedToken(Base):
+    """An access token that was logged out before it expired"""
+    __tablename__ = "revoked_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String, unique=True, index=True, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)  # UTC; the row can go once the token would have expired anyway
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<RevokedToken(jti='{self.jti}', user_id={self.user_id})>"
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from api.auth import login_user, validate_token_and_get_user, create_user
-from shared.schemas.auth import UserLogin, Token, UserResponse, UserCreate, ServiceUserContext
+from api.auth import login_user, validate_token_and_get_user, create_user, create_users_batch, delete_users_batch
+from shared.security import require_service_key
+from api.revocation import revoke_token, is_token_revoked, get_revocation_filter
+from shared.schemas.auth import (
+    UserLogin, Token, UserResponse, UserCreate, ServiceUserContext,
+    BatchUserCreate, BatchRegistrationResult, BatchUserIds
+)
+from typing import List, Optional
 from shared.database.base import get_db_session
 
 router = APIRouter()
 security = HTTPBearer()
 
+MAX_BATCH_REGISTRATION = 1000
+
 
 def get_db():
     """Get database session"""
@@ -54,6 +62,38 @@ async def register(
     )
 
 
+@router.post("/register/batch", response_model=List[BatchRegistrationResult])
+async def register_batch(
+    batch: BatchUserCreate,
+    x_service_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Register many users in one call with per-item results - internal service use only"""
+    require_service_key(x_service_key)
+    if len(batch.users) > MAX_BATCH_REGISTRATION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_REGISTRATION} users per batch"
+        )
+    return await create_users_batch(db, batch.users)
+
+
+@router.post("/register/batch/revert")
+async def revert_batch_registration(
+    batch: BatchUserIds,
+    x_service_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Delete users created by /register/batch whose profiles failed - internal service use only"""
+    require_service_key(x_service_key)
+    if len(batch.user_ids) > MAX_BATCH_REGISTRATION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_REGISTRATION} users per batch"
+        )
+    return {"deleted": delete_users_batch(db, batch.user_ids)}
+
+
 @router.get("/profile", response_model=UserResponse)
 async def get_current_user_profile(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -64,11 +104,36 @@ async def get_current_user_profile(
 
 
 @router.post("/logout")
-async def logout():
-    """Logout endpoint - JWT tokens are stateless so just return success"""
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Logout endpoint - revokes the presented token until it expires"""
+    revoke_token(db, credentials.credentials)
     return {"message": "Successfully logged out"}
 
 
+@router.get("/revocations/filter")
+async def get_revoked_token_filter(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Bloom filter of revoked token ids - polled by the API Gateway"""
+    etag, data = get_revocation_filter(db)
+    if if_none_match == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=data, media_type="application/octet-stream", headers={"ETag": etag})
+
+
+@router.get("/revocations/{jti}")
+async def check_token_revoked(
+    jti: str,
+    db: Session = Depends(get_db)
+):
+    """Exact revocation check for a Bloom filter hit - used by API Gateway"""
+    return {"jti": jti, "revoked": is_token_revoked(db, jti)}
+
+
 @router.put("/users/{user_id}/status")
 async def update_user_status_endpoint(
     user_id: int,
@@ -13,6 +13,11 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import json
 import math
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from shared.utils.geocoder import geocode_location
 
 # Bangalore Transport Zones (from WNS Policy)
 BANGALORE_ZONES = {
@@ -67,6 +72,9 @@ BANGALORE_TRANSPORT_TIMINGS = {
     "eta_after_logout": 20,  # minutes
 }
 
+# Fallback when a location isn't in the gazetteer
+BANGALORE_CENTER = {"lat": 12.9716, "lng": 77.5946}
+
 # Travel Time Matrix (Distance-based from WNS Policy)
 TRAVEL_TIME_MATRIX = {
     "0-10km": {"time_range": "0-60 mins", "base_time": 30},
@@ -96,6 +104,13 @@ class BangaloreTransportEnhancer:
         
         return R * c
     
+    def get_coordinates_for_location(self, location: str) -> Dict:
+        """Resolve a location to coordinates using the offline gazetteer"""
+        coordinates = geocode_location(location)
+        if coordinates:
+            return {"lat": coordinates["lat"], "lng": coordinates["lng"]}
+        return dict(BANGALORE_CENTER)
+    
     def get_zone_for_location(self, location: str) -> str:
         """Determine which Bangalore zone a location belongs to"""
         location_lower = location.lower()
@@ -229,8 +244,7 @@ class BangaloreTransportEnhancer:
         # Add Bangalore-specific enhancements
         pickup_location = trip_data.get("pickup_location", "")
         
-        # Mock coordinates for demo (in real app, use geocoding service)
-        pickup_coords = {"lat": 12.9716, "lng": 77.5946}  # Bangalore center
+        pickup_coords = self.get_coordinates_for_location(pickup_location)
         
         # Calculate ETA and travel information
         shift_time = "09:00"  # Default or from trip_data
@@ -287,14 +301,54 @@ class RealTimeTracker:
     async def get_live_updates(self, trip_id: int) -> Dict:
         """Get live updates for a trip"""
         if trip_id in self.active_trips:
-            # Simulate movement
             trip = self.active_trips[trip_id]
-            trip["route_progress"] = min(100, trip["route_progress"] + 10)
-            trip["current_location"]["lat"] += 0.001  # Simulate movement
+            if "recorded_at" not in trip["current_location"]:
+                # No GPS fix from the driver yet; simulate movement
+                trip["route_progress"] = min(100, trip["route_progress"] + 10)
+                trip["current_location"]["lat"] += 0.001
             
             return trip
         
         return {"error": "Trip not found in tracking system"}
+    
+    def update_position(self, trip_id: int, position: Dict) -> None:
+        """Use the driver's latest reported GPS fix as the trip's location"""
+        trip = self.active_trips.get(trip_id)
+        if trip is None:
+            return
+        trip["current_location"] = {
+            "lat": position["lat"],
+            "lng": position["lng"],
+            "speed_kmh": position.get("speed_kmh"),
+            "heading": position.get("heading"),
+            "recorded_at": position["recorded_at"]
+        }
+    
+    async def apply_trip_event(self, event: Dict) -> None:
+        """Reflect a trip lifecycle event published by trip-service"""
+        trip_id = event["aggregate_id"]
+        if event["event_type"] == "trip.deleted":
+            self.active_trips.pop(trip_id, None)
+            return
+        if event["event_type"] == "trip.started" and trip_id not in self.active_trips:
+            await self.start_trip_tracking(trip_id)
+        trip = self.active_trips.get(trip_id)
+        if trip is None:
+            return
+        # A retried delivery can arrive after a newer event for the same trip
+        version = event["payload"].get("version")
+        if version is not None and version < trip.get("version", 0):
+            return
+        if version is not None:
+            trip["version"] = version
+        trip["status"] = event["payload"].get("status", trip["status"])
+        if event["event_type"] == "trip.completed":
+            trip["route_progress"] = 100
+        trip["last_event"] = {
+            "event_id": event["event_id"],
+            "event_type": event["event_type"],
+            "occurred_at": event.get("occurred_at")
+        }
 
 # Interactive dashboard data
 def get_dashboard_data() -> Dict:
@@ -0,0 +1,67 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.notification import Notification
+from models.processed_event import ProcessedEvent
+from shared.schemas.notification import TripEvent
+from typing import List
+
+# Title and message template per trip lifecycle event
+TRIP_EVENT_MESSAGES = {
+    "trip.created": ("Trip scheduled", "Your trip from {pickup_location} to {destination} is scheduled for {scheduled_time}."),
+    "trip.started": ("Trip started", "Your trip from {pickup_location} to {destination} has started."),
+    "trip.completed": ("Trip completed", "Your trip to {destination} has been completed."),
+    "trip.cancelled": ("Trip cancelled", "Your trip from {pickup_location} to {destination} on {scheduled_time} was cancelled."),
+}
+
+
+def trip_event_notifications(event: TripEvent) -> List[dict]:
+    """One notification per rider/driver of the trip, or none for events nobody is told about"""
+    if event.event_type not in TRIP_EVENT_MESSAGES:
+        return []
+    title, template = TRIP_EVENT_MESSAGES[event.event_type]
+    payload = event.payload
+    message = template.format(
+        pickup_location=payload.get("pickup_location"),
+        destination=payload.get("destination"),
+        scheduled_time=payload.get("scheduled_time")
+    )
+    recipients = {payload.get("employee_id"), payload.get("driver_id")} - {None}
+    return [
+        {"title": title, "message": message, "recipient_id": recipient_id}
+        for recipient_id in sorted(recipients)
+    ]
+
+
+def handle_trip_events(db: Session, events: List[TripEvent], retry: bool = True) -> dict:
+    """Turn a batch of trip events into notifications, skipping events already processed"""
+    unique = {event.event_id: event for event in events}
+    seen = {
+        event_id for (event_id,) in db.query(ProcessedEvent.event_id).filter(
+            ProcessedEvent.event_id.in_(unique.keys())
+        ).all()
+    } if unique else set()
+    fresh = [event for event_id, event in unique.items() if event_id not in seen]
+
+    notifications = [row for event in fresh for row in trip_event_notifications(event)]
+    try:
+        if fresh:
+            db.execute(insert(ProcessedEvent), [
+                {"event_id": event.event_id, "event_type": event.event_type} for event in fresh
+            ])
+        if notifications:
+            db.execute(insert(Notification), notifications)
+        db.commit()
+    except IntegrityError:
+        # A concurrent delivery of the same events won the race; skip what it processed
+        db.rollback()
+        if not retry:
+            raise
+        return handle_trip_events(db, events, retry=False)
+
+    return {
+        "received": len(events),
+        "processed": len(fresh),
+        "duplicates": len(events) - len(fresh),
+        "notifications": len(notifications)
+    }
@@ -7,6 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from shared.config import NotificationServiceSettings
 from shared.database.base import create_database_engine, create_session_factory, Base
 from models.notification import Notification
+from models.processed_event import ProcessedEvent
 from routers.notification_router import router as notification_router
 import uvicorn
 
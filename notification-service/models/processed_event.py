@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from shared.database.base import Base
+
+
+class ProcessedEvent(Base):
+    __tablename__ = "processed_events"
+
+    event_id = Column(String, primary_key=True)  # Idempotency key of a consumed event
+    event_type = Column(String, nullable=False)
+    processed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ProcessedEvent(event_id='{self.event_id}', event_type='{self.event_type}')>"
@@ -5,7 +5,8 @@ from api.notification import (
     mark_all_notifications_as_seen, send_bulk_notification, delete_notification,
     get_unread_count
 )
-from shared.schemas.notification import NotificationCreate, NotificationResponse, BulkNotification
+from api.trip_events import handle_trip_events
+from shared.schemas.notification import NotificationCreate, NotificationResponse, BulkNotification, TripEventBatch
 from typing import List, Optional
 
 router = APIRouter()
@@ -129,4 +130,18 @@ def send_bulk_notifications(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can send bulk notifications"
         )
-    return send_bulk_notification(db, bulk_notification)
\ No newline at end of file
+    return send_bulk_notification(db, bulk_notification)
+
+@router.post("/events/trips")
+def consume_trip_events(
+    batch: TripEventBatch,
+    db: Session = Depends(get_db),
+    user_context: dict = Depends(get_user_context)
+):
+    """Create notifications from trip lifecycle events; redelivered events are ignored (Admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can publish trip events"
+        )
+    return handle_trip_events(db, batch.events)
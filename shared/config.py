@@ -14,6 +14,9 @@ class BaseServiceSettings(BaseSettings):
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     
+    # Shared key for internal-only endpoints, sent as X-Service-Key
+    SERVICE_API_KEY: str = os.getenv("SERVICE_API_KEY", "your-service-key-here-change-in-production")
+    
     # Service Configuration
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
     
@@ -23,6 +26,7 @@ class BaseServiceSettings(BaseSettings):
     TRIP_SERVICE_URL: str = os.getenv("TRIP_SERVICE_URL", "http://localhost:8003")
     NOTIFICATION_SERVICE_URL: str = os.getenv("NOTIFICATION_SERVICE_URL", "http://localhost:8004")
     API_GATEWAY_URL: str = os.getenv("API_GATEWAY_URL", "http://localhost:8000")
+    WEB_INTERFACE_URL: str = os.getenv("WEB_INTERFACE_URL", "http://localhost:5000")
     
     class Config:
         env_file = ".env"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -21,6 +21,21 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class BatchUserCreate(BaseModel):
+    users: List[UserCreate]
+
+
+class BatchRegistrationResult(BaseModel):
+    index: int  # Position in the request's users list
+    success: bool
+    user: Optional[UserResponse] = None
+    error: Optional[str] = None
+
+
+class BatchUserIds(BaseModel):
+    user_ids: List[int]
+
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
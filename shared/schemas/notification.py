@@ -43,4 +43,15 @@ class BulkNotification(BaseModel):
     title: str
     message: str
     recipient_role: Optional[str] = None
-    recipient_ids: Optional[list[int]] = None
\ No newline at end of file
+    recipient_ids: Optional[list[int]] = None
+
+class TripEvent(BaseModel):
+    event_id: str
+    event_type: str
+    aggregate_id: int  # Trip ID
+    payload: dict
+    occurred_at: Optional[str] = None
+
+
+class TripEventBatch(BaseModel):
+    events: list[TripEvent]
@@ -1,6 +1,10 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date, datetime
+
+
+# A booking longer than a day is a data-entry mistake, not a trip
+MAX_TRIP_DURATION_MINUTES = 24 * 60
 
 
 class TripBase(BaseModel):
@@ -14,6 +18,7 @@ class TripCreate(TripBase):
     driver_id: Optional[int] = None
     vehicle_id: Optional[int] = None
     notes: Optional[str] = None
+    estimated_duration_minutes: Optional[int] = Field(default=None, gt=0, le=MAX_TRIP_DURATION_MINUTES)
 
 
 class TripUpdate(BaseModel):
@@ -24,6 +29,8 @@ class TripUpdate(BaseModel):
     vehicle_id: Optional[int] = None
     status: Optional[str] = None
     notes: Optional[str] = None
+    estimated_duration_minutes: Optional[int] = Field(default=None, gt=0, le=MAX_TRIP_DURATION_MINUTES)
+    version: Optional[int] = None  # Expected current version; the update is rejected if the trip changed
 
 
 class TripResponse(TripBase):
@@ -35,6 +42,8 @@ class TripResponse(TripBase):
     employee_id: int
     driver_id: Optional[int]
     vehicle_id: Optional[int]
+    estimated_duration_minutes: Optional[int] = None
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime]
     
@@ -64,6 +73,7 @@ class TripWithDetails(BaseModel):
     driver_name: Optional[str]
     vehicle_plate_number: Optional[str]
     vehicle_type: Optional[str]
+    version: int = 1
     created_at: datetime
     
     class Config:
@@ -76,4 +86,87 @@ class TripStatistics(BaseModel):
     pending_trips: int
     in_progress_trips: int
     cancelled_trips: int
-    completion_rate: float
\ No newline at end of file
+    completion_rate: float
+
+
+class ScheduleConflict(BaseModel):
+    resource_type: str  # driver or vehicle
+    resource_id: int
+    trip_id: int
+    conflicting_trip_id: int
+    overlap_start: datetime
+    overlap_end: datetime
+
+
+class ScheduleConflictReport(BaseModel):
+    date: str
+    trips_checked: int
+    conflicts: List[ScheduleConflict]
+
+
+class TripBulkCreate(BaseModel):
+    trips: List[TripCreate]
+
+
+class TripBulkCreateResult(BaseModel):
+    index: int  # Position in the request's trips list
+    success: bool
+    trip: Optional[TripResponse] = None
+    error: Optional[str] = None
+    conflicting_trip_ids: Optional[List[int]] = None
+
+
+class TripBulkStatusUpdate(BaseModel):
+    trip_ids: List[int]
+    status: str
+
+
+class TripBulkStatusResult(BaseModel):
+    trip_id: int
+    success: bool
+    error: Optional[str] = None
+    conflicting_trip_ids: Optional[List[int]] = None
+
+
+class TripSummaryResponse(BaseModel):
+    role: str
+    subject_id: int
+    week_start: date
+    month_start: date
+    trips_this_week: int
+    trips_this_month: int
+    window_days: int  # Rates and averages cover closed trips from this many days back
+    completed_trips: int
+    cancelled_trips: int
+    completion_rate: float
+    on_time_rate: float
+    avg_duration_minutes: Optional[float] = None
+    updated_at: Optional[datetime] = None
+
+
+class LocationPingIn(BaseModel):
+    lat: float = Field(ge=-90, le=90)
+    lng: float = Field(ge=-180, le=180)
+    recorded_at: Optional[datetime] = None  # Device time; the server's receive time when missing
+    trip_id: Optional[int] = None
+    speed_kmh: Optional[float] = Field(default=None, ge=0, le=400)
+    heading: Optional[float] = Field(default=None, ge=0, lt=360)
+
+
+class LocationBatch(BaseModel):
+    pings: List[LocationPingIn]
+
+
+class LocationIngestResult(BaseModel):
+    received: int
+    accepted: int  # New positions after coalescing; the rest replaced a ping in the same slot or were too old
+
+
+class DriverPosition(BaseModel):
+    driver_id: int
+    trip_id: Optional[int] = None
+    recorded_at: datetime
+    lat: float
+    lng: float
+    speed_kmh: Optional[float] = None
+    heading: Optional[float] = None
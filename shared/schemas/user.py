@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, EmailStr
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -31,6 +31,9 @@ class DriverResponse(DriverBase):
     is_available: bool
     identity_proof_url: Optional[str]
     identity_proof_status: str
+    identity_proof_preview_url: Optional[str] = None
+    service_lat: Optional[float] = None
+    service_lng: Optional[float] = None
     created_at: datetime
     updated_at: Optional[datetime]
     
@@ -87,6 +90,8 @@ class EmployeeUpdate(BaseModel):
 class EmployeeResponse(EmployeeBase):
     id: int
     user_id: int
+    home_lat: Optional[float] = None
+    home_lng: Optional[float] = None
     created_at: datetime
     updated_at: Optional[datetime]
     
@@ -104,6 +109,24 @@ class EmployeeRegistration(BaseModel):
     commute_schedule: str
 
 
+class EmployeeImportRow(BaseModel):
+    email: EmailStr
+    password: str
+    name: str
+    employee_id: Optional[str] = None
+    phone_number: str
+    home_location: str
+    commute_schedule: str
+
+
+class DriverImportRow(DriverRegistration):
+    email: EmailStr
+
+
+class EmployeeBatchLookup(BaseModel):
+    user_ids: List[int]
+
+
 class EmployeeWithUser(BaseModel):
     id: int
     user_id: int
@@ -156,6 +179,7 @@ class IdentityVerificationUpdate(BaseModel):
 
 class LocationBasedDriverSearch(BaseModel):
     employee_location: str
+    limit: int = 10
 
 
 class RescheduleRequest(BaseModel):
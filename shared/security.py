@@ -1,15 +1,24 @@
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from shared.config import BaseServiceSettings
+from shared.utils.bloom_filter import BloomFilter
+import asyncio
+import hmac
+import httpx
+import logging
+import time
+import uuid
 
 # Initialize settings
 settings = BaseServiceSettings()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+logger = logging.getLogger(__name__)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -29,7 +38,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # A unique id per token lets a single token be revoked on logout
+    to_encode.update({"exp": expire, "jti": to_encode.get("jti") or uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -71,6 +81,15 @@ def get_current_user_role(token: str) -> str:
     return role
 
 
+def require_service_key(service_key: Optional[str]) -> None:
+    """Reject calls to internal-only endpoints that lack the shared service key"""
+    if not service_key or not hmac.compare_digest(service_key, settings.SERVICE_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Internal endpoint"
+        )
+
+
 def validate_token_middleware(token: str) -> dict:
     """Middleware for validating JWT tokens in API Gateway"""
     try:
@@ -78,9 +97,90 @@ def validate_token_middleware(token: str) -> dict:
         return {
             "user_id": int(payload.get("sub")),
             "role": payload.get("role"),
-            "email": payload.get("email")
+            "email": payload.get("email"),
+            "jti": payload.get("jti"),
+            "exp": payload.get("exp")
         }
     except JWTError as e:
         raise Exception(f"Token validation failed: {e}")
     except Exception as e:
-        raise Exception(f"Token validation failed: {e}")
\ No newline at end of file
+        raise Exception(f"Token validation failed: {e}")
+
+
+class TokenRevocationList:
+    """Gateway-side replica of the auth service's revoked token ids
+
+    The auth service publishes a Bloom filter of every revoked, unexpired
+    ``jti``; it is polled every ``sync_interval`` seconds with an ETag, so an
+    unchanged list costs a 304. A token missing from the filter is certainly
+    not revoked and needs no further work. Only filter hits are confirmed
+    with the auth service, and the answer is kept until the filter changes.
+    """
+
+    def __init__(self, auth_service_url: str, sync_interval: float = 5.0):
+        self.auth_service_url = auth_service_url.rstrip("/")
+        self.sync_interval = sync_interval
+        self._filter: Optional[BloomFilter] = None
+        self._etag: Optional[str] = None
+        self._revoked: Dict[str, float] = {}  # jti -> exp
+        self._confirmed_valid: Dict[str, float] = {}  # filter false positives -> exp
+
+    def install(self, data: bytes, etag: Optional[str] = None) -> None:
+        self._filter = BloomFilter.from_bytes(data)
+        self._etag = etag
+        # A token checked against the previous filter may have been revoked since
+        self._confirmed_valid.clear()
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+
+    def revoke_locally(self, jti: str, exp: float) -> None:
+        """Reject a token right away, before the next sync brings it in"""
+        self._revoked[jti] = exp
+
+    async def sync_once(self) -> bool:
+        """Fetch the filter if it changed; returns whether a new one was installed"""
+        headers = {"If-None-Match": self._etag} if self._etag else {}
+        async with httpx.AsyncClient(timeout=5) as client:
+            response = await client.get(f"{self.auth_service_url}/auth/revocations/filter", headers=headers)
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        self.install(response.content, response.headers.get("etag"))
+        return True
+
+    async def run_sync(self) -> None:
+        """Background job: keep the filter up to date"""
+        while True:
+            try:
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Token revocation sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    async def is_revoked(self, jti: Optional[str], exp: float) -> bool:
+        if not jti:
+            # Issued before tokens carried an id; it expires on its own
+            return False
+        if jti in self._revoked:
+            return True
+        # Until the first sync every token is checked exactly
+        if self._filter is not None and jti not in self._filter:
+            return False
+        if jti in self._confirmed_valid:
+            return False
+        try:
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.get(f"{self.auth_service_url}/auth/revocations/{jti}")
+            response.raise_for_status()
+            revoked = response.json()["revoked"]
+        except Exception as e:
+            # Fail closed: a possibly revoked token is not let through unchecked
+            logger.warning(f"Token revocation check failed: {e}")
+            return True
+        if revoked:
+            self._revoked[jti] = exp
+        else:
+            self._confirmed_valid[jti] = exp
+        return revoked
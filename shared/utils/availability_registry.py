@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+
+class AvailabilityRegistry:
+    """Process-local availability flags sharded by zone, with a change feed
+
+    Each zone keeps its own set of available keys, so "who is free in zone X"
+    and per-zone counts are answered from memory. Every change is appended to a
+    bounded feed with a monotonically increasing sequence number; consumers poll
+    ``changes_since(cursor)`` and fall back to ``snapshot()`` when their cursor
+    has aged out of the feed.
+    """
+
+    def __init__(self, feed_size: int = 10000):
+        self._zones: Dict[str, Set[Hashable]] = {}
+        self._entries: Dict[Hashable, Tuple[str, bool]] = {}
+        self._available_count = 0
+        self._feed: Deque[dict] = deque(maxlen=feed_size)
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def load(self, entries: List[Tuple[Hashable, str, bool]]) -> None:
+        """Replace all state with (key, zone, available) entries; clears the feed"""
+        with self._lock:
+            self._zones.clear()
+            self._entries.clear()
+            self._feed.clear()
+            self._available_count = 0
+            for key, zone, available in entries:
+                self._put(key, zone, available)
+
+    def set(self, key: Hashable, zone: str, available: bool) -> None:
+        """Record a key's zone and availability, emitting a change if either moved"""
+        with self._lock:
+            if self._entries.get(key) == (zone, available):
+                return
+            self._put(key, zone, available)
+            self._sequence += 1
+            self._feed.append({
+                "seq": self._sequence,
+                "driver_id": key,
+                "zone": zone,
+                "available": available,
+                "at": time.time()
+            })
+
+    def _put(self, key: Hashable, zone: str, available: bool) -> None:
+        previous = self._entries.get(key)
+        if previous is not None and previous[1]:
+            self._zones[previous[0]].discard(key)
+            self._available_count -= 1
+        self._entries[key] = (zone, available)
+        if available:
+            self._zones.setdefault(zone, set()).add(key)
+            self._available_count += 1
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is None:
+                return
+            self._put(key, previous[0], False)
+            del self._entries[key]
+
+    def is_available(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return bool(entry and entry[1])
+
+    def available_in_zone(self, zone: str) -> List[Hashable]:
+        """Available keys in a zone, in ascending order"""
+        with self._lock:
+            return sorted(self._zones.get(zone, ()))
+
+    def any_available(self) -> Optional[Hashable]:
+        """Lowest available key in any zone, or None"""
+        with self._lock:
+            candidates = [min(keys) for keys in self._zones.values() if keys]
+            return min(candidates) if candidates else None
+
+    def counts(self) -> dict:
+        """Total, available and per-zone available counts"""
+        with self._lock:
+            return {
+                "total": len(self._entries),
+                "available": self._available_count,
+                "by_zone": {zone: len(keys) for zone, keys in sorted(self._zones.items()) if keys}
+            }
+
+    @property
+    def cursor(self) -> int:
+        return self._sequence
+
+    def snapshot(self) -> dict:
+        """Every key's current state plus the cursor to resume the feed from"""
+        with self._lock:
+            return {
+                "cursor": self._sequence,
+                "drivers": [
+                    {"driver_id": key, "zone": zone, "available": available}
+                    for key, (zone, available) in self._entries.items()
+                ]
+            }
+
+    def changes_since(self, cursor: int, limit: int = 1000) -> dict:
+        """Changes after ``cursor``; ``reset`` means the caller must re-read the snapshot"""
+        with self._lock:
+            oldest = self._feed[0]["seq"] if self._feed else self._sequence + 1
+            if cursor > self._sequence or (cursor + 1 < oldest and cursor < self._sequence):
+                return {"cursor": self._sequence, "changes": [], "reset": True}
+            changes = [change for change in self._feed if change["seq"] > cursor][:limit]
+            next_cursor = changes[-1]["seq"] if changes else cursor
+            return {"cursor": next_cursor, "changes": changes, "reset": False}
@@ -0,0 +1,64 @@
+import hashlib
+import math
+import struct
+from typing import Iterable
+
+# bit count, hash count
+_HEADER = struct.Struct("<IB")
+
+
+class BloomFilter:
+    """Fixed-size set membership test with false positives but no false negatives
+
+    Keys are hashed once with BLAKE2b and the ``hash_count`` bit positions are
+    derived from the two halves of the digest (double hashing). The filter
+    serializes to a few bytes per key, so it is cheap to ship between services.
+    """
+
+    def __init__(self, size_bits: int, hash_count: int):
+        if size_bits < 8 or hash_count < 1:
+            raise ValueError("A Bloom filter needs at least 8 bits and one hash")
+        self.size_bits = size_bits
+        self.hash_count = hash_count
+        self._bits = bytearray((size_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.001) -> "BloomFilter":
+        """Size a filter so ``capacity`` keys give about ``error_rate`` false positives"""
+        capacity = max(capacity, 1)
+        size_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hash_count = max(1, round(size_bits / capacity * math.log(2)))
+        return cls(size_bits, hash_count)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str], capacity: int, error_rate: float = 0.001) -> "BloomFilter":
+        bloom = cls.for_capacity(capacity, error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first, second = struct.unpack("<QQ", digest)
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size_bits
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(self.size_bits, self.hash_count) + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        size_bits, hash_count = _HEADER.unpack_from(data)
+        bloom = cls(size_bits, hash_count)
+        bits = data[_HEADER.size:]
+        if len(bits) != len(bloom._bits):
+            raise ValueError("Bloom filter data does not match its header")
+        bloom._bits[:] = bits
+        return bloom
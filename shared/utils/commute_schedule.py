@@ -0,0 +1,82 @@
+import re
+from dataclasses import dataclass
+from datetime import time
+from typing import FrozenSet, List, Optional
+
+WEEKDAY_NAMES = {
+    "mon": 0, "monday": 0,
+    "tue": 1, "tues": 1, "tuesday": 1,
+    "wed": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3,
+    "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5,
+    "sun": 6, "sunday": 6,
+}
+WORKING_DAYS = frozenset(range(5))
+
+_DAY_RANGE_RE = re.compile(r"\b([a-z]{3,9})\s*(?:-|to)\s*([a-z]{3,9})\b")
+_DAY_RE = re.compile(r"\b([a-z]{3,9})\b")
+_TIME_RE = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?(?![\d])")
+
+
+@dataclass(frozen=True)
+class CommuteRecurrence:
+    weekdays: FrozenSet[int]  # 0 = Monday
+    pickup_time: time
+    drop_time: time
+
+
+def _parse_days(text: str) -> FrozenSet[int]:
+    days = set()
+    for first, last in _DAY_RANGE_RE.findall(text):
+        if first in WEEKDAY_NAMES and last in WEEKDAY_NAMES:
+            start, end = WEEKDAY_NAMES[first], WEEKDAY_NAMES[last]
+            days.update((start + offset) % 7 for offset in range((end - start) % 7 + 1))
+    text = _DAY_RANGE_RE.sub(" ", text)
+    if "weekday" in text:
+        days.update(WORKING_DAYS)
+    if "weekend" in text:
+        days.update((5, 6))
+    if "daily" in text or "every day" in text:
+        days.update(range(7))
+    days.update(WEEKDAY_NAMES[word] for word in _DAY_RE.findall(text) if word in WEEKDAY_NAMES)
+    return frozenset(days)
+
+
+def _parse_times(text: str) -> List[time]:
+    times = []
+    for hour, minute, meridiem in _TIME_RE.findall(text):
+        hour, minute = int(hour), int(minute or 0)
+        if meridiem:
+            if not 1 <= hour <= 12:
+                continue
+            hour = hour % 12 + (12 if meridiem.startswith("p") else 0)
+        if hour > 23 or minute > 59:
+            continue
+        times.append((time(hour, minute), bool(meridiem)))
+
+    if len(times) < 2:
+        return [t for t, _ in times]
+    (start, _), (end, end_explicit) = times[0], times[1]
+    # "9-6" style: a morning start with an earlier bare end hour means the afternoon.
+    # Anything else with the end before the start is an overnight shift.
+    if not end_explicit and end <= start and start.hour < 12:
+        end = time(end.hour + 12, end.minute)
+    return [start, end]
+
+
+def parse_commute_schedule(schedule: Optional[str]) -> Optional[CommuteRecurrence]:
+    """Parse a free-text schedule like "Mon-Fri 9:00 AM - 6:00 PM" or "9-6"
+
+    Returns None when no pickup and drop time can be found. Days default to
+    Monday-Friday when the text doesn't mention any.
+    """
+    if not schedule:
+        return None
+    text = schedule.lower().replace("–", "-").replace("—", "-")
+    days = _parse_days(text)
+    # Drop day names so only times (and am/pm markers) are left
+    times = _parse_times(_DAY_RE.sub(" ", text))
+    if len(times) < 2 or times[0] == times[1]:
+        return None
+    return CommuteRecurrence(weekdays=days or WORKING_DAYS, pickup_time=times[0], drop_time=times[1])
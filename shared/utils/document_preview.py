@@ -0,0 +1,80 @@
+import os
+import re
+from typing import Optional
+
+# Optional: thumbnails need Pillow, PDF first-page rendering also needs PyMuPDF.
+# Without them previews are skipped but metadata is still extracted.
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+PREVIEW_MAX_SIZE = (480, 480)
+PREVIEW_JPEG_QUALITY = 70
+# Upper bound on how much of a PDF is scanned for page objects when PyMuPDF is missing
+PDF_SCAN_BYTES = 16 * 1024 * 1024
+
+_PDF_PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def can_render_previews(path: str) -> bool:
+    """Whether a preview can be generated for this file with the installed libraries"""
+    if Image is None:
+        return False
+    if path.lower().endswith(".pdf"):
+        return pymupdf is not None
+    return True
+
+
+def extract_metadata(path: str) -> dict:
+    """Basic facts about a stored document (size, type, dimensions, page count)"""
+    metadata = {"size_bytes": os.path.getsize(path)}
+    if path.lower().endswith(".pdf"):
+        metadata["content_type"] = "application/pdf"
+        if pymupdf is not None:
+            with pymupdf.open(path) as document:
+                metadata["page_count"] = document.page_count
+                if document.page_count:
+                    page = document[0].rect
+                    metadata["width"], metadata["height"] = round(page.width), round(page.height)
+        else:
+            with open(path, "rb") as f:
+                metadata["page_count"] = len(_PDF_PAGE_RE.findall(f.read(PDF_SCAN_BYTES)))
+    elif Image is not None:
+        with Image.open(path) as image:
+            metadata["content_type"] = Image.MIME.get(image.format, "application/octet-stream")
+            metadata["width"], metadata["height"] = image.size
+    return metadata
+
+
+def render_preview(path: str, preview_path: str) -> Optional[str]:
+    """Write a compressed JPEG thumbnail (first page for PDFs); returns its path or None if unsupported"""
+    if not can_render_previews(path):
+        return None
+
+    if path.lower().endswith(".pdf"):
+        with pymupdf.open(path) as document:
+            if not document.page_count:
+                return None
+            page = document[0]
+            # Render at just enough resolution for the thumbnail
+            zoom = min(PREVIEW_MAX_SIZE[0] / page.rect.width, PREVIEW_MAX_SIZE[1] / page.rect.height, 2.0)
+            pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+            image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+    else:
+        with Image.open(path) as original:
+            # draft() lets JPEG decode at reduced scale instead of full resolution
+            original.draft("RGB", PREVIEW_MAX_SIZE)
+            image = ImageOps.exif_transpose(original).convert("RGB")
+
+    image.thumbnail(PREVIEW_MAX_SIZE)
+    os.makedirs(os.path.dirname(preview_path), exist_ok=True)
+    tmp_path = f"{preview_path}.part"
+    image.save(tmp_path, "JPEG", quality=PREVIEW_JPEG_QUALITY, optimize=True)
+    os.replace(tmp_path, preview_path)
+    return preview_path
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+
+@dataclass(frozen=True)
+class Event:
+    event_id: str  # Idempotency key: redeliveries of the same event carry the same id
+    event_type: str
+    aggregate_id: int
+    payload: dict
+    occurred_at: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+EventHandler = Callable[[List[Event]], Awaitable[None]]
+
+
+class DeliveryError(Exception):
+    """One or more subscribers failed; the batch must be published to them again"""
+
+    def __init__(self, failures: Dict[str, Exception]):
+        self.failures = failures
+        super().__init__(", ".join(f"{name}: {error}" for name, error in failures.items()))
+
+
+class InProcessBroker:
+    """Hands each published batch straight to the subscribers in this process
+
+    Delivery is at-least-once: ``publish`` raises ``DeliveryError`` naming the
+    subscribers that failed, and the caller republishes the batch to just
+    those. Subscribers must still dedupe on ``event_id`` in case the caller
+    crashes before recording which deliveries succeeded.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, tuple] = {}
+
+    def subscribe(self, name: str, handler: EventHandler, event_types: Optional[Iterable[str]] = None) -> None:
+        """Register ``handler`` for all events, or only the given event types"""
+        self._subscribers[name] = (handler, frozenset(event_types) if event_types else None)
+
+    def _matching(self, event_types: Optional[frozenset], events: List[Event]) -> List[Event]:
+        if event_types is None:
+            return events
+        return [event for event in events if event.event_type in event_types]
+
+    def interested(self, event: Event, names: Iterable[str]) -> List[str]:
+        """Which of the named subscribers receive ``event``"""
+        return [
+            name for name in names
+            if name in self._subscribers and self._matching(self._subscribers[name][1], [event])
+        ]
+
+    async def _deliver(self, name: str, events: List[Event]) -> None:
+        handler, event_types = self._subscribers[name]
+        matching = self._matching(event_types, events)
+        if matching:
+            await handler(matching)
+
+    async def publish(self, events: List[Event], subscribers: Optional[Iterable[str]] = None) -> None:
+        """Deliver to every subscriber, or only the named ones (e.g. those that failed before)"""
+        names = [name for name in self._subscribers if subscribers is None or name in subscribers]
+        outcomes = await asyncio.gather(
+            *(self._deliver(name, events) for name in names), return_exceptions=True
+        )
+        failures = {name: outcome for name, outcome in zip(names, outcomes) if isinstance(outcome, Exception)}
+        if failures:
+            raise DeliveryError(failures)
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteBroker(InProcessBroker):
+    """Development broker that keeps a durable event log in a SQLite file
+
+    Published events are appended once (keyed by ``event_id``) and every
+    subscriber has its own offset into the log, so a failing subscriber
+    catches up on the next publish without redelivering to the others.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, event_id TEXT UNIQUE NOT NULL, body TEXT NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS offsets (subscriber TEXT PRIMARY KEY, seq INTEGER NOT NULL)"
+            )
+
+    def _append(self, events: List[Event]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO events (event_id, body) VALUES (?, ?)",
+                [(event.event_id, json.dumps(event.to_dict())) for event in events]
+            )
+
+    def _pending(self, name: str, limit: int = 1000) -> tuple:
+        with self._lock:
+            row = self._connection.execute("SELECT seq FROM offsets WHERE subscriber = ?", (name,)).fetchone()
+            rows = self._connection.execute(
+                "SELECT seq, body FROM events WHERE seq > ? ORDER BY seq LIMIT ?", (row[0] if row else 0, limit)
+            ).fetchall()
+        return [Event(**json.loads(body)) for _, body in rows], (rows[-1][0] if rows else None)
+
+    def _advance(self, name: str, seq: int) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO offsets (subscriber, seq) VALUES (?, ?) "
+                "ON CONFLICT(subscriber) DO UPDATE SET seq = excluded.seq",
+                (name, seq)
+            )
+
+    async def _deliver(self, name: str, events: List[Event]) -> None:
+        while True:
+            pending, last_seq = await asyncio.to_thread(self._pending, name)
+            if not pending:
+                return
+            await super()._deliver(name, pending)
+            await asyncio.to_thread(self._advance, name, last_seq)
+
+    async def publish(self, events: List[Event], subscribers: Optional[Iterable[str]] = None) -> None:
+        await asyncio.to_thread(self._append, events)
+        await super().publish(events, subscribers)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class IdempotencyFilter:
+    """Remembers recently handled event ids so redelivered events are skipped
+
+    Call ``remember`` only once the events were handled, so a failure part
+    way through lets the redelivery handle them again.
+    """
+
+    def __init__(self, capacity: int = 100000):
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._capacity = capacity
+        self._lock = threading.Lock()
+
+    def fresh(self, events: List) -> List:
+        """Events (``Event`` objects or dicts) whose ids haven't been remembered"""
+        with self._lock:
+            return [
+                event for event in events
+                if (event["event_id"] if isinstance(event, dict) else event.event_id) not in self._seen
+            ]
+
+    def remember(self, event_ids: Iterable[str]) -> None:
+        with self._lock:
+            for event_id in event_ids:
+                self._seen[event_id] = None
+                self._seen.move_to_end(event_id)
+            while len(self._seen) > self._capacity:
+                self._seen.popitem(last=False)
+
+
+def create_broker(url: Optional[str]) -> InProcessBroker:
+    """Broker for ``EVENT_BROKER_URL``: empty/"memory" or "sqlite:///path/to/events.db" """
+    if not url or url == "memory":
+        return InProcessBroker()
+    if url.startswith("sqlite:///"):
+        return SQLiteBroker(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported event broker: {url}")
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One consumer's bounded queue; when it is full the oldest message is dropped"""
+
+    def __init__(self, topic: Hashable, queue_size: int):
+        self.topic = topic
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, message: Any) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(message)
+
+    async def get(self) -> Any:
+        return await self._queue.get()
+
+
+class FanoutHub:
+    """Runs one producer per topic and fans each message out to every subscriber
+
+    The producer for a topic starts with its first subscriber and stops with
+    its last, so the cost of producing updates depends on the number of topics
+    being watched, not on the number of watchers. A slow subscriber only loses
+    its own oldest messages.
+    """
+
+    def __init__(self, producer: Callable[[Hashable], Awaitable[Any]], interval: float, queue_size: int = 16):
+        self.producer = producer
+        self.interval = interval
+        self.queue_size = queue_size
+        self._subscribers: Dict[Hashable, Set[Subscription]] = {}
+        self._producers: Dict[Hashable, asyncio.Task] = {}
+        self._latest: Dict[Hashable, Any] = {}
+
+    def subscribe(self, topic: Hashable) -> Subscription:
+        subscription = Subscription(topic, self.queue_size)
+        self._subscribers.setdefault(topic, set()).add(subscription)
+        if topic in self._latest:
+            # New watchers see the current state right away
+            subscription.offer(self._latest[topic])
+        if topic not in self._producers:
+            self._producers[topic] = asyncio.create_task(self._produce(topic))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.topic)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.topic]
+            self._latest.pop(subscription.topic, None)
+            task = self._producers.pop(subscription.topic, None)
+            if task:
+                task.cancel()
+
+    def has_subscribers(self, topic: Hashable) -> bool:
+        return topic in self._subscribers
+
+    def subscriber_count(self, topic: Optional[Hashable] = None) -> int:
+        if topic is not None:
+            return len(self._subscribers.get(topic, ()))
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, topic: Hashable, message: Any) -> int:
+        """Queue ``message`` for every subscriber of ``topic``; returns how many"""
+        subscribers = self._subscribers.get(topic)
+        if not subscribers:
+            return 0
+        self._latest[topic] = message
+        for subscription in subscribers:
+            subscription.offer(message)
+        return len(subscribers)
+
+    async def _produce(self, topic: Hashable) -> None:
+        while True:
+            try:
+                self.publish(topic, await self.producer(topic))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Producer for {topic!r} failed: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi import HTTPException, UploadFile, status
+
+CHUNK_SIZE = 1024 * 1024
+
+# Leading bytes of each accepted upload type, checked against the declared content type
+FILE_SIGNATURES: Dict[str, bytes] = {
+    "application/pdf": b"%PDF",
+    "image/jpeg": b"\xff\xd8\xff",
+    "image/jpg": b"\xff\xd8\xff",
+    "image/png": b"\x89PNG\r\n\x1a\n",
+}
+
+FILE_EXTENSIONS: Dict[str, str] = {
+    "application/pdf": ".pdf",
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/png": ".png",
+}
+
+
+@dataclass
+class StoredFile:
+    path: str
+    sha256: str
+    size: int
+    content_type: str
+    deduplicated: bool
+
+
+class ContentAddressedStore:
+    """Stores uploads on disk under the SHA-256 of their content
+
+    Files land at ``<root>/<first two hex digits>/<digest><ext>``, so the same
+    document uploaded twice is stored once. Uploads are read in fixed-size
+    chunks and every disk write and hash update runs in a worker thread,
+    keeping the event loop free and memory flat regardless of file size.
+    """
+
+    def __init__(self, root: str, chunk_size: int = CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+        self._tmp_dir = os.path.join(root, "tmp")
+
+    def path_for(self, digest: str, extension: str = "") -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}{extension}")
+
+    async def save_upload(self, upload: UploadFile, max_bytes: int) -> StoredFile:
+        """Stream an upload to disk, rejecting it as soon as it exceeds max_bytes"""
+        content_type = upload.content_type or ""
+        signature = FILE_SIGNATURES.get(content_type)
+        if signature is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid file type. Only PDF, JPG, PNG allowed."
+            )
+
+        await asyncio.to_thread(os.makedirs, self._tmp_dir, exist_ok=True)
+        tmp = await asyncio.to_thread(
+            tempfile.NamedTemporaryFile, dir=self._tmp_dir, suffix=".part", delete=False
+        )
+        hasher = hashlib.sha256()
+        size = 0
+        stored: Optional[StoredFile] = None
+        try:
+            while True:
+                chunk = await upload.read(self.chunk_size)
+                if not chunk:
+                    break
+                if size == 0 and not chunk.startswith(signature):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="File content does not match its declared type"
+                    )
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds the {max_bytes // (1024 * 1024)} MB limit"
+                    )
+                await asyncio.to_thread(self._write_chunk, tmp, hasher, chunk)
+
+            if size == 0:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Uploaded file is empty"
+                )
+
+            await asyncio.to_thread(self._close, tmp)
+            digest = hasher.hexdigest()
+            path = self.path_for(digest, FILE_EXTENSIONS[content_type])
+            created = await asyncio.to_thread(self._commit, tmp.name, path)
+            stored = StoredFile(
+                path=path,
+                sha256=digest,
+                size=size,
+                content_type=content_type,
+                deduplicated=not created
+            )
+            return stored
+        finally:
+            if stored is None or stored.deduplicated:
+                await asyncio.to_thread(self._discard, tmp)
+
+    @staticmethod
+    def _write_chunk(tmp, hasher, chunk: bytes) -> None:
+        hasher.update(chunk)
+        tmp.write(chunk)
+
+    @staticmethod
+    def _close(tmp) -> None:
+        tmp.flush()
+        os.fsync(tmp.fileno())
+        tmp.close()
+
+    @staticmethod
+    def _commit(tmp_path: str, path: str) -> bool:
+        """Move the finished temp file into place; False if the content was already stored"""
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return True
+
+    @staticmethod
+    def _discard(tmp) -> None:
+        if not tmp.closed:
+            tmp.close()
+        try:
+            os.remove(tmp.name)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,194 @@
+import csv
+import difflib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "bangalore_localities.csv"
+)
+DEFAULT_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "geocode_cache.db")
+DEFAULT_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "4096"))
+
+# Sentinel for locations we already tried and could not resolve
+_MISS = object()
+
+
+def normalize_location(location: str) -> str:
+    """Lowercase a free-text location and collapse punctuation/whitespace"""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", (location or "").lower()).split())
+
+
+class GeocodeCache:
+    """LRU cache of resolved location strings, persisted to a SQLite file"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, capacity: int = DEFAULT_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._tick = 0
+
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS geocode_cache ("
+                    "query TEXT PRIMARY KEY, locality TEXT, zone TEXT, lat REAL, lng REAL, "
+                    "last_used INTEGER NOT NULL)"
+                )
+                self._conn.commit()
+                self._load()
+            except sqlite3.Error as e:
+                logger.warning(f"Geocode cache disabled, could not open {path}: {e}")
+                self._conn = None
+
+    def _load(self):
+        """Warm the in-memory LRU from the most recently used persisted entries"""
+        rows = self._conn.execute(
+            "SELECT query, locality, zone, lat, lng FROM geocode_cache ORDER BY last_used DESC LIMIT ?",
+            (self.capacity,)
+        ).fetchall()
+        for query, locality, zone, lat, lng in reversed(rows):
+            self._entries[query] = _MISS if locality is None else {
+                "locality": locality, "zone": zone, "lat": lat, "lng": lng
+            }
+        self._tick = len(rows)
+
+    def get(self, key: str):
+        """Return a cached result, None for a cached miss, or _MISS if unknown"""
+        with self._lock:
+            if key not in self._entries:
+                return _MISS
+            self._entries.move_to_end(key)
+            value = self._entries[key]
+            return None if value is _MISS else value
+
+    def put(self, key: str, value: Optional[Dict]):
+        """Store a resolved location (or a miss) and evict the least recently used entry"""
+        with self._lock:
+            self._entries[key] = _MISS if value is None else value
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.capacity:
+                evicted.append(self._entries.popitem(last=False)[0])
+
+            if self._conn is None:
+                return
+            try:
+                self._tick += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO geocode_cache (query, locality, zone, lat, lng, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key,
+                     value["locality"] if value else None,
+                     value["zone"] if value else None,
+                     value["lat"] if value else None,
+                     value["lng"] if value else None,
+                     self._tick)
+                )
+                if evicted:
+                    self._conn.executemany("DELETE FROM geocode_cache WHERE query = ?", [(k,) for k in evicted])
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist geocode cache entry: {e}")
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Geocoder:
+    """Offline geocoder backed by a CSV gazetteer of localities"""
+
+    def __init__(self, gazetteer_path: str = DEFAULT_GAZETTEER_PATH,
+                 cache: Optional[GeocodeCache] = None,
+                 fuzzy_cutoff: float = 0.85):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.cache = cache if cache is not None else GeocodeCache(path=None)
+        self.localities: List[Dict] = []
+        self._index: Dict[str, Dict] = {}
+        self._load_gazetteer(gazetteer_path)
+        # Longest names first so "chikka bellandur" wins over "bellandur"
+        self._names_by_length = sorted(self._index, key=len, reverse=True)
+
+    def _load_gazetteer(self, path: str):
+        """Load localities and their aliases into a normalized-name index"""
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                locality = {
+                    "locality": row["locality"],
+                    "zone": row["zone"],
+                    "lat": float(row["lat"]),
+                    "lng": float(row["lng"])
+                }
+                self.localities.append(locality)
+                names = [row["locality"]] + [a for a in (row.get("aliases") or "").split("|") if a]
+                for name in names:
+                    self._index.setdefault(normalize_location(name), locality)
+
+    def geocode(self, location: str) -> Optional[Dict]:
+        """Resolve a free-text location to {locality, zone, lat, lng}, or None"""
+        key = normalize_location(location)
+        if not key:
+            return None
+
+        cached = self.cache.get(key)
+        if cached is not _MISS:
+            return dict(cached) if cached else None
+
+        result = self._resolve(key)
+        self.cache.put(key, result)
+        return dict(result) if result else None
+
+    def _resolve(self, query: str) -> Optional[Dict]:
+        """Exact, then whole-word containment, then fuzzy n-gram matching"""
+        if query in self._index:
+            return self._index[query]
+
+        padded = f" {query} "
+        for name in self._names_by_length:
+            if f" {name} " in padded:
+                return self._index[name]
+
+        # Fuzzy match each 1-3 word window of the query (handles typos in addresses)
+        tokens = query.split()
+        best_name, best_ratio = None, self.fuzzy_cutoff
+        for size in (3, 2, 1):
+            for start in range(len(tokens) - size + 1):
+                window = " ".join(tokens[start:start + size])
+                for name in difflib.get_close_matches(window, self._index.keys(), n=1, cutoff=best_ratio):
+                    ratio = difflib.SequenceMatcher(None, window, name).ratio()
+                    if ratio > best_ratio or best_name is None:
+                        best_name, best_ratio = name, ratio
+
+        return self._index[best_name] if best_name else None
+
+
+_geocoder: Optional[Geocoder] = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder() -> Geocoder:
+    """Get the process-wide geocoder, creating it on first use"""
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = Geocoder(
+                    gazetteer_path=os.getenv("GEOCODER_GAZETTEER_PATH", DEFAULT_GAZETTEER_PATH),
+                    cache=GeocodeCache(DEFAULT_CACHE_PATH, DEFAULT_CACHE_SIZE)
+                )
+    return _geocoder
+
+
+def geocode_location(location: Optional[str]) -> Optional[Dict]:
+    """Geocode a location string with the shared geocoder"""
+    if not location:
+        return None
+    return get_geocoder().geocode(location)
@@ -81,4 +81,9 @@ def propagate_user_context(user_id: int, role: str) -> Dict[str, str]:
     return {
         "X-User-ID": str(user_id),
         "X-User-Role": role
-    }
\ No newline at end of file
+    }
+
+
+def service_key_header(service_key: str) -> Dict[str, str]:
+    """Create header that authorizes a call to an internal-only endpoint"""
+    return {"X-Service-Key": service_key}
@@ -0,0 +1,98 @@
+import bisect
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class IntervalIndex:
+    """Per-resource sorted half-open intervals [start, end) for overlap checks
+
+    Each resource (e.g. a driver or vehicle) keeps its bookings sorted by start
+    time. An overlap query bisects to the first booking starting at or after
+    the query's end and walks backwards only while a booking could still reach
+    the query start (bounded by the longest booking seen for that resource), so
+    checks cost O(log n + k) for k conflicts.
+    """
+
+    def __init__(self):
+        # resource -> sorted list of (start, end, item)
+        self._bookings: Dict[Hashable, List[Tuple[Any, Any, Hashable]]] = {}
+        self._max_length: Dict[Hashable, Any] = {}
+        # item -> list of (resource, start, end) so items can be moved or removed
+        self._items: Dict[Hashable, List[Tuple[Hashable, Any, Any]]] = {}
+        self._lock = threading.RLock()
+
+    def upsert(self, item: Hashable, resources: List[Hashable], start, end) -> None:
+        """Book ``item`` on each resource for [start, end), replacing any previous booking"""
+        with self._lock:
+            self._discard(item)
+            entries = []
+            for resource in resources:
+                if resource is None:
+                    continue
+                bookings = self._bookings.setdefault(resource, [])
+                bisect.insort(bookings, (start, end, item))
+                length = end - start
+                if resource not in self._max_length or length > self._max_length[resource]:
+                    self._max_length[resource] = length
+                entries.append((resource, start, end))
+            if entries:
+                self._items[item] = entries
+
+    def remove(self, item: Hashable) -> None:
+        with self._lock:
+            self._discard(item)
+
+    def _discard(self, item: Hashable) -> None:
+        for resource, start, end in self._items.pop(item, ()):
+            bookings = self._bookings.get(resource)
+            if not bookings:
+                continue
+            position = bisect.bisect_left(bookings, (start, end, item))
+            if position < len(bookings) and bookings[position][2] == item:
+                bookings.pop(position)
+            if not bookings:
+                del self._bookings[resource]
+                self._max_length.pop(resource, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bookings.clear()
+            self._max_length.clear()
+            self._items.clear()
+
+    def overlapping(self, resource: Hashable, start, end,
+                    exclude: Optional[Hashable] = None) -> List[Tuple[Any, Any, Hashable]]:
+        """Bookings on ``resource`` that overlap [start, end), ordered by start"""
+        with self._lock:
+            bookings = self._bookings.get(resource)
+            if not bookings:
+                return []
+            earliest_start = start - self._max_length[resource]
+            # Everything from here on starts at or after `end` and cannot overlap
+            position = bisect.bisect_left(bookings, (end,))
+            conflicts = []
+            for index in range(position - 1, -1, -1):
+                booking_start, booking_end, item = bookings[index]
+                if booking_start < earliest_start:
+                    break
+                if booking_end > start and item != exclude:
+                    conflicts.append(bookings[index])
+            conflicts.reverse()
+            return conflicts
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def find_overlaps(intervals: List[Tuple[Any, Any, Hashable]]) -> List[Tuple[Hashable, Hashable]]:
+    """All overlapping (item, item) pairs among [start, end) intervals, via a sorted sweep"""
+    overlaps = []
+    active: List[Tuple[Any, Hashable]] = []  # (end, item) of intervals still open
+    for start, end, item in sorted(intervals, key=lambda interval: (interval[0], interval[1])):
+        active = [(active_end, active_item) for active_end, active_item in active if active_end > start]
+        overlaps.extend((active_item, item) for _, active_item in active)
+        active.append((end, item))
+    return overlaps
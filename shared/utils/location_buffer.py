@@ -0,0 +1,106 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+@dataclass
+class LocationFix:
+    driver_id: int
+    trip_id: Optional[int]
+    timestamp: float  # Seconds since the epoch
+    lat: float
+    lng: float
+    speed_kmh: Optional[float] = None
+    heading: Optional[float] = None
+
+
+class LocationBuffer:
+    """Coalesces high-frequency position pings per driver until they are flushed
+
+    Pings are grouped into ``resolution``-second slots per driver and only the
+    last ping in each slot is kept, so a phone reporting 10 times a second
+    costs one stored row per slot. Pings older than the driver's last flushed
+    position are dropped. The newest fix per driver and per trip is kept
+    separately and survives flushes, for live tracking.
+    """
+
+    def __init__(self, resolution: float = 1.0, max_pending: int = 500000):
+        self.resolution = resolution
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[int, int], LocationFix] = {}
+        self._latest_by_driver: Dict[int, LocationFix] = {}
+        self._latest_by_trip: Dict[int, LocationFix] = {}
+        self._flushed_until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def add(self, fixes: List[LocationFix]) -> int:
+        """Buffer fixes; returns how many are new slots (not coalesced or dropped)"""
+        added = 0
+        with self._lock:
+            self.received += len(fixes)
+            for fix in fixes:
+                if fix.timestamp <= self._flushed_until.get(fix.driver_id, float("-inf")):
+                    self.dropped += 1
+                    continue
+                key = (fix.driver_id, int(fix.timestamp // self.resolution))
+                previous = self._pending.get(key)
+                if previous is not None:
+                    self.coalesced += 1
+                    if fix.timestamp < previous.timestamp:
+                        continue
+                elif len(self._pending) >= self.max_pending:
+                    # Flushing has fallen far behind; shed load rather than grow without bound
+                    self.dropped += 1
+                    continue
+                else:
+                    added += 1
+                self._pending[key] = fix
+                self._remember_latest(fix)
+        return added
+
+    def _remember_latest(self, fix: LocationFix) -> None:
+        latest = self._latest_by_driver.get(fix.driver_id)
+        if latest is None or fix.timestamp >= latest.timestamp:
+            self._latest_by_driver[fix.driver_id] = fix
+            if fix.trip_id is not None:
+                self._latest_by_trip[fix.trip_id] = fix
+
+    def drain(self) -> List[LocationFix]:
+        """Take every pending fix, ordered by driver and time"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for fix in pending.values():
+                if fix.timestamp > self._flushed_until.get(fix.driver_id, float("-inf")):
+                    self._flushed_until[fix.driver_id] = fix.timestamp
+        return sorted(pending.values(), key=lambda fix: (fix.driver_id, fix.timestamp))
+
+    def requeue(self, fixes: List[LocationFix]) -> None:
+        """Put back fixes whose flush failed"""
+        with self._lock:
+            for fix in fixes:
+                key = (fix.driver_id, int(fix.timestamp // self.resolution))
+                # A newer ping may already have taken the slot
+                self._pending.setdefault(key, fix)
+
+    def latest_for_driver(self, driver_id: int) -> Optional[LocationFix]:
+        return self._latest_by_driver.get(driver_id)
+
+    def latest_for_trip(self, trip_id: Hashable) -> Optional[LocationFix]:
+        return self._latest_by_trip.get(trip_id)
+
+    def forget_trip(self, trip_id: Hashable) -> None:
+        with self._lock:
+            self._latest_by_trip.pop(trip_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "received": self.received,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "pending": len(self._pending),
+                "drivers": len(self._latest_by_driver)
+            }
@@ -0,0 +1,101 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class RingSeries:
+    """Fixed number of consecutive time buckets of one width, reused as time moves on
+
+    Bucket ``n`` covers [n * width, (n + 1) * width) seconds since the epoch and
+    lives in slot ``n % size``; a slot still holding an older bucket is reset
+    when that bucket is written again, so memory never grows.
+    """
+
+    def __init__(self, width: int, size: int):
+        self.width = width
+        self.size = size
+        self._buckets: List[Optional[int]] = [None] * size
+        self._values: List[Dict[str, float]] = [{} for _ in range(size)]
+
+    def _slot(self, bucket: int) -> int:
+        slot = bucket % self.size
+        if self._buckets[slot] != bucket:
+            self._buckets[slot] = bucket
+            self._values[slot] = {}
+        return slot
+
+    def add(self, bucket: int, metric: str, value: float) -> None:
+        values = self._values[self._slot(bucket)]
+        values[metric] = values.get(metric, 0) + value
+
+    def set(self, bucket: int, metric: str, value: float) -> None:
+        self._values[self._slot(bucket)][metric] = value
+
+    def get(self, bucket: int) -> Dict[str, float]:
+        slot = bucket % self.size
+        return dict(self._values[slot]) if self._buckets[slot] == bucket else {}
+
+
+class TimeSeriesRollup:
+    """Counters and gauges rolled up per bucket at several resolutions at once
+
+    ``resolutions`` maps a name to (bucket width in seconds, buckets kept),
+    e.g. {"minute": (60, 1440), "hour": (3600, 720)}. Every touched bucket is
+    remembered as dirty until ``take_dirty`` hands it out for persistence.
+    """
+
+    def __init__(self, resolutions: Dict[str, Tuple[int, int]]):
+        self._series = {name: RingSeries(width, size) for name, (width, size) in resolutions.items()}
+        self._dirty: Set[Tuple[str, int]] = set()
+        self._lock = threading.Lock()
+
+    def bucket_of(self, resolution: str, timestamp: float) -> int:
+        return int(timestamp // self._series[resolution].width)
+
+    def bucket_start(self, resolution: str, bucket: int) -> float:
+        return bucket * self._series[resolution].width
+
+    def increment(self, metric: str, timestamp: float, value: float = 1) -> None:
+        """Add to a counter in the buckets containing ``timestamp``"""
+        with self._lock:
+            for name, series in self._series.items():
+                bucket = int(timestamp // series.width)
+                series.add(bucket, metric, value)
+                self._dirty.add((name, bucket))
+
+    def gauge(self, metric: str, timestamp: float, value: float) -> None:
+        """Record the latest value of a gauge in the buckets containing ``timestamp``"""
+        with self._lock:
+            for name, series in self._series.items():
+                bucket = int(timestamp // series.width)
+                series.set(bucket, metric, value)
+                self._dirty.add((name, bucket))
+
+    def load(self, rows: Iterable[Tuple[str, int, str, float]]) -> None:
+        """Restore persisted (resolution, bucket, metric, value) rows"""
+        with self._lock:
+            for resolution, bucket, metric, value in rows:
+                if resolution in self._series:
+                    self._series[resolution].set(bucket, metric, value)
+
+    def series(self, resolution: str, start: float, end: float) -> List[Tuple[int, Dict[str, float]]]:
+        """(bucket, values) for every bucket from ``start`` up to and including ``end``'s"""
+        series = self._series[resolution]
+        first, last = int(start // series.width), int(end // series.width)
+        # Older buckets than the ring holds have been overwritten
+        first = max(first, last - series.size + 1)
+        with self._lock:
+            return [(bucket, series.get(bucket)) for bucket in range(first, last + 1)]
+
+    def take_dirty(self) -> List[Tuple[str, int, Dict[str, float]]]:
+        """Buckets changed since the last call, with their current values"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            return [
+                (resolution, bucket, self._series[resolution].get(bucket))
+                for resolution, bucket in sorted(dirty)
+            ]
+
+    def requeue(self, buckets: Iterable[Tuple[str, int]]) -> None:
+        """Mark (resolution, bucket) pairs dirty again after their flush failed"""
+        with self._lock:
+            self._dirty.update(buckets)
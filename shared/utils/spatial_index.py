@@ -0,0 +1,140 @@
+import heapq
+import math
+import threading
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two coordinates in km"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lng = math.radians(lng2 - lng1)
+
+    a = (math.sin(delta_lat / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """In-memory uniform grid of points for k-nearest-neighbour lookups
+
+    Points are bucketed into square cells of ``cell_size_deg`` degrees. A query
+    walks rings of cells outwards from the query cell and stops as soon as the
+    nearest unvisited ring is further away than the k-th best match, so only a
+    handful of cells are touched regardless of how many points are indexed.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.01):
+        self.cell_size_deg = cell_size_deg
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._points: Dict[Hashable, Tuple[float, float]] = {}
+        # Grow-only bounding box of occupied cells; bounds how far a query walks
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+        self._lock = threading.RLock()
+
+    def _cell_for(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size_deg), math.floor(lng / self.cell_size_deg))
+
+    def upsert(self, key: Hashable, lat: float, lng: float) -> None:
+        """Insert a point or move an existing one"""
+        with self._lock:
+            self._discard(key)
+            self._points[key] = (lat, lng)
+            cell = self._cell_for(lat, lng)
+            self._cells.setdefault(cell, set()).add(key)
+            if self._bounds is None:
+                self._bounds = (cell[0], cell[0], cell[1], cell[1])
+            else:
+                min_i, max_i, min_j, max_j = self._bounds
+                self._bounds = (min(min_i, cell[0]), max(max_i, cell[0]),
+                                min(min_j, cell[1]), max(max_j, cell[1]))
+
+    def remove(self, key: Hashable) -> None:
+        """Remove a point if present"""
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key: Hashable) -> None:
+        position = self._points.pop(key, None)
+        if position is None:
+            return
+        cell = self._cell_for(*position)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._cells[cell]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells.clear()
+            self._points.clear()
+            self._bounds = None
+
+    def get(self, key: Hashable) -> Optional[Tuple[float, float]]:
+        return self._points.get(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._points
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def nearest(self, lat: float, lng: float, k: int = 10,
+                max_distance_km: Optional[float] = None) -> List[Tuple[Hashable, float]]:
+        """Return up to k (key, distance_km) pairs ordered by distance"""
+        if k <= 0:
+            return []
+
+        with self._lock:
+            if not self._points:
+                return []
+
+            center_i, center_j = self._cell_for(lat, lng)
+            # Equirectangular projection is accurate at city scale and much cheaper
+            # than haversine for ranking candidates
+            lng_scale = max(math.cos(math.radians(lat)), 0.01)
+            # Smallest ground distance spanned by one cell (longitude shrinks with latitude)
+            cell_km = self.cell_size_deg * KM_PER_DEGREE_LAT * lng_scale
+            min_i, max_i, min_j, max_j = self._bounds
+            max_ring = max(center_i - min_i, max_i - center_i, center_j - min_j, max_j - center_j, 0)
+
+            best: List[Tuple[float, Hashable]] = []  # max-heap via negated distance
+            for ring in range(max_ring + 1):
+                # Every point in this ring is at least (ring - 1) cells away
+                ring_min_km = max(ring - 1, 0) * cell_km
+                if max_distance_km is not None and ring_min_km > max_distance_km:
+                    break
+                if len(best) == k and ring_min_km > -best[0][0]:
+                    break
+
+                for cell in self._ring_cells(center_i, center_j, ring):
+                    for key in self._cells.get(cell, ()):
+                        point_lat, point_lng = self._points[key]
+                        distance = KM_PER_DEGREE_LAT * math.hypot(point_lat - lat, (point_lng - lng) * lng_scale)
+                        if max_distance_km is not None and distance > max_distance_km:
+                            continue
+                        if len(best) < k:
+                            heapq.heappush(best, (-distance, key))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, key))
+
+            ranked = [key for _, key in sorted(best, reverse=True)]
+            return [(key, round(haversine_km(lat, lng, *self._points[key]), 3)) for key in ranked]
+
+    @staticmethod
+    def _ring_cells(center_i: int, center_j: int, ring: int):
+        """Yield the cells on the square ring at Chebyshev distance ``ring``"""
+        if ring == 0:
+            yield (center_i, center_j)
+            return
+        for j in range(center_j - ring, center_j + ring + 1):
+            yield (center_i - ring, j)
+            yield (center_i + ring, j)
+        for i in range(center_i - ring + 1, center_i + ring):
+            yield (i, center_j - ring)
+            yield (i, center_j + ring)
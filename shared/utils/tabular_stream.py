@@ -0,0 +1,100 @@
+import csv
+import io
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Sequence
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Rows buffered per CSV chunk / Parquet row group
+DEFAULT_CHUNK_ROWS = 10000
+
+
+def can_write_parquet() -> bool:
+    return pyarrow is not None
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(columns: Sequence[str], rows: Iterable[Sequence],
+             chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode rows as CSV, yielding one chunk of bytes per ``chunk_rows`` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+class _DrainableSink:
+    """Write-only file object whose written bytes can be taken out as they arrive"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_parquet(columns: Sequence[str], types: Sequence, rows: Iterable[Sequence],
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode rows as Parquet, yielding the bytes of each row group as it is written
+
+    ``types`` are pyarrow types, one per column. Only one row group is held in
+    memory at a time.
+    """
+    if pyarrow is None:
+        raise RuntimeError("pyarrow is required for Parquet export")
+    schema = pyarrow.schema(list(zip(columns, types)))
+    sink = _DrainableSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="snappy")
+
+    def write_batch(batch):
+        arrays = [pyarrow.array(values, type=column_type) for values, column_type in zip(zip(*batch), types)]
+        writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_rows:
+            write_batch(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        write_batch(batch)
+    writer.close()
+    yield sink.drain()
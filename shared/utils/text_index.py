@@ -0,0 +1,74 @@
+import threading
+from collections import Counter
+from typing import Dict, FrozenSet, Hashable, Set
+
+from shared.utils.geocoder import normalize_location
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """Split text into a set of normalized lowercase tokens"""
+    return frozenset(normalize_location(text).split())
+
+
+class InvertedIndex:
+    """In-memory inverted index from normalized tokens to document keys
+
+    Each document's token-set size is stored alongside the postings so that
+    overlap scores (e.g. Jaccard) can be computed from the posting counts
+    alone, without revisiting the original text.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._tokens: Dict[Hashable, FrozenSet[str]] = {}
+        self._lock = threading.RLock()
+
+    def upsert(self, key: Hashable, text: str) -> None:
+        """Index (or re-index) a document"""
+        tokens = tokenize(text)
+        with self._lock:
+            self._discard(key)
+            if not tokens:
+                return
+            self._tokens[key] = tokens
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove a document if present"""
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key: Hashable) -> None:
+        tokens = self._tokens.pop(key, None)
+        if tokens is None:
+            return
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._tokens.clear()
+
+    def token_count(self, key: Hashable) -> int:
+        """Size of a document's token set (0 if not indexed)"""
+        return len(self._tokens.get(key, ()))
+
+    def match(self, text: str) -> Dict[Hashable, int]:
+        """Return {key: number of shared tokens} for documents sharing at least one token"""
+        with self._lock:
+            matches: Counter = Counter()
+            for token in tokenize(text):
+                matches.update(self._postings.get(token, ()))
+            return dict(matches)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tokens
+
+    def __len__(self) -> int:
+        return len(self._tokens)
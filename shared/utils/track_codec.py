@@ -0,0 +1,110 @@
+import struct
+import sys
+import zlib
+from array import array
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+FORMAT_VERSION = 1
+FLAG_ZLIB = 0x01
+# version, flags, point count, first point time in ms since the epoch, first lat/lng in microdegrees
+_HEADER = struct.Struct("<BBHqii")
+# Unsigned 16-bit slots hold a missing speed/heading as this value
+MISSING = 0xFFFF
+MAX_TIME_DELTA_MS = 0xFFFE
+MAX_POINTS = 0xFFFF
+
+
+class TrackPoint(NamedTuple):
+    timestamp_ms: int
+    lat_e6: int
+    lng_e6: int
+    speed_kmh: Optional[int] = None
+    heading: Optional[int] = None
+
+
+def _column(typecode: str, values: Iterable[int]) -> bytes:
+    column = array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _read_column(typecode: str, data: bytes, offset: int, count: int) -> array:
+    column = array(typecode)
+    column.frombytes(data[offset:offset + count * column.itemsize])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def encode_segment(points: List[TrackPoint]) -> bytes:
+    """Pack time-ordered points as delta-encoded little-endian columns
+
+    Times are uint16 millisecond deltas and coordinates int32 microdegree
+    deltas from the previous point, so a segment must not span a gap of more
+    than about 65 seconds. The body is zlib-compressed when that is smaller,
+    which it usually is because consecutive deltas are small and similar.
+    """
+    if not points:
+        raise ValueError("A segment needs at least one point")
+    if len(points) > MAX_POINTS:
+        raise ValueError(f"A segment holds at most {MAX_POINTS} points")
+    first = points[0]
+    time_deltas, lat_deltas, lng_deltas = [0], [0], [0]
+    for previous, point in zip(points, points[1:]):
+        delta = point.timestamp_ms - previous.timestamp_ms
+        if not 0 <= delta <= MAX_TIME_DELTA_MS:
+            raise ValueError(f"Points must be in time order and at most {MAX_TIME_DELTA_MS} ms apart")
+        time_deltas.append(delta)
+        lat_deltas.append(point.lat_e6 - previous.lat_e6)
+        lng_deltas.append(point.lng_e6 - previous.lng_e6)
+
+    body = b"".join((
+        _column("H", time_deltas),
+        _column("i", lat_deltas),
+        _column("i", lng_deltas),
+        _column("H", (MISSING if point.speed_kmh is None else point.speed_kmh for point in points)),
+        _column("H", (MISSING if point.heading is None else point.heading for point in points)),
+    ))
+    flags = 0
+    compressed = zlib.compress(body)
+    if len(compressed) < len(body):
+        body, flags = compressed, FLAG_ZLIB
+    return _HEADER.pack(FORMAT_VERSION, flags, len(points), first.timestamp_ms, first.lat_e6, first.lng_e6) + body
+
+
+def segment_size(data: bytes) -> int:
+    """Number of points in an encoded segment, read from its header only"""
+    return _HEADER.unpack_from(data)[2]
+
+
+def decode_segment(data: bytes) -> Iterator[TrackPoint]:
+    """Points of an encoded segment in time order"""
+    version, flags, count, timestamp_ms, lat_e6, lng_e6 = _HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported track segment version {version}")
+    body = data[_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    time_deltas = _read_column("H", body, 0, count)
+    lat_deltas = _read_column("i", body, 2 * count, count)
+    lng_deltas = _read_column("i", body, 6 * count, count)
+    speeds = _read_column("H", body, 10 * count, count)
+    headings = _read_column("H", body, 12 * count, count)
+    for index in range(count):
+        timestamp_ms += time_deltas[index]
+        lat_e6 += lat_deltas[index]
+        lng_e6 += lng_deltas[index]
+        speed, heading = speeds[index], headings[index]
+        yield TrackPoint(
+            timestamp_ms, lat_e6, lng_e6,
+            None if speed == MISSING else speed,
+            None if heading == MISSING else heading
+        )
+
+
+def decode_segments(segments: Iterable[bytes]) -> Iterator[TrackPoint]:
+    """Points of consecutive segments, decoding each one only when it is reached"""
+    for data in segments:
+        yield from decode_segment(data)
@@ -0,0 +1,47 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class AsyncTTLCache:
+    """Small in-process cache for expensive async results
+
+    Values expire ``ttl`` seconds after they were computed. Only one caller
+    recomputes a missing or expired key at a time; everyone else arriving
+    meanwhile waits on the same lock and then reads the fresh value, so a burst
+    of requests costs a single computation instead of one each.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._values: Dict[Hashable, Tuple[float, Any]] = {}
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+
+    def _fresh(self, key: Hashable):
+        entry = self._values.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return True, entry[1]
+        return False, None
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, computing it once if missing or expired"""
+        hit, value = self._fresh(key)
+        if hit:
+            return value
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another caller may have refreshed the value while we waited
+            hit, value = self._fresh(key)
+            if hit:
+                return value
+            value = await compute()
+            self._values[key] = (time.monotonic() + self.ttl, value)
+            return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything when no key is given"""
+        if key is None:
+            self._values.clear()
+        else:
+            self._values.pop(key, None)
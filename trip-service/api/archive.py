@@ -0,0 +1,146 @@
+import asyncio
+import gzip
+import logging
+import os
+from datetime import date, datetime, time
+from typing import Iterable, Optional
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+from models.trip import Trip
+from models.trip_archive import TripArchive
+from shared.utils.tabular_stream import iter_csv
+
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_MONTHS = int(os.getenv("TRIP_ARCHIVE_AFTER_MONTHS", "6"))
+# Archived months older than this are written to compressed files and dropped; 0 keeps them in partitions
+COLD_STORAGE_AFTER_MONTHS = int(os.getenv("TRIP_COLD_STORAGE_AFTER_MONTHS", "0"))
+COLD_STORAGE_DIR = os.getenv("TRIP_COLD_STORAGE_DIR", "archive")
+ARCHIVE_INTERVAL_HOURS = float(os.getenv("TRIP_ARCHIVE_INTERVAL_HOURS", "24"))
+ARCHIVE_BATCH_SIZE = 5000
+CLOSED_TRIP_STATUSES = ("completed", "cancelled")
+ARCHIVE_COLUMNS = tuple(column.name for column in Trip.__table__.columns)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_of(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def archive_cutoff(months: int, today: Optional[date] = None) -> datetime:
+    """Start of the month ``months`` back; only whole months are archived"""
+    return datetime.combine(add_months(month_of(today or date.today()), -months), time.min)
+
+
+def partition_name(month: date) -> str:
+    return f"trips_archive_{month:%Y_%m}"
+
+
+def is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def ensure_archive_partitions(db: Session, months: Iterable[date]) -> None:
+    """Create the monthly partitions rows are about to be archived into (Postgres only)"""
+    if not is_postgres(db):
+        return
+    for month in sorted(set(months)):
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF trips_archive "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move one batch of closed trips scheduled before ``cutoff`` into the archive"""
+    rows = db.query(Trip.id, Trip.scheduled_time).filter(
+        Trip.status.in_(CLOSED_TRIP_STATUSES),
+        Trip.scheduled_time < cutoff
+    ).order_by(Trip.id).limit(batch_size).all()
+    if not rows:
+        return 0
+
+    trip_ids = [trip_id for trip_id, _ in rows]
+    ensure_archive_partitions(db, (month_of(scheduled_time) for _, scheduled_time in rows))
+    # Copy and delete in one transaction so a trip is never in both tables or neither
+    db.execute(insert(TripArchive).from_select(
+        ARCHIVE_COLUMNS,
+        select(*(getattr(Trip, column) for column in ARCHIVE_COLUMNS)).where(Trip.id.in_(trip_ids))
+    ))
+    db.execute(delete(Trip).where(Trip.id.in_(trip_ids)), execution_options={"synchronize_session": False})
+    db.commit()
+    return len(trip_ids)
+
+
+def move_month_to_cold_storage(db: Session, month: date) -> Optional[str]:
+    """Write one archived month to a gzip CSV file, then drop it from the database"""
+    start = datetime.combine(month, time.min)
+    end = datetime.combine(add_months(month, 1), time.min)
+    in_month = (TripArchive.scheduled_time >= start, TripArchive.scheduled_time < end)
+    if not db.query(TripArchive.id).filter(*in_month).limit(1).first():
+        return None
+
+    os.makedirs(COLD_STORAGE_DIR, exist_ok=True)
+    path = os.path.join(COLD_STORAGE_DIR, f"trips_{month:%Y_%m}.csv.gz")
+    columns = [column.name for column in TripArchive.__table__.columns]
+    rows = db.execute(
+        select(*TripArchive.__table__.columns).where(*in_month).order_by(TripArchive.id)
+        .execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+    )
+    with gzip.open(f"{path}.tmp", "wb") as archive_file:
+        for chunk in iter_csv(columns, rows, chunk_rows=ARCHIVE_BATCH_SIZE):
+            archive_file.write(chunk)
+    os.replace(f"{path}.tmp", path)
+
+    if is_postgres(db):
+        db.execute(text(f"ALTER TABLE trips_archive DETACH PARTITION {partition_name(month)}"))
+        db.execute(text(f"DROP TABLE {partition_name(month)}"))
+    else:
+        db.execute(delete(TripArchive).where(*in_month))
+    db.commit()
+    return path
+
+
+def archive_closed_trips(session_factory, months: int = ARCHIVE_AFTER_MONTHS,
+                         cold_storage_months: int = COLD_STORAGE_AFTER_MONTHS) -> dict:
+    """Move closed trips older than ``months`` to the archive, and old archive months to files"""
+    cutoff = archive_cutoff(months)
+    report = {"archived_before": cutoff.isoformat(), "archived": 0, "cold_storage_files": []}
+    db = session_factory()
+    try:
+        while True:
+            moved = archive_batch(db, cutoff)
+            report["archived"] += moved
+            if moved < ARCHIVE_BATCH_SIZE:
+                break
+
+        if cold_storage_months > 0:
+            cold_cutoff = month_of(archive_cutoff(cold_storage_months))
+            oldest = db.query(func.min(TripArchive.scheduled_time)).scalar()
+            month = month_of(oldest) if oldest else cold_cutoff
+            while month < cold_cutoff:
+                path = move_month_to_cold_storage(db, month)
+                if path:
+                    report["cold_storage_files"].append(path)
+                month = add_months(month, 1)
+    finally:
+        db.close()
+    return report
+
+
+async def run_trip_archiver(session_factory) -> None:
+    """Background job: archive closed trips once every ARCHIVE_INTERVAL_HOURS"""
+    while True:
+        try:
+            report = await asyncio.to_thread(archive_closed_trips, session_factory)
+            logger.info(f"Trip archival finished: {report}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Trip archival failed: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_HOURS * 3600)
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+from models.trip import Trip
+from api.outbox import record_trip_events, TRIP_EVENT_COLUMNS
+from api.summary import invalidate_summaries
+from shared.utils.commute_schedule import CommuteRecurrence, parse_commute_schedule
+from shared.utils.http_client import ServiceClient, propagate_user_context
+from shared.config import TripServiceSettings
+
+
+logger = logging.getLogger(__name__)
+
+settings = TripServiceSettings()
+user_service = ServiceClient(settings.USER_SERVICE_URL)
+
+COMMUTE_LOOKAHEAD_DAYS = int(os.getenv("COMMUTE_LOOKAHEAD_DAYS", "7"))
+COMMUTE_GENERATION_INTERVAL_HOURS = float(os.getenv("COMMUTE_GENERATION_INTERVAL_HOURS", "6"))
+OFFICE_LOCATION = os.getenv("OFFICE_LOCATION", "Office")
+# Commute schedules are wall-clock times in the office's timezone; trips store naive UTC
+COMMUTE_TIMEZONE = ZoneInfo(os.getenv("COMMUTE_TIMEZONE", "Asia/Kolkata"))
+SCHEDULE_PAGE_SIZE = 5000
+UPSERT_CHUNK_SIZE = 2000
+
+
+def recurrence_key(employee_id: int, day: date, leg: str) -> str:
+    """Idempotency key of a generated trip: one pickup and one drop per employee per day"""
+    return f"commute:{employee_id}:{day.isoformat()}:{leg}"
+
+
+def local_to_utc(day: date, wall_time: time) -> datetime:
+    """Naive UTC datetime of a wall-clock time on ``day`` in COMMUTE_TIMEZONE"""
+    local = datetime.combine(day, wall_time, tzinfo=COMMUTE_TIMEZONE)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def build_commute_trips(employee: dict, recurrence: CommuteRecurrence,
+                        start_date: date, days: int) -> List[dict]:
+    """Trip rows for every commute day of an employee in [start_date, start_date + days)"""
+    rows = []
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        if day.weekday() not in recurrence.weekdays:
+            continue
+        pickup_at = local_to_utc(day, recurrence.pickup_time)
+        # Overnight shift: the drop is the next morning
+        drop_day = day + timedelta(days=1) if recurrence.drop_time <= recurrence.pickup_time else day
+        drop_at = local_to_utc(drop_day, recurrence.drop_time)
+        for leg, scheduled_time, pickup_location, destination in (
+            ("pickup", pickup_at, employee["home_location"], OFFICE_LOCATION),
+            ("drop", drop_at, OFFICE_LOCATION, employee["home_location"]),
+        ):
+            rows.append({
+                "recurrence_key": recurrence_key(employee["user_id"], day, leg),
+                "employee_id": employee["user_id"],
+                "pickup_location": pickup_location,
+                "destination": destination,
+                "scheduled_time": scheduled_time,
+                "status": "scheduled",
+                "notes": f"Commute {leg}"
+            })
+    return rows
+
+
+def upsert_commute_trips(db: Session, rows: List[Dict]) -> None:
+    """Insert generated trips; existing ones are refreshed only while still unassigned"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Commute trip upserts are not supported on {dialect}")
+
+    # New trips first, so exactly those get a trip.created event in this transaction
+    insert_new = insert(Trip).on_conflict_do_nothing(
+        index_elements=[Trip.recurrence_key]
+    ).returning(Trip.recurrence_key, *TRIP_EVENT_COLUMNS)
+    created_keys = set()
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        created = db.execute(insert_new, rows[start:start + UPSERT_CHUNK_SIZE]).all()
+        record_trip_events(db, "trip.created", created)
+        created_keys.update(trip.recurrence_key for trip in created)
+
+    statement = insert(Trip)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Trip.recurrence_key],
+        set_={
+            "pickup_location": statement.excluded.pickup_location,
+            "destination": statement.excluded.destination,
+            "scheduled_time": statement.excluded.scheduled_time,
+            "version": Trip.version + 1
+        },
+        # Never touch trips a dispatcher has already assigned or that have moved on
+        where=(Trip.status == "scheduled") & Trip.driver_id.is_(None)
+    )
+    existing = [row for row in rows if row["recurrence_key"] not in created_keys]
+    for start in range(0, len(existing), UPSERT_CHUNK_SIZE):
+        db.execute(statement, existing[start:start + UPSERT_CHUNK_SIZE])
+    # Refreshed trips don't go through the outbox; recompute these employees' summaries on next read
+    invalidate_summaries(db, "employee", {row["employee_id"] for row in existing})
+    db.commit()
+
+
+def materialize_commute_trips(session_factory, employees: List[dict],
+                              start_date: date, days: int) -> dict:
+    """Parse schedules for a page of employees and upsert their trips in one transaction"""
+    rows = []
+    unparsed = 0
+    for employee in employees:
+        recurrence = parse_commute_schedule(employee.get("commute_schedule"))
+        if recurrence is None:
+            unparsed += 1
+            continue
+        rows.extend(build_commute_trips(employee, recurrence, start_date, days))
+
+    if rows:
+        db = session_factory()
+        try:
+            upsert_commute_trips(db, rows)
+        finally:
+            db.close()
+    return {"employees": len(employees), "unparsed": unparsed, "trips": len(rows)}
+
+
+async def generate_commute_trips(session_factory, start_date: Optional[date] = None,
+                                 days: int = COMMUTE_LOOKAHEAD_DAYS) -> dict:
+    """Materialize commute trips for all employees, one page of schedules at a time"""
+    start_date = start_date or datetime.now(COMMUTE_TIMEZONE).date()
+    report = {"start_date": start_date.isoformat(), "days": days, "employees": 0, "unparsed": 0, "trips": 0}
+    headers = propagate_user_context(0, "admin")
+
+    after_id = 0
+    while True:
+        employees = await user_service.get(
+            f"/users/admin/commute-schedules?after_id={after_id}&limit={SCHEDULE_PAGE_SIZE}",
+            headers=headers
+        )
+        if not employees:
+            break
+        # Parsing and the bulk upsert run off the event loop
+        page = await asyncio.to_thread(materialize_commute_trips, session_factory, employees, start_date, days)
+        for field in ("employees", "unparsed", "trips"):
+            report[field] += page[field]
+        after_id = employees[-1]["id"]
+        if len(employees) < SCHEDULE_PAGE_SIZE:
+            break
+    return report
+
+
+async def run_commute_generator(session_factory) -> None:
+    """Background job: keep the next COMMUTE_LOOKAHEAD_DAYS of commute trips materialized"""
+    while True:
+        try:
+            report = await generate_commute_trips(session_factory)
+            logger.info(f"Commute trips generated: {report}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Commute trip generation failed: {e}")
+        await asyncio.sleep(COMMUTE_GENERATION_INTERVAL_HOURS * 3600)
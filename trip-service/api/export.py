@@ -0,0 +1,114 @@
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from models.trip import Trip
+from models.trip_archive import TripArchive
+from api.trip_state import TRIP_STATUSES
+from shared.utils.tabular_stream import iter_csv, iter_parquet, can_write_parquet, pyarrow
+from typing import Iterator, List, Optional
+from datetime import date, datetime, time, timedelta, timezone
+import os
+
+
+# Rows fetched per server-side cursor round trip
+EXPORT_BATCH_SIZE = int(os.getenv("TRIP_EXPORT_BATCH_SIZE", "5000"))
+
+EXPORT_COLUMNS = (
+    "id", "employee_id", "driver_id", "vehicle_id", "pickup_location", "destination", "status",
+    "scheduled_time", "actual_start_time", "actual_end_time", "estimated_duration_minutes", "created_at"
+)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def parquet_types() -> list:
+    timestamp = pyarrow.timestamp("us")
+    return [
+        pyarrow.int64(), pyarrow.int64(), pyarrow.int64(), pyarrow.int64(), pyarrow.string(), pyarrow.string(),
+        pyarrow.string(), timestamp, timestamp, timestamp, pyarrow.int32(), timestamp
+    ]
+
+
+def _naive_utc(value):
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_status_filter(status_filter: Optional[str]) -> List[str]:
+    """Comma separated statuses, e.g. "completed,cancelled" """
+    if not status_filter:
+        return []
+    statuses = [value.strip() for value in status_filter.split(",") if value.strip()]
+    invalid = [value for value in statuses if value not in TRIP_STATUSES]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown status {', '.join(invalid)}; expected {', '.join(TRIP_STATUSES)}"
+        )
+    return statuses
+
+
+def iter_trip_rows(session_factory, start_date: Optional[date], end_date: Optional[date],
+                   statuses: List[str]) -> Iterator[tuple]:
+    """Trips in scheduled-date range, streamed from server-side cursors
+
+    Live trips come first, then archived ones; each part is in id order.
+    """
+    queries = []
+    for table in (Trip, TripArchive):
+        query = select(*(getattr(table, column) for column in EXPORT_COLUMNS)).order_by(table.id)
+        if start_date:
+            query = query.where(table.scheduled_time >= datetime.combine(start_date, time.min))
+        if end_date:
+            query = query.where(table.scheduled_time < datetime.combine(end_date + timedelta(days=1), time.min))
+        if statuses:
+            query = query.where(table.status.in_(statuses))
+        queries.append(query)
+
+    # The request's session is closed before the body streams, so the export owns its own
+    db = session_factory()
+    try:
+        for query in queries:
+            result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            for row in result:
+                yield tuple(_naive_utc(value) for value in row)
+    finally:
+        db.close()
+
+
+def export_trips(session_factory, export_format: str, start_date: Optional[date] = None,
+                 end_date: Optional[date] = None, status_filter: Optional[str] = None) -> StreamingResponse:
+    """Stream trip history as CSV or Parquet without holding it in memory"""
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    if export_format == "parquet" and not can_write_parquet():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export is not available on this server"
+        )
+    if start_date and end_date and end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be before start_date"
+        )
+    statuses = parse_status_filter(status_filter)
+
+    rows = iter_trip_rows(session_factory, start_date, end_date, statuses)
+    if export_format == "parquet":
+        body = iter_parquet(EXPORT_COLUMNS, parquet_types(), rows, chunk_rows=EXPORT_BATCH_SIZE)
+    else:
+        body = iter_csv(EXPORT_COLUMNS, rows, chunk_rows=EXPORT_BATCH_SIZE)
+
+    media_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"trips_{start_date or 'all'}_{end_date or 'all'}.{extension}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
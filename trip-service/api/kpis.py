@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, or_
+from sqlalchemy.orm import Session
+from models.kpi_rollup import KpiRollup
+from models.trip import Trip
+from shared.utils.event_bus import Event, IdempotencyFilter
+from shared.utils.rollup import TimeSeriesRollup
+
+
+logger = logging.getLogger(__name__)
+
+KPI_FLUSH_INTERVAL_SECONDS = float(os.getenv("KPI_FLUSH_INTERVAL_SECONDS", "60"))
+# (bucket width in seconds, buckets kept in memory and in the table)
+KPI_RESOLUTIONS = {
+    "minute": (60, 2 * 1440),
+    "hour": (3600, 90 * 24),
+}
+MAX_MINUTE_WINDOW_SECONDS = 24 * 3600
+UPSERT_CHUNK_SIZE = 1000
+
+# Trip event -> counter it increments
+EVENT_COUNTERS = {
+    "trip.created": "trips_created",
+    "trip.started": "trips_started",
+    "trip.completed": "trips_completed",
+    "trip.cancelled": "trips_cancelled",
+}
+COUNTERS = tuple(EVENT_COUNTERS.values())
+GAUGES = ("active_trips", "active_drivers")
+
+kpi_rollup = TimeSeriesRollup(KPI_RESOLUTIONS)
+_counted_events = IdempotencyFilter()
+
+_WINDOW_RE = re.compile(r"^(\d+)([mhd])$")
+_WINDOW_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def event_timestamp(event: Event) -> float:
+    """When the change happened (outbox row time), falling back to now"""
+    if event.occurred_at:
+        try:
+            occurred_at = datetime.fromisoformat(event.occurred_at)
+            if occurred_at.tzinfo is None:
+                occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+            return occurred_at.timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+async def count_kpi_events(events: List[Event]) -> None:
+    """Outbox subscriber: bump per-minute and per-hour counters"""
+    fresh = _counted_events.fresh(events)
+    for event in fresh:
+        if event.event_type in EVENT_COUNTERS:
+            kpi_rollup.increment(EVENT_COUNTERS[event.event_type], event_timestamp(event))
+    _counted_events.remember(event.event_id for event in fresh)
+
+
+def sample_gauges(db: Session, timestamp: float) -> None:
+    active_trips, active_drivers = db.query(
+        func.count(), func.count(func.distinct(Trip.driver_id))
+    ).filter(Trip.status == "in_progress").one()
+    kpi_rollup.gauge("active_trips", timestamp, active_trips)
+    kpi_rollup.gauge("active_drivers", timestamp, active_drivers)
+
+
+def upsert_rollups(db: Session, rows: List[Dict]) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"KPI rollup upserts are not supported on {dialect}")
+
+    statement = insert(KpiRollup)
+    # Buckets hold their full value in memory, so the newest write wins
+    statement = statement.on_conflict_do_update(
+        index_elements=[KpiRollup.resolution, KpiRollup.bucket, KpiRollup.metric],
+        set_={"value": statement.excluded.value}
+    )
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        db.execute(statement, rows[start:start + UPSERT_CHUNK_SIZE])
+
+
+def flush_kpis(session_factory) -> int:
+    """Sample gauges, persist changed buckets and drop rows older than the ring"""
+    now = time.time()
+    dirty = []
+    db = session_factory()
+    try:
+        sample_gauges(db, now)
+        dirty = kpi_rollup.take_dirty()
+        rows = [
+            {"resolution": resolution, "bucket": bucket, "metric": metric, "value": value}
+            for resolution, bucket, values in dirty
+            for metric, value in values.items()
+        ]
+        if rows:
+            upsert_rollups(db, rows)
+        db.execute(delete(KpiRollup).where(or_(*(
+            (KpiRollup.resolution == resolution) & (KpiRollup.bucket < int(now // width) - size)
+            for resolution, (width, size) in KPI_RESOLUTIONS.items()
+        ))))
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        # The next flush writes them with whatever they hold by then
+        kpi_rollup.requeue((resolution, bucket) for resolution, bucket, _ in dirty)
+        raise
+    finally:
+        db.close()
+
+
+def load_kpis(db: Session) -> int:
+    """Refill the in-memory rollup from the table (called once at startup)"""
+    now = time.time()
+    rows = db.query(KpiRollup.resolution, KpiRollup.bucket, KpiRollup.metric, KpiRollup.value).filter(or_(*(
+        (KpiRollup.resolution == resolution) & (KpiRollup.bucket >= int(now // width) - size)
+        for resolution, (width, size) in KPI_RESOLUTIONS.items()
+    ))).all()
+    kpi_rollup.load(rows)
+    return len(rows)
+
+
+async def run_kpi_flusher(session_factory) -> None:
+    """Background job: persist the rollup every KPI_FLUSH_INTERVAL_SECONDS"""
+    while True:
+        try:
+            await asyncio.to_thread(flush_kpis, session_factory)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"KPI flush failed: {e}")
+        await asyncio.sleep(KPI_FLUSH_INTERVAL_SECONDS)
+
+
+def parse_window(window: str) -> int:
+    """Window like "30m", "6h" or "7d" in seconds"""
+    match = _WINDOW_RE.match(window or "")
+    if not match or int(match.group(1)) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Window must look like 30m, 6h or 7d"
+        )
+    seconds = int(match.group(1)) * _WINDOW_UNITS[match.group(2)]
+    width, size = KPI_RESOLUTIONS["hour"]
+    if seconds > width * size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Window can be at most {size // 24}d"
+        )
+    return seconds
+
+
+def get_kpis(window: str = "24h") -> dict:
+    """Pre-aggregated KPI series for a window, per minute up to a day and per hour beyond"""
+    seconds = parse_window(window)
+    resolution = "minute" if seconds <= MAX_MINUTE_WINDOW_SECONDS else "hour"
+    now = time.time()
+    buckets = kpi_rollup.series(resolution, now - seconds, now)
+
+    series = []
+    totals = {counter: 0 for counter in COUNTERS}
+    for bucket, values in buckets:
+        point = {"start": datetime.fromtimestamp(kpi_rollup.bucket_start(resolution, bucket), timezone.utc).isoformat()}
+        for counter in COUNTERS:
+            point[counter] = int(values.get(counter, 0))
+            totals[counter] += point[counter]
+        for gauge in GAUGES:
+            point[gauge] = int(values[gauge]) if gauge in values else None
+        series.append(point)
+
+    # Latest sampled gauge values
+    for gauge in GAUGES:
+        totals[gauge] = next((point[gauge] for point in reversed(series) if point[gauge] is not None), None)
+
+    return {"window": window, "resolution": resolution, "totals": totals, "series": series}
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models.location_ping import LocationPing
+from models.trip import Trip
+from shared.schemas.trip import LocationPingIn, LocationIngestResult, DriverPosition
+from shared.utils.event_bus import Event
+from shared.utils.location_buffer import LocationBuffer, LocationFix
+
+
+logger = logging.getLogger(__name__)
+
+LOCATION_COALESCE_SECONDS = float(os.getenv("LOCATION_COALESCE_SECONDS", "1"))
+LOCATION_FLUSH_INTERVAL_SECONDS = float(os.getenv("LOCATION_FLUSH_INTERVAL_SECONDS", "1"))
+MAX_PINGS_PER_BATCH = 1000
+INSERT_CHUNK_SIZE = 5000
+
+location_buffer = LocationBuffer(resolution=LOCATION_COALESCE_SECONDS)
+
+
+def ping_timestamp(recorded_at: Optional[datetime], received_at: float) -> float:
+    """Device time in seconds since the epoch; naive datetimes are UTC and future times are clamped"""
+    if recorded_at is None:
+        return received_at
+    if recorded_at.tzinfo is None:
+        recorded_at = recorded_at.replace(tzinfo=timezone.utc)
+    return min(recorded_at.timestamp(), received_at)
+
+
+def resolve_ping_trips(db: Session, driver_id: int, pings: List[LocationPingIn]) -> List[Optional[int]]:
+    """Trip of each ping: the one it names, which must be assigned to the driver, or else the driver's trip in progress"""
+    named = {ping.trip_id for ping in pings if ping.trip_id is not None}
+    if named:
+        assigned = {
+            trip_id for trip_id, in db.query(Trip.id).filter(Trip.id.in_(named), Trip.driver_id == driver_id)
+        }
+        if named - assigned:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only report locations for your own trips"
+            )
+    current = None
+    if any(ping.trip_id is None for ping in pings):
+        row = db.query(Trip.id).filter(Trip.driver_id == driver_id, Trip.status == "in_progress").first()
+        current = row[0] if row else None
+    return [current if ping.trip_id is None else ping.trip_id for ping in pings]
+
+
+def ingest_pings(db: Session, driver_id: int, pings: List[LocationPingIn]) -> LocationIngestResult:
+    """Buffer a driver's pings; they reach the table on the next flush"""
+    if len(pings) > MAX_PINGS_PER_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_PINGS_PER_BATCH} pings per batch"
+        )
+    trip_ids = resolve_ping_trips(db, driver_id, pings)
+    received_at = time.time()
+    fixes = [
+        LocationFix(
+            driver_id=driver_id,
+            trip_id=trip_id,
+            timestamp=ping_timestamp(ping.recorded_at, received_at),
+            lat=ping.lat,
+            lng=ping.lng,
+            speed_kmh=ping.speed_kmh,
+            heading=ping.heading
+        )
+        for ping, trip_id in zip(pings, trip_ids)
+    ]
+    accepted = location_buffer.add(fixes)
+    return LocationIngestResult(received=len(fixes), accepted=accepted)
+
+
+def location_row(fix: LocationFix) -> dict:
+    return {
+        "driver_id": fix.driver_id,
+        "trip_id": fix.trip_id,
+        "recorded_at": datetime.fromtimestamp(fix.timestamp, timezone.utc).replace(tzinfo=None),
+        "lat_e6": round(fix.lat * 1_000_000),
+        "lng_e6": round(fix.lng * 1_000_000),
+        "speed_kmh": None if fix.speed_kmh is None else round(fix.speed_kmh),
+        "heading": None if fix.heading is None else round(fix.heading) % 360,
+    }
+
+
+def flush_locations(session_factory) -> int:
+    """Append every buffered position to the table in one transaction"""
+    fixes = location_buffer.drain()
+    if not fixes:
+        return 0
+    db = session_factory()
+    try:
+        rows = [location_row(fix) for fix in fixes]
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            db.execute(insert(LocationPing), rows[start:start + INSERT_CHUNK_SIZE])
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        location_buffer.requeue(fixes)
+        raise
+    finally:
+        db.close()
+
+
+async def run_location_flusher(session_factory) -> None:
+    """Background job: write buffered positions every LOCATION_FLUSH_INTERVAL_SECONDS"""
+    while True:
+        try:
+            await asyncio.to_thread(flush_locations, session_factory)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Location flush failed: {e}")
+        await asyncio.sleep(LOCATION_FLUSH_INTERVAL_SECONDS)
+
+
+async def forget_closed_trip_positions(events: List[Event]) -> None:
+    """Outbox subscriber: stop serving a live position for trips that have ended"""
+    for event in events:
+        location_buffer.forget_trip(event.aggregate_id)
+
+
+def driver_position(fix: LocationFix) -> DriverPosition:
+    return DriverPosition(
+        driver_id=fix.driver_id,
+        trip_id=fix.trip_id,
+        recorded_at=datetime.fromtimestamp(fix.timestamp, timezone.utc),
+        lat=fix.lat,
+        lng=fix.lng,
+        speed_kmh=fix.speed_kmh,
+        heading=fix.heading
+    )
+
+
+def get_driver_position(driver_id: int) -> DriverPosition:
+    fix = location_buffer.latest_for_driver(driver_id)
+    if fix is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No position reported for this driver"
+        )
+    return driver_position(fix)
+
+
+def get_trip_position(trip_id: int) -> DriverPosition:
+    fix = location_buffer.latest_for_trip(trip_id)
+    if fix is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No live position for this trip"
+        )
+    return driver_position(fix)
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+from sqlalchemy import delete, func, insert, or_, update
+from sqlalchemy.orm import Session
+from models.outbox import OutboxEvent
+from models.trip import Trip
+from shared.utils.event_bus import DeliveryError, Event, InProcessBroker
+
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "1"))
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+MAX_RETRY_DELAY_SECONDS = 60
+
+# Trip fields copied into every event payload
+TRIP_EVENT_FIELDS = (
+    "id", "status", "version", "employee_id", "driver_id", "vehicle_id",
+    "pickup_location", "destination", "scheduled_time", "actual_start_time", "actual_end_time"
+)
+TRIP_EVENT_COLUMNS = tuple(getattr(Trip, field) for field in TRIP_EVENT_FIELDS)
+
+# Event published when a trip enters a status
+STATUS_EVENT_TYPES = {
+    "scheduled": "trip.rescheduled",
+    "in_progress": "trip.started",
+    "completed": "trip.completed",
+    "cancelled": "trip.cancelled",
+}
+
+
+def trip_event_row(event_type: str, trip, extra: Optional[dict] = None) -> dict:
+    payload = {field: getattr(trip, field, None) for field in TRIP_EVENT_FIELDS}
+    payload.update(extra or {})
+    return {
+        "event_id": uuid.uuid4().hex,
+        "event_type": event_type,
+        "trip_id": trip.id,
+        "payload": json.dumps(payload, default=str)
+    }
+
+
+def record_trip_events(db: Session, event_type: str, trips: Iterable) -> None:
+    """Queue events for trips in the caller's transaction; they publish only if it commits"""
+    rows = [trip_event_row(event_type, trip) for trip in trips]
+    if rows:
+        db.execute(insert(OutboxEvent), rows)
+
+
+def record_trip_event(db: Session, event_type: str, trip, extra: Optional[dict] = None) -> None:
+    db.execute(insert(OutboxEvent), [trip_event_row(event_type, trip, extra)])
+
+
+def count_dead_letters(db: Session) -> int:
+    """Events parked after too many failed deliveries"""
+    return db.query(func.count(OutboxEvent.id)).filter(OutboxEvent.dead_at.isnot(None)).scalar()
+
+
+class OutboxRelay:
+    """Background worker that publishes committed outbox events in batches
+
+    Delivery is tracked per subscriber: when some subscribers fail, the event
+    keeps only those as pending and is retried with exponential backoff, so
+    the others and later events are not held up. After ``max_attempts``
+    failed deliveries the event is parked (``dead_at``) for an operator to
+    look at. Delivery is at-least-once; consumers dedupe on ``event_id``.
+    """
+
+    def __init__(self, session_factory, broker: InProcessBroker,
+                 batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_interval: float = OUTBOX_POLL_INTERVAL_SECONDS,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS):
+        self.session_factory = session_factory
+        self.broker = broker
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._task = None
+        self._failures = 0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.broker.close()
+
+    def _claim_batch(self) -> List[tuple]:
+        """Due events as (event, attempts so far, pending subscribers or None for all)"""
+        db = self.session_factory()
+        try:
+            rows = db.query(
+                OutboxEvent.event_id, OutboxEvent.event_type, OutboxEvent.trip_id,
+                OutboxEvent.payload, OutboxEvent.created_at,
+                OutboxEvent.attempts, OutboxEvent.pending_subscribers
+            ).filter(
+                OutboxEvent.published_at.is_(None),
+                OutboxEvent.dead_at.is_(None),
+                or_(OutboxEvent.next_attempt_at.is_(None), OutboxEvent.next_attempt_at <= datetime.utcnow())
+            ).order_by(OutboxEvent.id).limit(self.batch_size).all()
+            return [
+                (
+                    Event(
+                        event_id=event_id,
+                        event_type=event_type,
+                        aggregate_id=trip_id,
+                        payload=json.loads(payload),
+                        occurred_at=created_at.isoformat() if created_at else None
+                    ),
+                    attempts or 0,
+                    frozenset(json.loads(pending)) if pending else None
+                )
+                for event_id, event_type, trip_id, payload, created_at, attempts, pending in rows
+            ]
+        finally:
+            db.close()
+
+    def _finish_batch(self, event_ids: List[str]) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(OutboxEvent).where(OutboxEvent.event_id.in_(event_ids)).values(published_at=datetime.utcnow()),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _fail_batch(self, failed: List[tuple], error: DeliveryError) -> None:
+        """Keep only the failed subscribers pending and schedule a retry, or park the event"""
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            for event, attempts in failed:
+                pending = self.broker.interested(event, error.failures)
+                if not pending:
+                    # None of the failed subscribers take this event type
+                    values = {"published_at": now}
+                else:
+                    attempts += 1
+                    values = {"attempts": attempts, "last_error": str(error), "pending_subscribers": json.dumps(pending)}
+                    if attempts >= self.max_attempts:
+                        values["dead_at"] = now
+                        logger.error(f"Parking outbox event {event.event_id} after {attempts} attempts: {error}")
+                    else:
+                        delay = min(self.poll_interval * 2 ** attempts, MAX_RETRY_DELAY_SECONDS)
+                        values["next_attempt_at"] = now + timedelta(seconds=delay)
+                db.execute(update(OutboxEvent).where(OutboxEvent.event_id == event.event_id).values(**values))
+            db.commit()
+        finally:
+            db.close()
+
+    def _prune(self) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(delete(OutboxEvent).where(
+                OutboxEvent.published_at < datetime.utcnow() - timedelta(hours=OUTBOX_RETENTION_HOURS)
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    async def relay_once(self) -> int:
+        """Publish one batch of due events; returns how many were handled"""
+        claimed = await asyncio.to_thread(self._claim_batch)
+        if not claimed:
+            return 0
+        groups = {}
+        for event, attempts, pending in claimed:
+            groups.setdefault(pending, []).append((event, attempts))
+        for pending, group in groups.items():
+            events = [event for event, _ in group]
+            try:
+                await self.broker.publish(events, pending)
+            except DeliveryError as e:
+                logger.warning(f"Outbox delivery failed for {len(events)} events: {e}")
+                await asyncio.to_thread(self._fail_batch, group, e)
+                continue
+            await asyncio.to_thread(self._finish_batch, [event.event_id for event in events])
+        return len(claimed)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                published = await self.relay_once()
+                self._failures = 0
+                if published == self.batch_size:
+                    # More are probably waiting; keep draining
+                    continue
+                if published == 0:
+                    await asyncio.to_thread(self._prune)
+                await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures += 1
+                delay = min(self.poll_interval * 2 ** self._failures, MAX_RETRY_DELAY_SECONDS)
+                logger.warning(f"Outbox relay failed, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
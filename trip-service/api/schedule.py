@@ -0,0 +1,135 @@
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from models.trip import Trip
+from shared.schemas.trip import ScheduleConflict, ScheduleConflictReport
+from shared.utils.interval_index import IntervalIndex, find_overlaps
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import os
+import threading
+
+
+DEFAULT_TRIP_DURATION_MINUTES = int(os.getenv("DEFAULT_TRIP_DURATION_MINUTES", "60"))
+# Only trips that still occupy a driver/vehicle can conflict
+ACTIVE_TRIP_STATUSES = ("scheduled", "in_progress")
+
+# Active trips booked per driver and per vehicle, kept in sync on every trip write
+trip_schedule = IntervalIndex()
+# Held from the conflict check until the index is updated after commit; the async create
+# route and the threadpool routes would otherwise both pass the check and double-book
+booking_lock = threading.Lock()
+
+
+def trip_interval(scheduled_time: datetime, duration_minutes: Optional[int]) -> Tuple[datetime, datetime]:
+    """Booked [start, end) window of a trip"""
+    if scheduled_time.tzinfo is not None:
+        # Trips are stored as naive UTC
+        scheduled_time = scheduled_time.astimezone(timezone.utc).replace(tzinfo=None)
+    return scheduled_time, scheduled_time + timedelta(minutes=duration_minutes or DEFAULT_TRIP_DURATION_MINUTES)
+
+
+def trip_resources(driver_id: Optional[int], vehicle_id: Optional[int]) -> List[Tuple[str, int]]:
+    return [
+        resource for resource in (("driver", driver_id), ("vehicle", vehicle_id))
+        if resource[1] is not None
+    ]
+
+
+def find_trip_conflicts(scheduled_time: datetime, duration_minutes: Optional[int],
+                        driver_id: Optional[int], vehicle_id: Optional[int],
+                        trip_id: Optional[int] = None,
+                        index: IntervalIndex = trip_schedule) -> Optional[dict]:
+    """Describe the first driver/vehicle double-booking for a trip window, or None"""
+    start, end = trip_interval(scheduled_time, duration_minutes)
+    for resource in trip_resources(driver_id, vehicle_id):
+        conflicts = index.overlapping(resource, start, end, exclude=trip_id)
+        if conflicts:
+            resource_type, resource_id = resource
+            return {
+                "message": f"{resource_type.capitalize()} {resource_id} is already booked at this time",
+                "conflicting_trip_ids": [conflict_trip_id for _, _, conflict_trip_id in conflicts]
+            }
+    return None
+
+
+def check_trip_conflicts(scheduled_time: datetime, duration_minutes: Optional[int],
+                         driver_id: Optional[int], vehicle_id: Optional[int],
+                         trip_id: Optional[int] = None) -> None:
+    """Reject a booking that overlaps another active trip of the same driver or vehicle"""
+    conflict = find_trip_conflicts(scheduled_time, duration_minutes, driver_id, vehicle_id, trip_id)
+    if conflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=conflict
+        )
+
+
+def sync_trip_schedule(trip: Trip) -> None:
+    """Add, move or remove a trip's bookings after a write"""
+    if trip.status in ACTIVE_TRIP_STATUSES:
+        start, end = trip_interval(trip.scheduled_time, trip.estimated_duration_minutes)
+        trip_schedule.upsert(trip.id, trip_resources(trip.driver_id, trip.vehicle_id), start, end)
+    else:
+        trip_schedule.remove(trip.id)
+
+
+def load_trip_schedule(db: Session) -> int:
+    """Build the booking index from active trips (called once at startup)"""
+    trip_schedule.clear()
+    rows = db.query(
+        Trip.id, Trip.scheduled_time, Trip.estimated_duration_minutes, Trip.driver_id, Trip.vehicle_id
+    ).filter(Trip.status.in_(ACTIVE_TRIP_STATUSES)).all()
+    for trip_id, scheduled_time, duration_minutes, driver_id, vehicle_id in rows:
+        start, end = trip_interval(scheduled_time, duration_minutes)
+        trip_schedule.upsert(trip_id, trip_resources(driver_id, vehicle_id), start, end)
+    return len(rows)
+
+
+def get_schedule_conflicts(db: Session, day: str) -> ScheduleConflictReport:
+    """Every overlapping pair of active trips sharing a driver or vehicle on a given day"""
+    try:
+        day_start = datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Date must be in YYYY-MM-DD format"
+        )
+    day_end = day_start + timedelta(days=1)
+
+    # Include trips from the previous day that could still run past midnight
+    longest = db.query(Trip.estimated_duration_minutes).filter(
+        Trip.status.in_(ACTIVE_TRIP_STATUSES)
+    ).order_by(Trip.estimated_duration_minutes.desc().nulls_last()).limit(1).scalar()
+    lookback = timedelta(minutes=max(longest or 0, DEFAULT_TRIP_DURATION_MINUTES))
+
+    rows = db.query(
+        Trip.id, Trip.scheduled_time, Trip.estimated_duration_minutes, Trip.driver_id, Trip.vehicle_id
+    ).filter(
+        Trip.status.in_(ACTIVE_TRIP_STATUSES),
+        Trip.scheduled_time >= day_start - lookback,
+        Trip.scheduled_time < day_end
+    ).all()
+
+    by_resource = {}
+    windows = {}
+    for trip_id, scheduled_time, duration_minutes, driver_id, vehicle_id in rows:
+        start, end = trip_interval(scheduled_time, duration_minutes)
+        if end <= day_start:
+            continue
+        windows[trip_id] = (start, end)
+        for resource in trip_resources(driver_id, vehicle_id):
+            by_resource.setdefault(resource, []).append((start, end, trip_id))
+
+    conflicts = []
+    for (resource_type, resource_id), intervals in sorted(by_resource.items()):
+        for first, second in find_overlaps(intervals):
+            conflicts.append(ScheduleConflict(
+                resource_type=resource_type,
+                resource_id=resource_id,
+                trip_id=first,
+                conflicting_trip_id=second,
+                overlap_start=max(windows[first][0], windows[second][0]),
+                overlap_end=min(windows[first][1], windows[second][1])
+            ))
+
+    return ScheduleConflictReport(date=day, trips_checked=len(windows), conflicts=conflicts)
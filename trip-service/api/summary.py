@@ -0,0 +1,159 @@
+from fastapi import HTTPException, status
+from sqlalchemy import and_, delete, func
+from sqlalchemy.orm import Session
+from models.trip import Trip
+from models.trip_summary import TripSummary
+from shared.schemas.trip import TripSummaryResponse
+from typing import Iterable, List, Optional, Set, Tuple
+from datetime import date, datetime, time, timedelta
+import os
+
+
+SUMMARY_ROLES = {"employee": Trip.employee_id, "driver": Trip.driver_id}
+SUMMARY_WINDOW_DAYS = int(os.getenv("TRIP_SUMMARY_WINDOW_DAYS", "30"))
+# A trip counts as on time when it started at most this long after its scheduled time
+ON_TIME_GRACE_MINUTES = int(os.getenv("ON_TIME_GRACE_MINUTES", "10"))
+
+
+def summary_periods(today: date) -> Tuple[date, date]:
+    """Monday of this week and the first of this month"""
+    return today - timedelta(days=today.weekday()), today.replace(day=1)
+
+
+def minutes_between(db: Session, start, end):
+    """SQL expression for the minutes from ``start`` to ``end``"""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.extract("epoch", end - start) / 60
+    return (func.julianday(end) - func.julianday(start)) * 1440
+
+
+def compute_summary(db: Session, role: str, subject_id: int, today: Optional[date] = None) -> dict:
+    """Aggregate one employee's or driver's trips in a single indexed query"""
+    today = today or datetime.utcnow().date()
+    week_start, month_start = summary_periods(today)
+    week_from = datetime.combine(week_start, time.min)
+    month_from = datetime.combine(month_start, time.min)
+    month_to = datetime.combine((month_start + timedelta(days=32)).replace(day=1), time.min)
+    window_from = datetime.combine(today - timedelta(days=SUMMARY_WINDOW_DAYS), time.min)
+    active = Trip.status != "cancelled"
+    completed_in_window = and_(Trip.status == "completed", Trip.scheduled_time >= window_from)
+
+    row = db.query(
+        func.count().filter(active, Trip.scheduled_time >= week_from,
+                            Trip.scheduled_time < week_from + timedelta(days=7)),
+        func.count().filter(active, Trip.scheduled_time >= month_from, Trip.scheduled_time < month_to),
+        func.count().filter(completed_in_window),
+        func.count().filter(Trip.status == "cancelled", Trip.scheduled_time >= window_from),
+        func.count().filter(
+            completed_in_window,
+            minutes_between(db, Trip.scheduled_time, Trip.actual_start_time) <= ON_TIME_GRACE_MINUTES
+        ),
+        func.avg(minutes_between(db, Trip.actual_start_time, Trip.actual_end_time)).filter(
+            completed_in_window, Trip.actual_start_time.isnot(None), Trip.actual_end_time.isnot(None)
+        )
+    ).filter(
+        SUMMARY_ROLES[role] == subject_id,
+        Trip.scheduled_time >= min(window_from, month_from)
+    ).one()
+
+    trips_this_week, trips_this_month, completed, cancelled, on_time, avg_duration = row
+    return {
+        "role": role,
+        "subject_id": subject_id,
+        "computed_for": today,
+        "week_start": week_start,
+        "month_start": month_start,
+        "trips_this_week": trips_this_week,
+        "trips_this_month": trips_this_month,
+        "completed_trips": completed,
+        "cancelled_trips": cancelled,
+        "on_time_trips": on_time,
+        "avg_duration_minutes": round(float(avg_duration), 1) if avg_duration is not None else None
+    }
+
+
+def upsert_summaries(db: Session, rows: List[dict]) -> None:
+    """Insert or overwrite summaries in one statement, so concurrent refreshes can't collide"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Trip summary upserts are not supported on {dialect}")
+
+    statement = insert(TripSummary)
+    statement = statement.on_conflict_do_update(
+        index_elements=[TripSummary.role, TripSummary.subject_id],
+        set_={
+            **{field: statement.excluded[field] for field in rows[0] if field not in ("role", "subject_id")},
+            "updated_at": func.now()
+        }
+    )
+    db.execute(statement, rows)
+
+
+def refresh_summaries(db: Session, subjects: Iterable[Tuple[str, int]]) -> int:
+    """Recompute and store the summaries of the given (role, subject_id) pairs"""
+    rows = [compute_summary(db, role, subject_id) for role, subject_id in sorted(set(subjects))]
+    if rows:
+        upsert_summaries(db, rows)
+    db.commit()
+    return len(rows)
+
+
+def invalidate_summaries(db: Session, role: str, subject_ids: Iterable[int]) -> None:
+    """Drop stored summaries so they are recomputed on next read (no commit)"""
+    subject_ids = list(subject_ids)
+    if subject_ids:
+        db.execute(
+            delete(TripSummary).where(TripSummary.role == role, TripSummary.subject_id.in_(subject_ids)),
+            execution_options={"synchronize_session": False}
+        )
+
+
+def event_subjects(payloads: Iterable[dict]) -> Set[Tuple[str, int]]:
+    """Employees and drivers whose summaries a batch of trip events affects"""
+    subjects = set()
+    for payload in payloads:
+        for role, field in (("employee", "employee_id"), ("driver", "driver_id"), ("driver", "previous_driver_id")):
+            if payload.get(field) is not None:
+                subjects.add((role, payload[field]))
+    return subjects
+
+
+def to_response(summary) -> TripSummaryResponse:
+    closed = summary.completed_trips + summary.cancelled_trips
+    return TripSummaryResponse(
+        role=summary.role,
+        subject_id=summary.subject_id,
+        week_start=summary.week_start,
+        month_start=summary.month_start,
+        trips_this_week=summary.trips_this_week,
+        trips_this_month=summary.trips_this_month,
+        window_days=SUMMARY_WINDOW_DAYS,
+        completed_trips=summary.completed_trips,
+        cancelled_trips=summary.cancelled_trips,
+        completion_rate=round(summary.completed_trips / closed * 100, 2) if closed else 0.0,
+        on_time_rate=round(summary.on_time_trips / summary.completed_trips * 100, 2) if summary.completed_trips else 0.0,
+        avg_duration_minutes=summary.avg_duration_minutes,
+        updated_at=summary.updated_at
+    )
+
+
+def get_trip_summary(db: Session, role: str, subject_id: int) -> TripSummaryResponse:
+    """Stored summary; recomputed only when missing or computed on an earlier day"""
+    if role not in SUMMARY_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Role must be one of: {', '.join(SUMMARY_ROLES)}"
+        )
+    summary = db.query(TripSummary).filter(
+        TripSummary.role == role, TripSummary.subject_id == subject_id
+    ).first()
+    if summary is None or summary.computed_for != datetime.utcnow().date():
+        refresh_summaries(db, [(role, subject_id)])
+        summary = db.query(TripSummary).filter(
+            TripSummary.role == role, TripSummary.subject_id == subject_id
+        ).first()
+    return to_response(summary)
@@ -0,0 +1,226 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.orm import Session
+from models.location_ping import LocationPing
+from models.track_segment import TrackSegment
+from models.trip import Trip
+from models.trip_archive import TripArchive
+from shared.utils.tabular_stream import iter_csv
+from shared.utils.track_codec import TrackPoint, encode_segment, decode_segment
+
+
+logger = logging.getLogger(__name__)
+
+TRACK_COMPACT_INTERVAL_SECONDS = float(os.getenv("TRACK_COMPACT_INTERVAL_SECONDS", "60"))
+# Pings stay as rows this long so most minutes are complete before they are packed
+TRACK_COMPACT_DELAY_SECONDS = int(os.getenv("TRACK_COMPACT_DELAY_SECONDS", "120"))
+# Pings reported outside a trip are not part of any track and are only kept this long
+LOCATION_RAW_RETENTION_HOURS = int(os.getenv("LOCATION_RAW_RETENTION_HOURS", "24"))
+COMPACT_BATCH_PINGS = 50000
+# Segments fetched per cursor round trip during replay
+REPLAY_BATCH_SEGMENTS = 200
+
+TRACK_COLUMNS = ("recorded_at", "lat", "lng", "speed_kmh", "heading")
+TRACK_FORMATS = {
+    "json": "application/json",
+    "csv": "text/csv",
+}
+
+
+def _epoch_ms(value: datetime) -> int:
+    return round(value.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _minute_start(value: datetime) -> datetime:
+    return value.replace(second=0, microsecond=0)
+
+
+def ping_point(ping) -> TrackPoint:
+    return TrackPoint(_epoch_ms(ping.recorded_at), ping.lat_e6, ping.lng_e6, ping.speed_kmh, ping.heading)
+
+
+def merge_points(*sorted_points) -> Iterator[TrackPoint]:
+    """Merge time-ordered point streams, keeping one point per millisecond"""
+    last = None
+    for point in heapq.merge(*sorted_points, key=lambda point: point.timestamp_ms):
+        if point.timestamp_ms != last:
+            last = point.timestamp_ms
+            yield point
+
+
+def compact_batch(db: Session, pings: List[LocationPing]) -> int:
+    """Pack trip pings into their per-minute segments and delete the rows"""
+    groups: Dict[Tuple[int, datetime], List[LocationPing]] = defaultdict(list)
+    for ping in pings:
+        groups[(ping.trip_id, _minute_start(ping.recorded_at))].append(ping)
+
+    # Late pings land in minutes that are already packed; merge them in
+    existing = {}
+    keys = list(groups)
+    for start in range(0, len(keys), 500):
+        for segment in db.query(TrackSegment).filter(
+            tuple_(TrackSegment.trip_id, TrackSegment.segment_start).in_(keys[start:start + 500])
+        ):
+            existing[(segment.trip_id, segment.segment_start)] = segment
+
+    for (trip_id, segment_start), group in groups.items():
+        group.sort(key=lambda ping: ping.recorded_at)
+        new_points = [ping_point(ping) for ping in group]
+        segment = existing.get((trip_id, segment_start))
+        if segment is None:
+            points = list(merge_points(new_points))
+            segment = TrackSegment(trip_id=trip_id, segment_start=segment_start, driver_id=group[-1].driver_id)
+            db.add(segment)
+        else:
+            points = list(merge_points(decode_segment(segment.data), new_points))
+        segment.point_count = len(points)
+        segment.data = encode_segment(points)
+
+    db.execute(delete(LocationPing).where(LocationPing.id.in_([ping.id for ping in pings])))
+    return len(groups)
+
+
+def compact_track_segments(session_factory, now: Optional[datetime] = None) -> dict:
+    """Move settled trip pings into packed segments and drop expired off-trip pings"""
+    now = now or datetime.utcnow()
+    settled = now - timedelta(seconds=TRACK_COMPACT_DELAY_SECONDS)
+    compacted = segments = 0
+    db = session_factory()
+    try:
+        while True:
+            pings = db.query(LocationPing).filter(
+                LocationPing.trip_id.isnot(None),
+                LocationPing.recorded_at < settled
+            ).order_by(LocationPing.id).limit(COMPACT_BATCH_PINGS).all()
+            if not pings:
+                break
+            segments += compact_batch(db, pings)
+            compacted += len(pings)
+            db.commit()
+            db.expunge_all()
+
+        expired = db.execute(delete(LocationPing).where(
+            LocationPing.trip_id.is_(None),
+            LocationPing.recorded_at < now - timedelta(hours=LOCATION_RAW_RETENTION_HOURS)
+        )).rowcount
+        db.commit()
+        return {"compacted": compacted, "segments": segments, "expired": expired}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_track_compactor(session_factory) -> None:
+    """Background job: pack settled pings every TRACK_COMPACT_INTERVAL_SECONDS"""
+    while True:
+        try:
+            result = await asyncio.to_thread(compact_track_segments, session_factory)
+            if result["compacted"]:
+                logger.info(f"Packed {result['compacted']} pings into {result['segments']} track segments")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Track compaction failed: {e}")
+        await asyncio.sleep(TRACK_COMPACT_INTERVAL_SECONDS)
+
+
+def trip_participants(db: Session, trip_id: int) -> Tuple[int, Optional[int]]:
+    """(employee_id, driver_id) of a live or archived trip"""
+    for table in (Trip, TripArchive):
+        row = db.query(table.employee_id, table.driver_id).filter(table.id == trip_id).first()
+        if row:
+            return row
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Trip not found"
+    )
+
+
+def iter_track_points(session_factory, trip_id: int, since: Optional[datetime],
+                      until: Optional[datetime]) -> Iterator[TrackPoint]:
+    """A trip's points in time order, decoding each segment only when it is reached"""
+    db = session_factory()
+    try:
+        # Read rows before segments: a compaction in between then shows a point twice, never zero times
+        pings = db.query(LocationPing).filter(LocationPing.trip_id == trip_id)
+        segments = select(TrackSegment.data).where(TrackSegment.trip_id == trip_id).order_by(TrackSegment.segment_start)
+        if since:
+            pings = pings.filter(LocationPing.recorded_at >= since)
+            segments = segments.where(TrackSegment.segment_start >= _minute_start(since))
+        if until:
+            pings = pings.filter(LocationPing.recorded_at < until)
+            segments = segments.where(TrackSegment.segment_start < until)
+        recent = [ping_point(ping) for ping in pings.order_by(LocationPing.recorded_at)]
+
+        packed = (
+            point
+            for (data,) in db.execute(segments.execution_options(yield_per=REPLAY_BATCH_SEGMENTS))
+            for point in decode_segment(data)
+        )
+        since_ms = _epoch_ms(since) if since else None
+        until_ms = _epoch_ms(until) if until else None
+        for point in merge_points(packed, recent):
+            if since_ms is not None and point.timestamp_ms < since_ms:
+                continue
+            if until_ms is not None and point.timestamp_ms >= until_ms:
+                break
+            yield point
+    finally:
+        db.close()
+
+
+def _track_row(point: TrackPoint) -> tuple:
+    return (
+        datetime.fromtimestamp(point.timestamp_ms / 1000, timezone.utc).isoformat(),
+        point.lat_e6 / 1_000_000,
+        point.lng_e6 / 1_000_000,
+        point.speed_kmh,
+        point.heading
+    )
+
+
+def iter_json(points: Iterator[TrackPoint], chunk_points: int = 5000) -> Iterator[bytes]:
+    """Encode points as a JSON array of objects, one chunk per ``chunk_points``"""
+    chunk = ["["]
+    separator = ""
+    for index, point in enumerate(points, 1):
+        chunk.append(separator + json.dumps(dict(zip(TRACK_COLUMNS, _track_row(point)))))
+        separator = ","
+        if index % chunk_points == 0:
+            yield "".join(chunk).encode("utf-8")
+            chunk = []
+    chunk.append("]")
+    yield "".join(chunk).encode("utf-8")
+
+
+def replay_trip_track(session_factory, trip_id: int, track_format: str = "json",
+                      since: Optional[datetime] = None, until: Optional[datetime] = None) -> StreamingResponse:
+    """Stream a trip's recorded track, packed history and not-yet-packed pings alike"""
+    if track_format not in TRACK_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format must be one of: {', '.join(TRACK_FORMATS)}"
+        )
+    # Stored times are naive UTC
+    if since and since.tzinfo:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    if until and until.tzinfo:
+        until = until.astimezone(timezone.utc).replace(tzinfo=None)
+
+    points = iter_track_points(session_factory, trip_id, since, until)
+    if track_format == "csv":
+        body = iter_csv(TRACK_COLUMNS, map(_track_row, points))
+    else:
+        body = iter_json(points)
+    return StreamingResponse(body, media_type=TRACK_FORMATS[track_format])
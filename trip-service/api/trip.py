@@ -1,31 +1,58 @@
 from fastapi import HTTPException, status
+from sqlalchemy import insert, update, tuple_
 from sqlalchemy.orm import Session
 from models.trip import Trip
-from shared.schemas.trip import TripCreate, TripUpdate, TripResponse, TripWithDetails, TripStatistics
+from models.trip_archive import TripArchive
+from shared.schemas.trip import (
+    TripCreate, TripUpdate, TripResponse, TripWithDetails, TripStatistics,
+    TripBulkCreateResult, TripBulkStatusResult
+)
+from shared.utils.interval_index import IntervalIndex
 from shared.utils.http_client import ServiceClient
 from shared.config import TripServiceSettings
+from api.schedule import (
+    check_trip_conflicts, sync_trip_schedule, trip_schedule, find_trip_conflicts,
+    trip_interval, trip_resources, booking_lock, ACTIVE_TRIP_STATUSES
+)
+from api.outbox import record_trip_event, record_trip_events, TRIP_EVENT_COLUMNS, STATUS_EVENT_TYPES
+from api.trip_state import (
+    transition_trip, raise_failed_transition, validate_status, validate_transition,
+    can_transition, transition_values
+)
 from typing import List, Optional
-from datetime import datetime
 
 
 settings = TripServiceSettings()
 user_service = ServiceClient(settings.USER_SERVICE_URL)
 
+MAX_BULK_TRIPS = 1000
 
-async def create_trip(db: Session, trip_data: TripCreate) -> TripResponse:
+
+def create_trip(db: Session, trip_data: TripCreate) -> TripResponse:
     """Create new trip"""
-    db_trip = Trip(
-        pickup_location=trip_data.pickup_location,
-        destination=trip_data.destination,
-        scheduled_time=trip_data.scheduled_time,
-        employee_id=trip_data.employee_id,
-        driver_id=trip_data.driver_id,
-        vehicle_id=trip_data.vehicle_id,
-        notes=trip_data.notes
-    )
-    db.add(db_trip)
-    db.commit()
-    db.refresh(db_trip)
+    # Check, insert and index as one step so concurrent bookings can't both pass the check
+    with booking_lock:
+        check_trip_conflicts(
+            trip_data.scheduled_time, trip_data.estimated_duration_minutes,
+            trip_data.driver_id, trip_data.vehicle_id
+        )
+    
+        db_trip = Trip(
+            pickup_location=trip_data.pickup_location,
+            destination=trip_data.destination,
+            scheduled_time=trip_data.scheduled_time,
+            employee_id=trip_data.employee_id,
+            driver_id=trip_data.driver_id,
+            vehicle_id=trip_data.vehicle_id,
+            estimated_duration_minutes=trip_data.estimated_duration_minutes,
+            notes=trip_data.notes
+        )
+        db.add(db_trip)
+        db.flush()
+        record_trip_event(db, "trip.created", db_trip)
+        db.commit()
+        db.refresh(db_trip)
+        sync_trip_schedule(db_trip)
     
     return TripResponse(
         id=db_trip.id,
@@ -39,20 +66,192 @@ async def create_trip(db: Session, trip_data: TripCreate) -> TripResponse:
         employee_id=db_trip.employee_id,
         driver_id=db_trip.driver_id,
         vehicle_id=db_trip.vehicle_id,
+        estimated_duration_minutes=db_trip.estimated_duration_minutes,
+        version=db_trip.version,
         created_at=db_trip.created_at,
         updated_at=db_trip.updated_at
     )
 
 
-def get_trip_by_id(db: Session, trip_id: int) -> TripResponse:
-    """Get trip by ID"""
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
-    if not trip:
+def create_trips_bulk(db: Session, trips: List[TripCreate]) -> List[TripBulkCreateResult]:
+    """Create many trips with one multi-row INSERT ... RETURNING, returning a result per item"""
+    if len(trips) > MAX_BULK_TRIPS:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Trip not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_TRIPS} trips per request"
+        )
+    
+    with booking_lock:
+        results = {}
+        accepted = []
+        # Bookings made earlier in this batch, so the batch can't double-book itself
+        batch_schedule = IntervalIndex()
+        for index, trip_data in enumerate(trips):
+            conflict = find_trip_conflicts(
+                trip_data.scheduled_time, trip_data.estimated_duration_minutes,
+                trip_data.driver_id, trip_data.vehicle_id
+            ) or find_trip_conflicts(
+                trip_data.scheduled_time, trip_data.estimated_duration_minutes,
+                trip_data.driver_id, trip_data.vehicle_id, index=batch_schedule
+            )
+            if conflict:
+                results[index] = TripBulkCreateResult(
+                    index=index,
+                    success=False,
+                    error=conflict["message"],
+                    conflicting_trip_ids=[
+                        trip_id for trip_id in conflict["conflicting_trip_ids"] if trip_id >= 0
+                    ] or None
+                )
+                continue
+            # Negative keys mark not-yet-inserted trips from this batch
+            start, end = trip_interval(trip_data.scheduled_time, trip_data.estimated_duration_minutes)
+            batch_schedule.upsert(-1 - index, trip_resources(trip_data.driver_id, trip_data.vehicle_id), start, end)
+            accepted.append(index)
+    
+        if accepted:
+            created = db.scalars(
+                insert(Trip).returning(Trip, sort_by_parameter_order=True),
+                [
+                    {
+                        "pickup_location": trips[index].pickup_location,
+                        "destination": trips[index].destination,
+                        "scheduled_time": trips[index].scheduled_time,
+                        "employee_id": trips[index].employee_id,
+                        "driver_id": trips[index].driver_id,
+                        "vehicle_id": trips[index].vehicle_id,
+                        "estimated_duration_minutes": trips[index].estimated_duration_minutes,
+                        "notes": trips[index].notes,
+                        "status": "scheduled"
+                    }
+                    for index in accepted
+                ]
+            ).all()
+            # Build responses before commit expires the returned rows
+            for index, trip in zip(accepted, created):
+                results[index] = TripBulkCreateResult(
+                    index=index,
+                    success=True,
+                    trip=TripResponse(
+                        id=trip.id,
+                        pickup_location=trip.pickup_location,
+                        destination=trip.destination,
+                        scheduled_time=trip.scheduled_time,
+                        actual_start_time=trip.actual_start_time,
+                        actual_end_time=trip.actual_end_time,
+                        status=trip.status,
+                        notes=trip.notes,
+                        employee_id=trip.employee_id,
+                        driver_id=trip.driver_id,
+                        vehicle_id=trip.vehicle_id,
+                        estimated_duration_minutes=trip.estimated_duration_minutes,
+                        version=trip.version,
+                        created_at=trip.created_at,
+                        updated_at=trip.updated_at
+                    )
+                )
+            record_trip_events(db, "trip.created", created)
+            db.commit()
+        
+            for index in accepted:
+                trip = results[index].trip
+                start, end = trip_interval(trip.scheduled_time, trip.estimated_duration_minutes)
+                trip_schedule.upsert(trip.id, trip_resources(trip.driver_id, trip.vehicle_id), start, end)
+    
+    return [results[index] for index in range(len(trips))]
+
+
+def update_trip_status_bulk(db: Session, trip_ids: List[int], new_status: str) -> List[TripBulkStatusResult]:
+    """Set the status of many trips with one UPDATE ... WHERE id IN, returning a result per trip"""
+    validate_status(new_status)
+    if len(trip_ids) > MAX_BULK_TRIPS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_TRIPS} trips per request"
         )
     
+    with booking_lock:
+        rows = {
+            row.id: row for row in db.query(
+                Trip.id, Trip.status, Trip.version, Trip.scheduled_time, Trip.estimated_duration_minutes,
+                Trip.driver_id, Trip.vehicle_id
+            ).filter(Trip.id.in_(set(trip_ids))).all()
+        }
+    
+        results = {}
+        valid_ids = []
+        for trip_id in dict.fromkeys(trip_ids):
+            row = rows.get(trip_id)
+            if row is None:
+                results[trip_id] = TripBulkStatusResult(trip_id=trip_id, success=False, error="Trip not found")
+                continue
+            if row.status == new_status or not can_transition(row.status, new_status):
+                results[trip_id] = TripBulkStatusResult(
+                    trip_id=trip_id,
+                    success=False,
+                    error=f"Cannot move trip from {row.status} to {new_status}"
+                )
+                continue
+            # Re-activating a trip must not double-book its driver or vehicle
+            if new_status in ACTIVE_TRIP_STATUSES and row.status not in ACTIVE_TRIP_STATUSES:
+                conflict = find_trip_conflicts(
+                    row.scheduled_time, row.estimated_duration_minutes, row.driver_id, row.vehicle_id, trip_id
+                )
+                if conflict:
+                    results[trip_id] = TripBulkStatusResult(
+                        trip_id=trip_id,
+                        success=False,
+                        error=conflict["message"],
+                        conflicting_trip_ids=conflict["conflicting_trip_ids"]
+                    )
+                    continue
+            valid_ids.append(trip_id)
+            results[trip_id] = TripBulkStatusResult(trip_id=trip_id, success=True)
+    
+        if valid_ids:
+            # Compare-and-swap on (id, version): rows changed since the read above are skipped
+            updated = db.execute(
+                update(Trip).where(
+                    tuple_(Trip.id, Trip.version).in_([(trip_id, rows[trip_id].version) for trip_id in valid_ids])
+                ).values(**transition_values(new_status)).returning(*TRIP_EVENT_COLUMNS),
+                execution_options={"synchronize_session": False}
+            ).all()
+            record_trip_events(db, STATUS_EVENT_TYPES[new_status], updated)
+            db.commit()
+            updated_ids = {row.id for row in updated}
+        
+            for trip_id in valid_ids:
+                if trip_id not in updated_ids:
+                    results[trip_id] = TripBulkStatusResult(
+                        trip_id=trip_id, success=False, error="Trip was modified by another request"
+                    )
+                    continue
+                row = rows[trip_id]
+                if new_status in ACTIVE_TRIP_STATUSES:
+                    start, end = trip_interval(row.scheduled_time, row.estimated_duration_minutes)
+                    trip_schedule.upsert(trip_id, trip_resources(row.driver_id, row.vehicle_id), start, end)
+                else:
+                    trip_schedule.remove(trip_id)
+    
+    return [results[trip_id] for trip_id in dict.fromkeys(trip_ids)]
+
+
+def find_trip(db: Session, trip_id: int):
+    """A live trip, or an archived one; for read-only views"""
+    for table in (Trip, TripArchive):
+        trip = db.query(table).filter(table.id == trip_id).first()
+        if trip:
+            return trip
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Trip not found"
+    )
+
+
+def get_trip_by_id(db: Session, trip_id: int) -> TripResponse:
+    """Get trip by ID, including archived trips"""
+    trip = find_trip(db, trip_id)
+    
     return TripResponse(
         id=trip.id,
         pickup_location=trip.pickup_location,
@@ -65,19 +264,16 @@ def get_trip_by_id(db: Session, trip_id: int) -> TripResponse:
         employee_id=trip.employee_id,
         driver_id=trip.driver_id,
         vehicle_id=trip.vehicle_id,
+        estimated_duration_minutes=trip.estimated_duration_minutes,
+        version=trip.version,
         created_at=trip.created_at,
         updated_at=trip.updated_at
     )
 
 
 async def get_trip_with_details(db: Session, trip_id: int, auth_token: str) -> TripWithDetails:
-    """Get trip with detailed information from other services"""
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
-    if not trip:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Trip not found"
-        )
+    """Get trip with detailed information from other services, including archived trips"""
+    trip = find_trip(db, trip_id)
     
     # Get employee details
     employee_data = {}
@@ -116,6 +312,7 @@ async def get_trip_with_details(db: Session, trip_id: int, auth_token: str) -> T
         driver_name=driver_data.get("name"),
         vehicle_plate_number=None,  # Would need vehicle service
         vehicle_type=None,
+        version=trip.version,
         created_at=trip.created_at
     )
 
@@ -129,54 +326,92 @@ def update_trip(db: Session, trip_id: int, trip_update: TripUpdate) -> TripRespo
             detail="Trip not found"
         )
     
-    # Update fields
-    for field, value in trip_update.dict(exclude_unset=True).items():
-        setattr(trip, field, value)
+    update_data = trip_update.dict(exclude_unset=True)
+    expected_version = update_data.pop("version", None)
+    if expected_version is not None and expected_version != trip.version:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Trip was modified by another request",
+                "current_version": trip.version
+            }
+        )
+    if "status" in update_data:
+        validate_transition(trip.status, update_data["status"])
     
-    db.commit()
-    db.refresh(trip)
+    with booking_lock:
+        # Re-check bookings when the time window, driver or vehicle changes
+        if {"scheduled_time", "estimated_duration_minutes", "driver_id", "vehicle_id", "status"} & update_data.keys():
+            merged = {
+                "scheduled_time": trip.scheduled_time,
+                "estimated_duration_minutes": trip.estimated_duration_minutes,
+                "driver_id": trip.driver_id,
+                "vehicle_id": trip.vehicle_id,
+                "status": trip.status,
+                **update_data
+            }
+            if merged["status"] in ("scheduled", "in_progress"):
+                check_trip_conflicts(
+                    merged["scheduled_time"], merged["estimated_duration_minutes"],
+                    merged["driver_id"], merged["vehicle_id"], trip_id=trip.id
+                )
     
-    return TripResponse(
-        id=trip.id,
-        pickup_location=trip.pickup_location,
-        destination=trip.destination,
-        scheduled_time=trip.scheduled_time,
-        actual_start_time=trip.actual_start_time,
-        actual_end_time=trip.actual_end_time,
-        status=trip.status,
-        notes=trip.notes,
-        employee_id=trip.employee_id,
-        driver_id=trip.driver_id,
-        vehicle_id=trip.vehicle_id,
-        created_at=trip.created_at,
-        updated_at=trip.updated_at
-    )
+        values = dict(update_data)
+        previous_driver_id = trip.driver_id
+        status_changed = update_data.get("status", trip.status) != trip.status
+        if status_changed:
+            values.update(transition_values(update_data["status"]))
+        else:
+            values["version"] = Trip.version + 1
+    
+        # Compare-and-swap against the version read above so concurrent edits aren't lost
+        updated = db.execute(
+            update(Trip).where(Trip.id == trip_id, Trip.version == trip.version).values(**values).returning(Trip),
+            execution_options={"populate_existing": True}
+        ).scalars().first()
+        if updated is None:
+            target, read_version = update_data.get("status", trip.status), trip.version
+            db.rollback()
+            raise_failed_transition(db, trip_id, target, expected_version=read_version)
+    
+        response = TripResponse(
+            id=updated.id,
+            pickup_location=updated.pickup_location,
+            destination=updated.destination,
+            scheduled_time=updated.scheduled_time,
+            actual_start_time=updated.actual_start_time,
+            actual_end_time=updated.actual_end_time,
+            status=updated.status,
+            notes=updated.notes,
+            employee_id=updated.employee_id,
+            driver_id=updated.driver_id,
+            vehicle_id=updated.vehicle_id,
+            estimated_duration_minutes=updated.estimated_duration_minutes,
+            version=updated.version,
+            created_at=updated.created_at,
+            updated_at=updated.updated_at
+        )
+        record_trip_event(
+            db, STATUS_EVENT_TYPES[updated.status] if status_changed else "trip.updated", response,
+            # The previous driver's summary changes too
+            extra={"previous_driver_id": previous_driver_id} if previous_driver_id != updated.driver_id else None
+        )
+        db.commit()
+        sync_trip_schedule(response)
+    
+    return response
 
 
 def start_trip(db: Session, trip_id: int, driver_user_id: int) -> bool:
     """Start trip (driver only)"""
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
-    if not trip:
-        return False
-    
-    # Verify driver is assigned to this trip
-    # Would need to check with user service for driver mapping
-    
-    trip.status = "in_progress"
-    trip.actual_start_time = datetime.utcnow()
-    db.commit()
+    # Trips store the assigned driver's user id
+    transition_trip(db, trip_id, "in_progress", driver_id=driver_user_id)
     return True
 
 
 def complete_trip(db: Session, trip_id: int, driver_user_id: int) -> bool:
     """Complete trip (driver only)"""
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
-    if not trip:
-        return False
-    
-    trip.status = "completed"
-    trip.actual_end_time = datetime.utcnow()
-    db.commit()
+    transition_trip(db, trip_id, "completed", driver_id=driver_user_id)
     return True
 
 
@@ -196,14 +431,19 @@ def get_trips_by_status(db: Session, status: str) -> List[TripResponse]:
         employee_id=trip.employee_id,
         driver_id=trip.driver_id,
         vehicle_id=trip.vehicle_id,
+        estimated_duration_minutes=trip.estimated_duration_minutes,
+        version=trip.version,
         created_at=trip.created_at,
         updated_at=trip.updated_at
     ) for trip in trips]
 
 
 def get_trips_by_employee(db: Session, employee_id: int) -> List[TripResponse]:
-    """Get trips for specific employee"""
-    trips = db.query(Trip).filter(Trip.employee_id == employee_id).all()
+    """Get trips for specific employee, including archived trips"""
+    trips = (
+        db.query(Trip).filter(Trip.employee_id == employee_id).all()
+        + db.query(TripArchive).filter(TripArchive.employee_id == employee_id).all()
+    )
     
     return [TripResponse(
         id=trip.id,
@@ -217,14 +457,19 @@ def get_trips_by_employee(db: Session, employee_id: int) -> List[TripResponse]:
         employee_id=trip.employee_id,
         driver_id=trip.driver_id,
         vehicle_id=trip.vehicle_id,
+        estimated_duration_minutes=trip.estimated_duration_minutes,
+        version=trip.version,
         created_at=trip.created_at,
         updated_at=trip.updated_at
     ) for trip in trips]
 
 
 def get_trips_by_driver(db: Session, driver_id: int) -> List[TripResponse]:
-    """Get trips for specific driver"""
-    trips = db.query(Trip).filter(Trip.driver_id == driver_id).all()
+    """Get trips for specific driver, including archived trips"""
+    trips = (
+        db.query(Trip).filter(Trip.driver_id == driver_id).all()
+        + db.query(TripArchive).filter(TripArchive.driver_id == driver_id).all()
+    )
     
     return [TripResponse(
         id=trip.id,
@@ -238,6 +483,8 @@ def get_trips_by_driver(db: Session, driver_id: int) -> List[TripResponse]:
         employee_id=trip.employee_id,
         driver_id=trip.driver_id,
         vehicle_id=trip.vehicle_id,
+        estimated_duration_minutes=trip.estimated_duration_minutes,
+        version=trip.version,
         created_at=trip.created_at,
         updated_at=trip.updated_at
     ) for trip in trips]
@@ -269,6 +516,8 @@ def delete_trip(db: Session, trip_id: int) -> bool:
     if not trip:
         return False
     
+    record_trip_event(db, "trip.deleted", trip)
     db.delete(trip)
     db.commit()
+    trip_schedule.remove(trip_id)
     return True
\ No newline at end of file
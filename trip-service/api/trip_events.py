@@ -0,0 +1,73 @@
+import asyncio
+import os
+from collections import Counter
+from typing import List
+from shared.config import TripServiceSettings
+from shared.utils.event_bus import Event, IdempotencyFilter, create_broker
+from shared.utils.http_client import ServiceClient, propagate_user_context, service_key_header
+from database import SessionLocal
+from api.summary import event_subjects, refresh_summaries
+from api.kpis import count_kpi_events
+from api.locations import forget_closed_trip_positions
+
+
+settings = TripServiceSettings()
+notification_service = ServiceClient(settings.NOTIFICATION_SERVICE_URL)
+web_interface = ServiceClient(settings.WEB_INTERFACE_URL)
+
+# Events that change what a rider or driver should be told about
+LIFECYCLE_EVENTS = ("trip.created", "trip.started", "trip.completed", "trip.cancelled")
+
+# Local broker; EVENT_BROKER_URL=sqlite:///path/events.db keeps a durable log for development
+trip_event_broker = create_broker(os.getenv("EVENT_BROKER_URL"))
+
+# Running totals per event type, for analytics
+trip_event_counters = Counter()
+_counted_events = IdempotencyFilter()
+
+
+async def notify_notification_service(events: List[Event]) -> None:
+    await notification_service.post(
+        "/api/events/trips",
+        json_data={"events": [event.to_dict() for event in events]},
+        headers=propagate_user_context(0, "admin")
+    )
+
+
+async def count_trip_events(events: List[Event]) -> None:
+    fresh = _counted_events.fresh(events)
+    trip_event_counters.update(event.event_type for event in fresh)
+    _counted_events.remember(event.event_id for event in fresh)
+
+
+def _refresh_summaries(events: List[Event]) -> None:
+    db = SessionLocal()
+    try:
+        refresh_summaries(db, event_subjects(event.payload for event in events))
+    finally:
+        db.close()
+
+
+async def refresh_trip_summaries(events: List[Event]) -> None:
+    # Recomputing is idempotent, so redelivered events need no dedupe
+    await asyncio.to_thread(_refresh_summaries, events)
+
+
+async def forward_to_web_tracker(events: List[Event]) -> None:
+    await web_interface.post(
+        "/api/trip-events",
+        json_data={"events": [event.to_dict() for event in events]},
+        headers=service_key_header(settings.SERVICE_API_KEY)
+    )
+
+
+def register_trip_event_subscribers() -> None:
+    trip_event_broker.subscribe("analytics", count_trip_events)
+    trip_event_broker.subscribe("summaries", refresh_trip_summaries)
+    trip_event_broker.subscribe("kpis", count_kpi_events)
+    trip_event_broker.subscribe("locations", forget_closed_trip_positions,
+                                ("trip.completed", "trip.cancelled", "trip.deleted"))
+    if os.getenv("TRIP_EVENTS_NOTIFY", "true").lower() == "true":
+        trip_event_broker.subscribe("notifications", notify_notification_service, LIFECYCLE_EVENTS)
+    if os.getenv("TRIP_EVENTS_WEB_TRACKER", "true").lower() == "true":
+        trip_event_broker.subscribe("web_tracker", forward_to_web_tracker)
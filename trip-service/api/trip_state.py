@@ -0,0 +1,127 @@
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from models.trip import Trip
+from api.schedule import sync_trip_schedule
+from api.outbox import record_trip_event, TRIP_EVENT_COLUMNS, STATUS_EVENT_TYPES
+from typing import Optional
+from datetime import datetime
+
+
+TRIP_STATUSES = ("scheduled", "in_progress", "completed", "cancelled")
+
+# Allowed status changes; completed is terminal and cancelled trips can only be reinstated
+TRIP_TRANSITIONS = {
+    "scheduled": ("in_progress", "cancelled"),
+    "in_progress": ("completed", "cancelled"),
+    "cancelled": ("scheduled",),
+    "completed": (),
+}
+
+# Timestamp column stamped when a trip enters a status
+TRANSITION_TIMESTAMPS = {
+    "in_progress": "actual_start_time",
+    "completed": "actual_end_time",
+}
+
+
+def source_statuses(target: str) -> tuple:
+    """Statuses a trip may move to ``target`` from"""
+    return tuple(source for source, targets in TRIP_TRANSITIONS.items() if target in targets)
+
+
+def validate_status(target: str) -> None:
+    if target not in TRIP_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Status must be one of: {', '.join(TRIP_STATUSES)}"
+        )
+
+
+def can_transition(current: str, target: str) -> bool:
+    return current == target or target in TRIP_TRANSITIONS.get(current, ())
+
+
+def validate_transition(current: str, target: str) -> None:
+    """Reject a status change the state machine doesn't allow"""
+    validate_status(target)
+    if not can_transition(current, target):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot move trip from {current} to {target}"
+        )
+
+
+def transition_values(target: str) -> dict:
+    """Column values for moving a trip into ``target``, including the version bump"""
+    values = {"status": target, "version": Trip.version + 1}
+    if target in TRANSITION_TIMESTAMPS:
+        values[TRANSITION_TIMESTAMPS[target]] = datetime.utcnow()
+    return values
+
+
+def raise_failed_transition(db: Session, trip_id: int, target: str,
+                            expected_version: Optional[int] = None,
+                            driver_id: Optional[int] = None) -> None:
+    """Explain why a compare-and-swap matched no row"""
+    current = db.query(Trip.status, Trip.version, Trip.driver_id).filter(Trip.id == trip_id).first()
+    if current is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trip not found"
+        )
+    if driver_id is not None and current.driver_id != driver_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Trip is not assigned to this driver"
+        )
+    if expected_version is not None and current.version != expected_version:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Trip was modified by another request",
+                "current_version": current.version
+            }
+        )
+    if current.status not in source_statuses(target):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot move trip from {current.status} to {target}"
+        )
+    # The row changed between the UPDATE and this read; let the caller retry
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Trip was modified by another request"
+    )
+
+
+def transition_trip(db: Session, trip_id: int, target: str,
+                    expected_version: Optional[int] = None,
+                    driver_id: Optional[int] = None):
+    """Move a trip to ``target`` with one conditional UPDATE ... RETURNING
+
+    The UPDATE only matches while the trip is in a status that may move to
+    ``target`` (and, when given, still has ``expected_version`` and is assigned
+    to ``driver_id``), so concurrent writers can't both win.
+    """
+    validate_status(target)
+    conditions = [Trip.id == trip_id, Trip.status.in_(source_statuses(target))]
+    if expected_version is not None:
+        conditions.append(Trip.version == expected_version)
+    if driver_id is not None:
+        conditions.append(Trip.driver_id == driver_id)
+
+    row = db.execute(
+        update(Trip).where(*conditions).values(**transition_values(target)).returning(
+            *TRIP_EVENT_COLUMNS, Trip.estimated_duration_minutes
+        ),
+        execution_options={"synchronize_session": False}
+    ).first()
+    if row is not None:
+        record_trip_event(db, STATUS_EVENT_TYPES[target], row)
+    db.commit()
+
+    if row is None:
+        raise_failed_transition(db, trip_id, target, expected_version, driver_id)
+    sync_trip_schedule(row)
+    return row
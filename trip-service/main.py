@@ -6,14 +6,29 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from shared.config import TripServiceSettings
 from models.trip import Trip
+from models.outbox import OutboxEvent
+from models.trip_archive import TripArchive
+from models.trip_summary import TripSummary
+from models.kpi_rollup import KpiRollup
+from models.location_ping import LocationPing
+from models.track_segment import TrackSegment
 from routers.trip_router import router as trip_router
+from api.schedule import load_trip_schedule
+from api.commute import run_commute_generator
+from api.outbox import OutboxRelay
+from api.archive import run_trip_archiver
+from api.kpis import load_kpis, run_kpi_flusher, flush_kpis
+from api.locations import run_location_flusher, flush_locations
+from api.tracks import run_track_compactor
+from api.trip_events import trip_event_broker, register_trip_event_subscribers
+import asyncio
 import uvicorn
 
 # Initialize settings
 settings = TripServiceSettings()
 
 # Database setup is handled in database.py
-from database import engine
+from database import engine, SessionLocal
 from shared.database.base import Base
 
 # Create tables
@@ -38,6 +53,90 @@ app.add_middleware(
 # Include routers
 app.include_router(trip_router, prefix="/api", tags=["trips"])
 
+@app.on_event("startup")
+async def load_in_memory_indexes():
+    """Build the driver/vehicle booking index and KPI rollups from the database"""
+    db = SessionLocal()
+    try:
+        load_trip_schedule(db)
+        load_kpis(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def start_commute_generator():
+    """Keep upcoming commute trips materialized in the background"""
+    if os.getenv("COMMUTE_GENERATOR_ENABLED", "true").lower() == "true":
+        app.state.commute_generator = asyncio.create_task(run_commute_generator(SessionLocal))
+
+@app.on_event("shutdown")
+async def stop_commute_generator():
+    task = getattr(app.state, "commute_generator", None)
+    if task:
+        task.cancel()
+
+@app.on_event("startup")
+async def start_trip_archiver():
+    """Periodically move old completed/cancelled trips out of the live table (opt-in with TRIP_ARCHIVER_ENABLED=true)"""
+    if os.getenv("TRIP_ARCHIVER_ENABLED", "false").lower() == "true":
+        app.state.trip_archiver = asyncio.create_task(run_trip_archiver(SessionLocal))
+
+@app.on_event("shutdown")
+async def stop_trip_archiver():
+    task = getattr(app.state, "trip_archiver", None)
+    if task:
+        task.cancel()
+
+@app.on_event("startup")
+async def start_kpi_flusher():
+    """Persist KPI rollups and sample active trip/driver gauges"""
+    app.state.kpi_flusher = asyncio.create_task(run_kpi_flusher(SessionLocal))
+
+@app.on_event("shutdown")
+async def stop_kpi_flusher():
+    task = getattr(app.state, "kpi_flusher", None)
+    if task:
+        task.cancel()
+        await asyncio.to_thread(flush_kpis, SessionLocal)
+
+@app.on_event("startup")
+async def start_location_flusher():
+    """Append buffered driver GPS positions to the location table"""
+    app.state.location_flusher = asyncio.create_task(run_location_flusher(SessionLocal))
+
+@app.on_event("shutdown")
+async def stop_location_flusher():
+    task = getattr(app.state, "location_flusher", None)
+    if task:
+        task.cancel()
+        await asyncio.to_thread(flush_locations, SessionLocal)
+
+@app.on_event("startup")
+async def start_track_compactor():
+    """Pack settled GPS pings into per-minute trip track segments"""
+    if os.getenv("TRACK_COMPACTOR_ENABLED", "true").lower() == "true":
+        app.state.track_compactor = asyncio.create_task(run_track_compactor(SessionLocal))
+
+@app.on_event("shutdown")
+async def stop_track_compactor():
+    task = getattr(app.state, "track_compactor", None)
+    if task:
+        task.cancel()
+
+@app.on_event("startup")
+async def start_outbox_relay():
+    """Publish committed trip events to notification-service, analytics and the web tracker"""
+    if os.getenv("OUTBOX_RELAY_ENABLED", "true").lower() == "true":
+        register_trip_event_subscribers()
+        app.state.outbox_relay = OutboxRelay(SessionLocal, trip_event_broker)
+        app.state.outbox_relay.start()
+
+@app.on_event("shutdown")
+async def stop_outbox_relay():
+    relay = getattr(app.state, "outbox_relay", None)
+    if relay:
+        await relay.stop()
+
 @app.get("/")
 async def root():
     return {"service": "Trip Service", "status": "running", "version": "1.0.0"}
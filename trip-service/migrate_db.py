@@ -65,13 +65,39 @@ def drop_foreign_keys():
     
     return True
 
+def add_trip_columns():
+    """Add columns introduced after the initial trips schema"""
+    settings = TripServiceSettings()
+    engine = create_engine(settings.DATABASE_URL)
+    
+    add_columns_sql = [
+        "ALTER TABLE trips ADD COLUMN IF NOT EXISTS estimated_duration_minutes INTEGER;",
+        "ALTER TABLE trips ADD COLUMN IF NOT EXISTS recurrence_key VARCHAR;",
+        "ALTER TABLE trips ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_trips_recurrence_key ON trips (recurrence_key);",
+        "ALTER TABLE trip_outbox ADD COLUMN IF NOT EXISTS pending_subscribers TEXT;",
+        "ALTER TABLE trip_outbox ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITH TIME ZONE;",
+        "ALTER TABLE trip_outbox ADD COLUMN IF NOT EXISTS dead_at TIMESTAMP WITH TIME ZONE;"
+    ]
+    
+    try:
+        with engine.begin() as conn:
+            for sql in add_columns_sql:
+                conn.execute(text(sql))
+                print(f"✅ Executed: {sql}")
+    except Exception as e:
+        print(f"❌ Error during migration: {e}")
+        return False
+    
+    return True
+
 def main():
     """Main migration function"""
     print("=" * 60)
     print("🚀 Trip Service Database Migration")
     print("=" * 60)
     
-    success = drop_foreign_keys()
+    success = drop_foreign_keys() and add_trip_columns()
     
     if success:
         print("\n✅ Migration completed successfully!")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, UniqueConstraint
+from shared.database.base import Base
+
+class KpiRollup(Base):
+    """One metric's value in one time bucket, persisted from the in-memory rollup"""
+    __tablename__ = "kpi_rollups"
+    __table_args__ = (UniqueConstraint("resolution", "bucket", "metric", name="uq_kpi_rollups_bucket_metric"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    resolution = Column(String, nullable=False)  # minute or hour
+    bucket = Column(BigInteger, nullable=False)  # Bucket start in seconds since the epoch / bucket width
+    metric = Column(String, nullable=False)
+    value = Column(Float, nullable=False)
+    
+    def __repr__(self):
+        return f"<KpiRollup(resolution='{self.resolution}', bucket={self.bucket}, metric='{self.metric}', value={self.value})>"
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, BigInteger, Integer, SmallInteger, DateTime, Index
+from shared.database.base import Base
+
+class LocationPing(Base):
+    """Append-only driver positions, at most one per driver per coalescing slot
+
+    Coordinates are stored as integer microdegrees (about 11 cm precision) to
+    keep rows small.
+    """
+    __tablename__ = "location_pings"
+    __table_args__ = (
+        Index("ix_location_pings_driver_recorded", "driver_id", "recorded_at"),
+        Index("ix_location_pings_trip_recorded", "trip_id", "recorded_at"),
+    )
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    driver_id = Column(Integer, nullable=False)
+    trip_id = Column(Integer, nullable=True)
+    recorded_at = Column(DateTime, nullable=False)  # UTC, as reported by the device
+    lat_e6 = Column(Integer, nullable=False)
+    lng_e6 = Column(Integer, nullable=False)
+    speed_kmh = Column(SmallInteger, nullable=True)
+    heading = Column(SmallInteger, nullable=True)  # Degrees clockwise from north
+    
+    def __repr__(self):
+        return f"<LocationPing(driver_id={self.driver_id}, recorded_at='{self.recorded_at}')>"
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from shared.database.base import Base
+
+
+class OutboxEvent(Base):
+    __tablename__ = "trip_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String, nullable=False, unique=True)  # Idempotency key sent to consumers
+    event_type = Column(String, nullable=False)  # trip.created, trip.started, trip.completed, ...
+    trip_id = Column(Integer, nullable=False, index=True)
+    payload = Column(Text, nullable=False)  # JSON snapshot of the trip after the change
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    pending_subscribers = Column(Text, nullable=True)  # JSON list of subscribers still to deliver to; NULL means all
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)  # Retry backoff after a failed delivery
+    dead_at = Column(DateTime(timezone=True), nullable=True)  # Parked after too many failed attempts
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    published_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, event_type='{self.event_type}', trip_id={self.trip_id})>"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, DateTime, LargeBinary, UniqueConstraint
+from shared.database.base import Base
+
+class TrackSegment(Base):
+    """One minute of a trip's GPS track, packed by shared.utils.track_codec"""
+    __tablename__ = "trip_track_segments"
+    __table_args__ = (UniqueConstraint("trip_id", "segment_start", name="uq_trip_track_segments_minute"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    trip_id = Column(Integer, nullable=False)
+    segment_start = Column(DateTime, nullable=False)  # UTC minute the points fall in
+    driver_id = Column(Integer, nullable=False)
+    point_count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    
+    def __repr__(self):
+        return f"<TrackSegment(trip_id={self.trip_id}, segment_start='{self.segment_start}', points={self.point_count})>"
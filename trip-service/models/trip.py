@@ -10,9 +10,11 @@ class Trip(Base):
     pickup_location = Column(String, nullable=False)
     destination = Column(String, nullable=False)
     scheduled_time = Column(DateTime, nullable=False)
+    estimated_duration_minutes = Column(Integer, nullable=True)  # Booking length for overlap checks (default applies when null)
     actual_start_time = Column(DateTime, nullable=True)
     actual_end_time = Column(DateTime, nullable=True)
     status = Column(String, default="scheduled")  # scheduled, in_progress, completed, cancelled
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on every write for compare-and-swap updates
     notes = Column(Text, nullable=True)
     
     # References to other services (using IDs instead of foreign keys)
@@ -21,6 +23,9 @@ class Trip(Base):
     driver_id = Column(Integer, nullable=True, index=True)
     vehicle_id = Column(Integer, nullable=True, index=True)
     
+    # Set on trips generated from commute schedules, e.g. "commute:42:2025-01-06:pickup"
+    recurrence_key = Column(String, nullable=True, unique=True, index=True)
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from shared.database.base import Base
+
+class TripArchive(Base):
+    """Closed trips moved out of the hot ``trips`` table by the archival job
+
+    On Postgres the table is range-partitioned by month of ``scheduled_time``
+    (partitions are created by the archiver as needed), so the partition key is
+    part of the primary key.
+    """
+    __tablename__ = "trips_archive"
+    __table_args__ = {"postgresql_partition_by": "RANGE (scheduled_time)"}
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    scheduled_time = Column(DateTime, primary_key=True)
+    pickup_location = Column(String, nullable=False)
+    destination = Column(String, nullable=False)
+    estimated_duration_minutes = Column(Integer, nullable=True)
+    actual_start_time = Column(DateTime, nullable=True)
+    actual_end_time = Column(DateTime, nullable=True)
+    status = Column(String, nullable=False)
+    notes = Column(Text, nullable=True)
+    employee_id = Column(Integer, nullable=False, index=True)
+    driver_id = Column(Integer, nullable=True, index=True)
+    vehicle_id = Column(Integer, nullable=True)
+    version = Column(Integer, nullable=False, default=1)
+    recurrence_key = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<TripArchive(id={self.id}, scheduled_time='{self.scheduled_time}', status='{self.status}')>"
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, UniqueConstraint
+from sqlalchemy.sql import func
+from shared.database.base import Base
+
+class TripSummary(Base):
+    """Precomputed dashboard totals for one employee or driver"""
+    __tablename__ = "trip_summaries"
+    __table_args__ = (UniqueConstraint("role", "subject_id", name="uq_trip_summaries_role_subject"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    role = Column(String, nullable=False)  # employee or driver
+    subject_id = Column(Integer, nullable=False)  # employee_id or driver_id on trips
+    computed_for = Column(Date, nullable=False)  # Day the window below ends; older rows are recomputed on read
+    week_start = Column(Date, nullable=False)  # Periods the counts below were computed for
+    month_start = Column(Date, nullable=False)
+    trips_this_week = Column(Integer, default=0)
+    trips_this_month = Column(Integer, default=0)
+    # Over the trailing window of closed trips
+    completed_trips = Column(Integer, default=0)
+    cancelled_trips = Column(Integer, default=0)
+    on_time_trips = Column(Integer, default=0)
+    avg_duration_minutes = Column(Float, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<TripSummary(role='{self.role}', subject_id={self.subject_id}, trips_this_month={self.trips_this_month})>"
@@ -1,13 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, WebSocket, WebSocketDisconnect
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.orm import Session
 from api.trip import (
     create_trip, get_trip_by_id, get_trip_with_details, update_trip,
     start_trip, complete_trip, get_trips_by_status, get_trips_by_employee,
-    get_trips_by_driver, get_trip_analytics, delete_trip
+    get_trips_by_driver, get_trip_analytics, delete_trip,
+    create_trips_bulk, update_trip_status_bulk
 )
-from shared.schemas.trip import TripCreate, TripUpdate, TripResponse, TripWithDetails, TripStatistics
-from database import get_database_session
+from api.schedule import get_schedule_conflicts
+from api.commute import generate_commute_trips, COMMUTE_LOOKAHEAD_DAYS
+from api.trip_events import trip_event_counters
+from api.outbox import count_dead_letters
+from api.export import export_trips
+from api.summary import get_trip_summary
+from api.kpis import get_kpis
+from api.archive import archive_closed_trips, ARCHIVE_AFTER_MONTHS
+from api.locations import ingest_pings, get_driver_position, get_trip_position, location_buffer
+from api.tracks import replay_trip_track, trip_participants
+from shared.schemas.trip import (
+    TripCreate, TripUpdate, TripResponse, TripWithDetails, TripStatistics,
+    ScheduleConflictReport, TripSummaryResponse, TripBulkCreate, TripBulkCreateResult,
+    TripBulkStatusUpdate, TripBulkStatusResult, LocationPingIn, LocationBatch,
+    LocationIngestResult, DriverPosition
+)
+from database import get_database_session, SessionLocal
 from typing import List, Optional
+from datetime import date, datetime
+import asyncio
 
 router = APIRouter()
 
@@ -33,7 +52,7 @@ def get_user_context(
     }
 
 @router.post("/trips", response_model=TripResponse)
-async def create_new_trip(
+def create_new_trip(
     trip_data: TripCreate,
     db: Session = Depends(get_db),
     user_context: dict = Depends(get_user_context)
@@ -44,7 +63,253 @@ async def create_new_trip(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can create trips"
         )
-    return await create_trip(db, trip_data)
+    return create_trip(db, trip_data)
+
+@router.post("/trips/bulk", response_model=List[TripBulkCreateResult])
+def create_trips_in_bulk(
+    bulk_data: TripBulkCreate,
+    db: Session = Depends(get_db),
+    user_context: dict = Depends(get_user_context)
+):
+    """Create many trips in one call with per-item results (Admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can create trips"
+        )
+    return create_trips_bulk(db, bulk_data.trips)
+
+@router.patch("/trips/status/bulk", response_model=List[TripBulkStatusResult])
+def update_trip_status_in_bulk(
+    status_update: TripBulkStatusUpdate,
+    db: Session = Depends(get_db),
+    user_context: dict = Depends(get_user_context)
+):
+    """Set the status of many trips in one call with per-trip results (Admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can update trips"
+        )
+    return update_trip_status_bulk(db, status_update.trip_ids, status_update.status)
+
+@router.get("/trips/export")
+def export_trip_history(
+    format: str = "csv",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    user_context: dict = Depends(get_user_context)
+):
+    """Stream trips scheduled in a date range as CSV or Parquet (Admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can export trips"
+        )
+    return export_trips(SessionLocal, format, start_date, end_date, status_filter)
+
+@router.post("/trips/archive")
+async def archive_trips_now(
+    months: int = ARCHIVE_AFTER_MONTHS,
+    user_context: dict = Depends(get_user_context)
+):
+    """Move completed/cancelled trips older than `months` out of the live table (Admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can archive trips"
+        )
+    if months < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="months must be at least 1"
+        )
+    return await asyncio.to_thread(archive_closed_trips, SessionLocal, months)
+
+@router.get("/trips/summary/{role}/{subject_id}", response_model=TripSummaryResponse)
+def get_trip_summary_for(
+    role: str,
+    subject_id: int,
+    db: Session = Depends(get_db),
+    user_context: dict = Depends(get_user_context)
+):
+    """Precomputed trip totals and rates for an employee or driver"""
+    # Employees and drivers can see their own summary, admins can see all
+    if user_context["role"] != "admin" and (
+        user_context["role"] != role or user_context["user_id"] != subject_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view your own trip summary"
+        )
+    return get_trip_summary(db, role, subject_id)
+
+@router.get("/trips/kpis")
+def get_trip_kpis(
+    window: str = "24h",
+    user_context: dict = Depends(get_user_context)
+):
+    """Per-minute/per-hour trip counters and active trip/driver gauges for a window like 6h or 7d (Admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view KPIs"
+        )
+    return get_kpis(window)
+
+@router.get("/trips/events/stats")
+def get_trip_event_stats(
+    user_context: dict = Depends(get_user_context),
+    db: Session = Depends(get_db)
+):
+    """Trip lifecycle events published since startup, by type, and events parked after failed deliveries (Admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view trip event statistics"
+        )
+    return {"events": dict(trip_event_counters), "dead_letters": count_dead_letters(db)}
+
+@router.post("/locations/batch", response_model=LocationIngestResult, status_code=status.HTTP_202_ACCEPTED)
+def report_locations(
+    batch: LocationBatch,
+    db: Session = Depends(get_db),
+    user_context: dict = Depends(get_user_context)
+):
+    """Report a batch of GPS pings for the calling driver"""
+    if user_context["role"] != "driver":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only drivers can report locations"
+        )
+    return ingest_pings(db, user_context["user_id"], batch.pings)
+
+_ping_list = TypeAdapter(List[LocationPingIn])
+
+def _ingest_streamed_pings(driver_id: int, pings: List[LocationPingIn]) -> None:
+    db = SessionLocal()
+    try:
+        ingest_pings(db, driver_id, pings)
+    finally:
+        db.close()
+
+@router.websocket("/locations/ws")
+async def stream_locations(websocket: WebSocket):
+    """Stream GPS pings as JSON arrays of pings; only errors are sent back"""
+    if websocket.headers.get("x-user-role") != "driver" or not websocket.headers.get("x-user-id"):
+        await websocket.close(code=1008)
+        return
+    driver_id = int(websocket.headers["x-user-id"])
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                pings = _ping_list.validate_json(message)
+                await asyncio.to_thread(_ingest_streamed_pings, driver_id, pings)
+            except ValidationError as e:
+                await websocket.send_json({"error": "Invalid pings", "detail": e.errors(include_url=False, include_context=False)})
+            except HTTPException as e:
+                await websocket.send_json({"error": e.detail})
+    except WebSocketDisconnect:
+        pass
+
+@router.get("/locations/stats")
+def get_location_stats(
+    user_context: dict = Depends(get_user_context)
+):
+    """Ping counts since startup and positions waiting to be written (Admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view location statistics"
+        )
+    return location_buffer.stats()
+
+@router.get("/locations/drivers/{driver_id}/latest", response_model=DriverPosition)
+def get_latest_driver_location(
+    driver_id: int,
+    user_context: dict = Depends(get_user_context)
+):
+    """Latest reported position of a driver"""
+    # Drivers can see their own position, admins can see all
+    if user_context["role"] != "admin" and (
+        user_context["role"] != "driver" or user_context["user_id"] != driver_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view your own location"
+        )
+    return get_driver_position(driver_id)
+
+@router.get("/locations/trips/{trip_id}/latest", response_model=DriverPosition)
+def get_latest_trip_location(
+    trip_id: int,
+    db: Session = Depends(get_db),
+    user_context: dict = Depends(get_user_context)
+):
+    """Latest position of the driver on a trip"""
+    # The trip's employee and driver can follow it, admins can follow all
+    if user_context["role"] != "admin":
+        trip = get_trip_by_id(db, trip_id)
+        if user_context["user_id"] not in (trip.employee_id, trip.driver_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only follow your own trips"
+            )
+    return get_trip_position(trip_id)
+
+@router.get("/locations/trips/{trip_id}/track")
+def replay_trip_location_history(
+    trip_id: int,
+    format: str = "json",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    user_context: dict = Depends(get_user_context)
+):
+    """Stream the recorded GPS track of a live or archived trip as JSON or CSV"""
+    # The trip's employee and driver can replay it, admins can replay all
+    if user_context["role"] != "admin" and user_context["user_id"] not in trip_participants(db, trip_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only replay your own trips"
+        )
+    return replay_trip_track(SessionLocal, trip_id, format, since, until)
+
+@router.get("/trips/conflicts", response_model=ScheduleConflictReport)
+def get_trip_conflicts(
+    date: str,
+    db: Session = Depends(get_db),
+    user_context: dict = Depends(get_user_context)
+):
+    """Report overlapping driver/vehicle bookings for a day, YYYY-MM-DD (Admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view schedule conflicts"
+        )
+    return get_schedule_conflicts(db, date)
+
+@router.post("/trips/commute/generate")
+async def generate_commute_trips_now(
+    start_date: Optional[date] = None,
+    days: int = COMMUTE_LOOKAHEAD_DAYS,
+    user_context: dict = Depends(get_user_context)
+):
+    """Materialize commute trips from employee schedules now (Admin only, idempotent)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can generate commute trips"
+        )
+    if not 1 <= days <= 31:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Days must be between 1 and 31"
+        )
+    return await generate_commute_trips(SessionLocal, start_date, days)
 
 @router.get("/trips/{trip_id}", response_model=TripWithDetails)
 async def get_trip_details(
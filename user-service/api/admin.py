@@ -1,16 +1,34 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from models.admin import Admin
 from models.driver import Driver
 from models.employee import Employee
 from models.vehicle import Vehicle
+from api.driver import sync_driver_index, driver_availability, zone_for_service_area
 from shared.schemas.user import AdminCreate, AdminUpdate, AdminResponse, AdminWithUser
 from shared.config import UserServiceSettings
+from shared.utils.ttl_cache import AsyncTTLCache
 from typing import List, Optional
+import asyncio
+import os
 import httpx
 
 settings = UserServiceSettings()
 
+# Dashboard payload is shared by all admins and refreshed at most every few seconds
+DASHBOARD_CACHE_TTL = float(os.getenv("ADMIN_DASHBOARD_CACHE_TTL", "5"))
+dashboard_cache = AsyncTTLCache(ttl=DASHBOARD_CACHE_TTL)
+_trip_service_client: Optional[httpx.AsyncClient] = None
+
+
+def get_trip_service_client() -> httpx.AsyncClient:
+    """Get the pooled HTTP client for trip-service, created on first use"""
+    global _trip_service_client
+    if _trip_service_client is None:
+        _trip_service_client = httpx.AsyncClient(base_url=settings.TRIP_SERVICE_URL, timeout=5.0)
+    return _trip_service_client
+
 
 # =============================================================================
 # ADMIN MANAGEMENT FUNCTIONS (Top Priority)
@@ -81,6 +99,7 @@ async def get_all_drivers(db: Session) -> List[dict]:
                         "vehicle_plate_number": driver.vehicle_plate_number,
                         "is_available": driver.is_available,
                         "identity_proof_status": driver.identity_proof_status,
+                        "identity_proof_preview_url": driver.identity_proof_preview_url,
                         "service_area": driver.service_area,
                         "email": user_data.get("email", "unknown"),
                         "is_active": user_data.get("is_active", True),
@@ -97,6 +116,7 @@ async def get_all_drivers(db: Session) -> List[dict]:
                     "vehicle_plate_number": driver.vehicle_plate_number,
                     "is_available": driver.is_available,
                     "identity_proof_status": driver.identity_proof_status,
+                    "identity_proof_preview_url": driver.identity_proof_preview_url,
                     "service_area": driver.service_area,
                     "email": "unavailable",
                     "is_active": True,
@@ -161,27 +181,25 @@ async def assign_driver_to_employee(db: Session, employee_id: int, driver_id: Op
     
     if driver_id:
         # Assign specific driver
-        driver = db.query(Driver).filter(Driver.id == driver_id, Driver.is_available == True).first()
+        driver = None
+        if driver_availability.is_available(driver_id):
+            driver = db.query(Driver).filter(Driver.id == driver_id).first()
         if not driver:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Driver not found or not available"
             )
     else:
-        # Find available driver in the same service area as employee's home location
-        driver = db.query(Driver).filter(
-            Driver.is_available == True,
-            Driver.service_area.ilike(f"%{employee.home_location}%")
-        ).first()
-        
+        # Find available driver in the same zone as employee's home location,
+        # falling back to any available driver (availability read from memory)
+        zone_drivers = driver_availability.available_in_zone(zone_for_service_area(employee.home_location))
+        candidate_id = zone_drivers[0] if zone_drivers else driver_availability.any_available()
+        driver = db.query(Driver).filter(Driver.id == candidate_id).first() if candidate_id is not None else None
         if not driver:
-            # If no driver in same area, get any available driver
-            driver = db.query(Driver).filter(Driver.is_available == True).first()
-            if not driver:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No available drivers found"
-                )
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No available drivers found"
+            )
     
     # Create trip assignment through trip service
     async with httpx.AsyncClient() as client:
@@ -266,6 +284,7 @@ async def toggle_user_status(db: Session, user_id: int, user_type: str, new_stat
         user.is_available = new_status
         db.commit()
         db.refresh(user)
+        sync_driver_index(user)
     elif user_type == "employee":
         # For employees, update auth service status
         async with httpx.AsyncClient() as client:
@@ -302,43 +321,72 @@ async def toggle_user_status(db: Session, user_id: int, user_type: str, new_stat
 
 async def get_admin_dashboard(db: Session) -> dict:
     """Admin function: Get comprehensive admin dashboard data"""
-    # Get basic statistics
-    driver_stats = {
-        "total": db.query(Driver).count(),
-        "available": db.query(Driver).filter(Driver.is_available == True).count(),
-        "verified": db.query(Driver).filter(Driver.identity_proof_status == "approved").count(),
-        "pending_verification": db.query(Driver).filter(Driver.identity_proof_status == "pending").count()
-    }
-    
-    employee_stats = {
-        "total": db.query(Employee).count()
-    }
-    
-    admin_stats = {
-        "total": db.query(Admin).count()
-    }
+    return await dashboard_cache.get_or_compute("dashboard", lambda: build_admin_dashboard(db))
+
+
+def collect_user_statistics(db: Session) -> dict:
+    """Count drivers, employees, admins and vehicles with at most one aggregate query per table"""
+    driver_row = db.query(
+        func.count(Driver.id).filter(Driver.identity_proof_status == "approved"),
+        func.count(Driver.id).filter(Driver.identity_proof_status == "pending")
+    ).one()
+    # Availability comes from the in-memory registry rather than the drivers table
+    availability = driver_availability.counts()
+    vehicle_row = db.query(
+        func.count(Vehicle.id),
+        func.count(Vehicle.id).filter(Vehicle.is_available == True)
+    ).one()
     
-    vehicle_stats = {
-        "total": db.query(Vehicle).count(),
-        "available": db.query(Vehicle).filter(Vehicle.is_available == True).count()
+    return {
+        "drivers": {
+            "total": availability["total"],
+            "available": availability["available"],
+            "available_by_zone": availability["by_zone"],
+            "verified": driver_row[0],
+            "pending_verification": driver_row[1]
+        },
+        "employees": {
+            "total": db.query(func.count(Employee.id)).scalar()
+        },
+        "admins": {
+            "total": db.query(func.count(Admin.id)).scalar()
+        },
+        "vehicles": {
+            "total": vehicle_row[0],
+            "available": vehicle_row[1]
+        },
+        "recent_drivers": db.query(
+            Driver.id, Driver.name, Driver.identity_proof_status, Driver.created_at
+        ).order_by(Driver.created_at.desc()).limit(5).all(),
+        "recent_employees": db.query(
+            Employee.id, Employee.name, Employee.home_location, Employee.created_at
+        ).order_by(Employee.created_at.desc()).limit(5).all()
     }
-    
-    # Get recent drivers and employees
-    recent_drivers = db.query(Driver).order_by(Driver.created_at.desc()).limit(5).all()
-    recent_employees = db.query(Employee).order_by(Employee.created_at.desc()).limit(5).all()
-    
-    # Get trip statistics from trip service
-    trip_stats = {}
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{settings.TRIP_SERVICE_URL}/trips/admin/statistics",
-                timeout=5.0
-            )
-            if response.status_code == 200:
-                trip_stats = response.json()
-        except Exception:
-            trip_stats = {"total": 0, "completed": 0, "pending": 0, "in_progress": 0}
+
+
+async def fetch_trip_statistics() -> dict:
+    """Get trip statistics from trip service"""
+    try:
+        response = await get_trip_service_client().get("/trips/admin/statistics")
+        if response.status_code == 200:
+            return response.json()
+        return {}
+    except Exception:
+        return {"total": 0, "completed": 0, "pending": 0, "in_progress": 0}
+
+
+async def build_admin_dashboard(db: Session) -> dict:
+    """Build the dashboard payload, querying the database while trip stats are fetched"""
+    user_stats, trip_stats = await asyncio.gather(
+        asyncio.to_thread(collect_user_statistics, db),
+        fetch_trip_statistics()
+    )
+    driver_stats = user_stats["drivers"]
+    employee_stats = user_stats["employees"]
+    admin_stats = user_stats["admins"]
+    vehicle_stats = user_stats["vehicles"]
+    recent_drivers = user_stats["recent_drivers"]
+    recent_employees = user_stats["recent_employees"]
     
     return {
         "statistics": {
@@ -0,0 +1,320 @@
+import csv
+import io
+import json
+from fastapi import HTTPException, UploadFile, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from models.employee import Employee
+from models.driver import Driver
+from api.employee import employee_id_sequence, format_employee_id, claim_employee_ids
+from api.driver import sync_driver_index
+from shared.schemas.user import EmployeeImportRow, DriverImportRow
+from shared.utils.http_client import ServiceClient, service_key_header
+from shared.config import UserServiceSettings
+from shared.utils.geocoder import geocode_location
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+settings = UserServiceSettings()
+# Hashing a full batch of passwords takes far longer than a single registration
+auth_batch_client = ServiceClient(settings.AUTH_SERVICE_URL, timeout=300)
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+IMPORT_KINDS = {
+    "employees": (EmployeeImportRow, "employee"),
+    "drivers": (DriverImportRow, "driver"),
+}
+
+
+def detect_upload_format(upload: UploadFile, upload_format: Optional[str] = None) -> str:
+    """Work out whether an upload is CSV or JSONL from the explicit format, filename or content type"""
+    if upload_format:
+        upload_format = upload_format.lower()
+        if upload_format not in ("csv", "jsonl"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Format must be 'csv' or 'jsonl'"
+            )
+        return upload_format
+
+    filename = (upload.filename or "").lower()
+    content_type = (upload.content_type or "").lower()
+    if filename.endswith((".jsonl", ".ndjson")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "jsonl"
+    return "csv"
+
+
+def iter_upload_rows(upload: UploadFile, upload_format: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, row, parse error) one row at a time without reading the whole file"""
+    stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    try:
+        if upload_format == "jsonl":
+            for line_number, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, None, f"Invalid JSON: {e.msg}"
+                    continue
+                if not isinstance(row, dict):
+                    yield line_number, None, "Each line must be a JSON object"
+                    continue
+                yield line_number, row, None
+        else:
+            reader = csv.DictReader(stream)
+            for row in reader:
+                # Empty cells mean "not provided" so optional fields fall back to defaults
+                yield reader.line_num, {
+                    key.strip(): value.strip()
+                    for key, value in row.items()
+                    if key and isinstance(value, str) and value.strip() != ""
+                }, None
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload must be UTF-8 encoded"
+        )
+    finally:
+        # Leave the underlying upload file for FastAPI to close
+        stream.detach()
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Flatten pydantic errors into one readable message"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+
+def record_error(report: dict, row_number: int, message: str) -> None:
+    """Count a failed row and keep its details while under the report limit"""
+    report["failed"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"row": row_number, "error": message})
+
+
+async def import_profiles(db: Session, kind: str, upload: UploadFile,
+                          upload_format: Optional[str] = None) -> dict:
+    """Stream a CSV/JSONL upload and create auth users plus profiles in batches"""
+    if kind not in IMPORT_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Import type must be one of: {', '.join(IMPORT_KINDS)}"
+        )
+    row_model, _ = IMPORT_KINDS[kind]
+    upload_format = detect_upload_format(upload, upload_format)
+
+    report = {"type": kind, "processed": 0, "created": 0, "failed": 0, "errors": []}
+    batch: List[Tuple[int, BaseModel]] = []
+    for row_number, data, error in iter_upload_rows(upload, upload_format):
+        report["processed"] += 1
+        if error:
+            record_error(report, row_number, error)
+            continue
+        try:
+            batch.append((row_number, row_model(**data)))
+        except ValidationError as e:
+            record_error(report, row_number, format_validation_error(e))
+            continue
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await import_batch(db, kind, batch, report)
+            batch = []
+
+    if batch:
+        await import_batch(db, kind, batch, report)
+
+    report["errors"].sort(key=lambda item: item["row"])
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
+
+
+async def import_batch(db: Session, kind: str, batch: List[Tuple[int, BaseModel]], report: dict) -> None:
+    """Register one batch of rows with auth-service and insert their profiles
+
+    Rows whose profile cannot be saved have their new login accounts deleted
+    again, so fixing and re-importing them works.
+    """
+    batch = reject_duplicates(db, kind, batch, report)
+    if not batch:
+        return
+
+    _, role = IMPORT_KINDS[kind]
+    try:
+        results = await auth_batch_client.post(
+            "/auth/register/batch",
+            json_data={"users": [
+                {"email": row.email, "password": row.password, "role": role}
+                for _, row in batch
+            ]},
+            headers=service_key_header(settings.SERVICE_API_KEY)
+        )
+    except HTTPException as e:
+        for row_number, _ in batch:
+            record_error(report, row_number, f"User registration failed: {e.detail}")
+        return
+
+    registered = []
+    for result in results:
+        row_number, row = batch[result["index"]]
+        if result["success"]:
+            registered.append((row_number, row, result["user"]["id"]))
+        else:
+            record_error(report, row_number, result["error"] or "User registration failed")
+    if not registered:
+        return
+
+    try:
+        if kind == "employees":
+            failed = insert_employees(db, registered)
+        else:
+            failed = insert_drivers(db, registered)
+    except SQLAlchemyError as e:
+        db.rollback()
+        failed = [
+            (row_number, user_id, f"Profile could not be saved: {e.__class__.__name__}")
+            for row_number, _, user_id in registered
+        ]
+    report["created"] += len(registered) - len(failed)
+    if not failed:
+        return
+
+    # Remove the login accounts of rows without a profile so they can be imported again
+    reverted = True
+    try:
+        await auth_batch_client.post(
+            "/auth/register/batch/revert",
+            json_data={"user_ids": [user_id for _, user_id, _ in failed]},
+            headers=service_key_header(settings.SERVICE_API_KEY)
+        )
+    except HTTPException:
+        reverted = False
+    for row_number, _, error in failed:
+        record_error(report, row_number, error if reverted else f"{error} (login account was left registered)")
+
+
+def reject_duplicates(db: Session, kind: str, batch: List[Tuple[int, BaseModel]],
+                      report: dict) -> List[Tuple[int, BaseModel]]:
+    """Drop rows whose email or unique profile field repeats within the batch or already exists"""
+    if kind == "employees":
+        unique_field, column = "employee_id", Employee.employee_id
+    else:
+        unique_field, column = "dl_number", Driver.dl_number
+
+    values = {getattr(row, unique_field) for _, row in batch if getattr(row, unique_field)}
+    existing = {
+        value for (value,) in db.query(column).filter(column.in_(values)).all()
+    } if values else set()
+
+    seen_emails = set()
+    seen_values = set()
+    accepted = []
+    for row_number, row in batch:
+        email = row.email.lower()
+        value = getattr(row, unique_field)
+        if email in seen_emails:
+            record_error(report, row_number, "Duplicate email in upload")
+        elif value and value in existing:
+            record_error(report, row_number, f"{unique_field} already exists")
+        elif value and value in seen_values:
+            record_error(report, row_number, f"Duplicate {unique_field} in upload")
+        else:
+            seen_emails.add(email)
+            if value:
+                seen_values.add(value)
+            accepted.append((row_number, row))
+    return accepted
+
+
+def insert_rows(db: Session, model, registered: List[Tuple[int, BaseModel, int]], rows: List[Dict],
+                renumber=None) -> Tuple[List[Tuple[int, int, str]], List]:
+    """Insert profile rows in one statement, falling back to one savepoint per row on a clash
+
+    Returns the failed (row number, user id, error) and the new profile ids
+    in row order (None for failed rows). ``renumber`` gives a row a fresh
+    generated value to retry with once, or None when its value was supplied.
+    """
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    try:
+        ids = db.scalars(statement, rows).all()
+        db.commit()
+        return [], ids
+    except IntegrityError:
+        db.rollback()
+
+    failed, ids = [], []
+    for (row_number, _, user_id), values in zip(registered, rows):
+        for attempt in range(2):
+            try:
+                with db.begin_nested():
+                    ids.append(db.scalars(statement, [values]).one())
+                break
+            except IntegrityError:
+                if attempt or not renumber or not renumber(values):
+                    failed.append((row_number, user_id, "Profile conflicts with an existing record"))
+                    ids.append(None)
+                    break
+    db.commit()
+    return failed, ids
+
+
+def insert_employees(db: Session, registered: List[Tuple[int, EmployeeImportRow, int]]) -> List[Tuple[int, int, str]]:
+    """Insert employee profiles for registered users, numbering rows without an employee ID"""
+    claim_employee_ids(db, [row.employee_id for _, row, _ in registered])
+    missing_ids = sum(1 for _, row, _ in registered if not row.employee_id)
+    numbers = iter(employee_id_sequence.reserve(db, missing_ids) if missing_ids else ())
+
+    rows: List[Dict] = []
+    generated = set()
+    for _, row, user_id in registered:
+        coordinates = geocode_location(row.home_location)
+        if not row.employee_id:
+            generated.add(user_id)
+        rows.append({
+            "user_id": user_id,
+            "name": row.name,
+            "employee_id": row.employee_id or format_employee_id(next(numbers)),
+            "phone_number": row.phone_number,
+            "home_location": row.home_location,
+            "home_lat": coordinates["lat"] if coordinates else None,
+            "home_lng": coordinates["lng"] if coordinates else None,
+            "commute_schedule": row.commute_schedule,
+        })
+
+    def renumber(values: Dict) -> bool:
+        # A generated number can clash with one another process assigned by hand
+        if values["user_id"] not in generated:
+            return False
+        values["employee_id"] = format_employee_id(employee_id_sequence.next_value(db))
+        return True
+
+    failed, _ = insert_rows(db, Employee, registered, rows, renumber)
+    return failed
+
+
+def insert_drivers(db: Session, registered: List[Tuple[int, DriverImportRow, int]]) -> List[Tuple[int, int, str]]:
+    """Insert driver profiles for registered users and add them to the search indexes"""
+    rows: List[Dict] = []
+    for _, row, user_id in registered:
+        coordinates = geocode_location(row.service_area)
+        rows.append({
+            "user_id": user_id,
+            "name": row.name,
+            "phone_number": row.phone_number,
+            "dl_number": row.dl_number,
+            "vehicle_plate_number": row.vehicle_plate_number,
+            "service_area": row.service_area,
+            "service_lat": coordinates["lat"] if coordinates else None,
+            "service_lng": coordinates["lng"] if coordinates else None,
+            "is_available": True,
+        })
+    failed, driver_ids = insert_rows(db, Driver, registered, rows)
+
+    for driver_id, row in zip(driver_ids, rows):
+        if driver_id is not None:
+            sync_driver_index(Driver(id=driver_id, **row))
+    return failed
@@ -1,16 +1,86 @@
 from fastapi import HTTPException, status
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from models.driver import Driver
 from shared.schemas.user import DriverCreate, DriverUpdate, DriverResponse, DriverWithUser
 from shared.utils.http_client import ServiceClient
 from shared.config import UserServiceSettings
+from shared.utils.geocoder import geocode_location
+from shared.utils.spatial_index import GridIndex
+from shared.utils.text_index import InvertedIndex, tokenize
+from shared.utils.file_store import ContentAddressedStore
+from shared.utils.availability_registry import AvailabilityRegistry
 from typing import List, Optional
+import heapq
 import os
 
 
 settings = UserServiceSettings()
 auth_client = ServiceClient(settings.AUTH_SERVICE_URL)
 
+# Available drivers keyed by driver id, positioned at their geocoded service area.
+# Kept in sync on every driver write so searches never scan the drivers table.
+available_driver_index = GridIndex()
+# Service-area tokens of available drivers, for text-only matching when a
+# location can't be geocoded
+service_area_index = InvertedIndex()
+# Availability of every driver, sharded by the zone of their service area.
+# Written through on every availability change so reads never hit the database.
+driver_availability = AvailabilityRegistry()
+UNKNOWN_ZONE = "unknown"
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+MAX_IDENTITY_PROOF_BYTES = int(os.getenv("IDENTITY_PROOF_MAX_BYTES", str(10 * 1024 * 1024)))
+identity_proof_store = ContentAddressedStore(os.path.join(UPLOAD_DIR, "identity_proofs"))
+
+
+def zone_for_service_area(service_area: Optional[str]) -> str:
+    """Zone of a service area (from the cached geocoder), or 'unknown'"""
+    coordinates = geocode_location(service_area) if service_area else None
+    return coordinates["zone"] if coordinates else UNKNOWN_ZONE
+
+
+def sync_driver_index(driver: Driver) -> None:
+    """Add, move or remove a driver in the search indexes after a write"""
+    driver_availability.set(driver.id, zone_for_service_area(driver.service_area), bool(driver.is_available))
+    
+    if driver.is_available and driver.service_lat is not None and driver.service_lng is not None:
+        available_driver_index.upsert(driver.id, driver.service_lat, driver.service_lng)
+    else:
+        available_driver_index.remove(driver.id)
+    
+    if driver.is_available and driver.service_area:
+        service_area_index.upsert(driver.id, driver.service_area)
+    else:
+        service_area_index.remove(driver.id)
+
+
+def load_driver_index(db: Session) -> int:
+    """Build the search indexes and availability registry from the database (called once at startup)"""
+    available_driver_index.clear()
+    service_area_index.clear()
+    rows = db.query(
+        Driver.id, Driver.service_area, Driver.service_lat, Driver.service_lng, Driver.is_available
+    ).all()
+    availability = []
+    for driver_id, service_area, lat, lng, is_available in rows:
+        availability.append((driver_id, zone_for_service_area(service_area), bool(is_available)))
+        if not is_available:
+            continue
+        if lat is not None and lng is not None:
+            available_driver_index.upsert(driver_id, lat, lng)
+        if service_area:
+            service_area_index.upsert(driver_id, service_area)
+    driver_availability.load(availability)
+    return len(rows)
+
+
+def geocode_service_area(driver: Driver) -> None:
+    """Store coordinates for the driver's service area (None if it can't be resolved)"""
+    coordinates = geocode_location(driver.service_area)
+    driver.service_lat = coordinates["lat"] if coordinates else None
+    driver.service_lng = coordinates["lng"] if coordinates else None
+
 
 async def create_driver(db: Session, user_id: int, driver_data: DriverCreate) -> DriverResponse:
     """Create driver profile"""
@@ -30,9 +100,11 @@ async def create_driver(db: Session, user_id: int, driver_data: DriverCreate) ->
         vehicle_plate_number=driver_data.vehicle_plate_number,
         service_area=driver_data.service_area
     )
+    geocode_service_area(db_driver)
     db.add(db_driver)
     db.commit()
     db.refresh(db_driver)
+    sync_driver_index(db_driver)
     
     return DriverResponse(
         id=db_driver.id,
@@ -45,6 +117,9 @@ async def create_driver(db: Session, user_id: int, driver_data: DriverCreate) ->
         is_available=db_driver.is_available,
         identity_proof_url=db_driver.identity_proof_url,
         identity_proof_status=db_driver.identity_proof_status,
+        identity_proof_preview_url=db_driver.identity_proof_preview_url,
+        service_lat=db_driver.service_lat,
+        service_lng=db_driver.service_lng,
         created_at=db_driver.created_at,
         updated_at=db_driver.updated_at
     )
@@ -70,6 +145,9 @@ def get_driver_profile(db: Session, user_id: int) -> DriverResponse:
         is_available=driver.is_available,
         identity_proof_url=driver.identity_proof_url,
         identity_proof_status=driver.identity_proof_status,
+        identity_proof_preview_url=driver.identity_proof_preview_url,
+        service_lat=driver.service_lat,
+        service_lng=driver.service_lng,
         created_at=driver.created_at,
         updated_at=driver.updated_at
     )
@@ -85,11 +163,16 @@ def update_driver_profile(db: Session, user_id: int, driver_update: DriverUpdate
         )
     
     # Update fields
-    for field, value in driver_update.dict(exclude_unset=True).items():
+    update_data = driver_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
         setattr(driver, field, value)
     
+    if "service_area" in update_data:
+        geocode_service_area(driver)
+    
     db.commit()
     db.refresh(driver)
+    sync_driver_index(driver)
     
     return DriverResponse(
         id=driver.id,
@@ -102,6 +185,9 @@ def update_driver_profile(db: Session, user_id: int, driver_update: DriverUpdate
         is_available=driver.is_available,
         identity_proof_url=driver.identity_proof_url,
         identity_proof_status=driver.identity_proof_status,
+        identity_proof_preview_url=driver.identity_proof_preview_url,
+        service_lat=driver.service_lat,
+        service_lng=driver.service_lng,
         created_at=driver.created_at,
         updated_at=driver.updated_at
     )
@@ -152,53 +238,89 @@ async def get_all_drivers(db: Session, auth_token: str) -> List[DriverWithUser]:
 
 def update_availability(db: Session, user_id: int, is_available: bool) -> bool:
     """Update driver availability status"""
-    driver = db.query(Driver).filter(Driver.user_id == user_id).first()
-    if not driver:
+    # Single UPDATE ... RETURNING round trip, then write through to the in-memory registry
+    row = db.execute(
+        update(Driver)
+        .where(Driver.user_id == user_id)
+        .values(is_available=is_available)
+        .returning(Driver.id, Driver.service_area, Driver.service_lat, Driver.service_lng)
+    ).first()
+    if not row:
+        db.rollback()
         return False
-    
-    driver.is_available = is_available
     db.commit()
+    
+    sync_driver_index(Driver(
+        id=row.id,
+        service_area=row.service_area,
+        service_lat=row.service_lat,
+        service_lng=row.service_lng,
+        is_available=is_available
+    ))
     return True
 
 
-def search_drivers_by_location(db: Session, employee_location: str) -> List[dict]:
-    """Search for available drivers based on employee location"""
-    available_drivers = db.query(Driver).filter(Driver.is_available == True).all()
+def search_drivers_by_location(db: Session, employee_location: str, limit: int = 10) -> List[dict]:
+    """Search for the nearest available drivers to the employee location"""
+    coordinates = geocode_location(employee_location)
+    if coordinates:
+        nearest = available_driver_index.nearest(coordinates["lat"], coordinates["lng"], k=limit)
+        if nearest:
+            drivers = {
+                driver.id: driver
+                for driver in db.query(Driver).filter(Driver.id.in_([driver_id for driver_id, _ in nearest])).all()
+            }
+            # Score is the distance in km (lower is better match)
+            return [
+                {
+                    "driver_id": driver_id,
+                    "name": drivers[driver_id].name,
+                    "service_area": drivers[driver_id].service_area,
+                    "distance_km": distance_km,
+                    "score": distance_km
+                }
+                for driver_id, distance_km in nearest if driver_id in drivers
+            ]
     
-    scored_drivers = []
-    for driver in available_drivers:
-        if not driver.service_area:
-            continue
-            
-        # Simple scoring based on keyword matching
-        score = calculate_location_score(employee_location.lower(), driver.service_area.lower())
-        
-        scored_drivers.append({
-            "driver_id": driver.id,
-            "name": driver.name,
-            "service_area": driver.service_area,
-            "score": score
-        })
+    # Location couldn't be geocoded: fall back to keyword matching on service areas
+    return search_drivers_by_keywords(db, employee_location, limit)
+
+
+def search_drivers_by_keywords(db: Session, employee_location: str, limit: int = 10) -> List[dict]:
+    """Search for available drivers whose service area shares keywords with the employee location"""
+    employee_token_count = len(tokenize(employee_location))
+    matches = service_area_index.match(employee_location)
+    if not matches:
+        return []
+    
+    scored = heapq.nsmallest(limit, (
+        (calculate_location_score(match_count, employee_token_count, service_area_index.token_count(driver_id)), driver_id)
+        for driver_id, match_count in matches.items()
+    ))
+    drivers = {
+        driver.id: driver
+        for driver in db.query(Driver).filter(Driver.id.in_([driver_id for _, driver_id in scored])).all()
+    }
     
     # Sort by score (lower is better match)
-    scored_drivers.sort(key=lambda x: x["score"])
-    return scored_drivers
+    return [
+        {
+            "driver_id": driver_id,
+            "name": drivers[driver_id].name,
+            "service_area": drivers[driver_id].service_area,
+            "score": score
+        }
+        for score, driver_id in scored if driver_id in drivers
+    ]
 
 
-def calculate_location_score(employee_location: str, driver_service_area: str) -> float:
-    """Calculate location match score"""
-    employee_keywords = set(employee_location.split())
-    driver_keywords = set(driver_service_area.split())
-    
-    if not employee_keywords or not driver_keywords:
+def calculate_location_score(matches: int, employee_token_count: int, driver_token_count: int) -> float:
+    """Calculate location match score from keyword overlap counts"""
+    if matches == 0 or not employee_token_count or not driver_token_count:
         return float('inf')
     
-    # Count matching keywords
-    matches = len(employee_keywords.intersection(driver_keywords))
-    total_keywords = len(employee_keywords.union(driver_keywords))
-    
-    if matches == 0:
-        return float('inf')
+    # Jaccard distance: |union| = |employee| + |driver| - |intersection|
+    total_keywords = employee_token_count + driver_token_count - matches
     
     # Score: lower is better
     return 1.0 - (matches / total_keywords)
@@ -223,5 +345,6 @@ def upload_identity_proof(db: Session, user_id: int, file_url: str) -> bool:
     
     driver.identity_proof_url = file_url
     driver.identity_proof_status = "pending"
+    driver.identity_proof_preview_url = None
     db.commit()
     return True
\ No newline at end of file
@@ -1,15 +1,64 @@
 from fastapi import HTTPException, status
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from models.employee import Employee
+from api.sequence import BlockSequence
 from shared.schemas.user import EmployeeCreate, EmployeeUpdate, EmployeeResponse, EmployeeWithUser
 from shared.utils.http_client import ServiceClient
 from shared.config import UserServiceSettings
-from typing import List
+from shared.utils.geocoder import geocode_location
+from typing import List, Optional
 
 
 settings = UserServiceSettings()
 auth_client = ServiceClient(settings.AUTH_SERVICE_URL)
 
+MAX_SEARCH_RESULTS = 50
+MAX_BATCH_LOOKUP = 1000
+MAX_SCHEDULE_PAGE = 5000
+EMPLOYEE_ID_PREFIX = "EMP"
+
+
+def seed_employee_id_sequence(conn) -> int:
+    """First free EMP number, computed once when the counter row is created"""
+    rows = conn.execute(
+        text("SELECT employee_id FROM employees WHERE employee_id LIKE :prefix"),
+        {"prefix": f"{EMPLOYEE_ID_PREFIX}%"}
+    ).fetchall()
+    numbers = [int(row[0][len(EMPLOYEE_ID_PREFIX):]) for row in rows
+               if row[0][len(EMPLOYEE_ID_PREFIX):].isdigit()]
+    return max(numbers, default=0) + 1
+
+
+employee_id_sequence = BlockSequence("employee_id", block_size=50, seed=seed_employee_id_sequence)
+
+
+def format_employee_id(number: int) -> str:
+    """Format a sequence number as an employee ID (EMP001 ... EMP999, EMP1000 ...)"""
+    return f"{EMPLOYEE_ID_PREFIX}{number:03d}"
+
+
+def employee_id_number(employee_id: Optional[str]) -> Optional[int]:
+    """Sequence number of an EMP-style ID, or None for any other format"""
+    if employee_id and employee_id.startswith(EMPLOYEE_ID_PREFIX) and employee_id[len(EMPLOYEE_ID_PREFIX):].isdigit():
+        return int(employee_id[len(EMPLOYEE_ID_PREFIX):])
+    return None
+
+
+def claim_employee_ids(db: Session, employee_ids) -> None:
+    """Keep the generator from handing out EMP numbers that were assigned by hand"""
+    numbers = [number for number in map(employee_id_number, employee_ids) if number is not None]
+    if numbers:
+        employee_id_sequence.advance_past(db, max(numbers))
+
+
+def geocode_home_location(employee: Employee) -> None:
+    """Store coordinates for the employee's home location (None if it can't be resolved)"""
+    coordinates = geocode_location(employee.home_location)
+    employee.home_lat = coordinates["lat"] if coordinates else None
+    employee.home_lng = coordinates["lng"] if coordinates else None
+
 
 async def create_employee(db: Session, user_id: int, employee_data: EmployeeCreate) -> EmployeeResponse:
     """Create employee profile"""
@@ -21,29 +70,31 @@ async def create_employee(db: Session, user_id: int, employee_data: EmployeeCrea
             detail="Employee profile already exists"
         )
 
-    # Auto-generate employee_id if not provided
-    if not employee_data.employee_id:
-        # Get the highest current employee_id in the format EMP###
-        last_employee = db.query(Employee).filter(Employee.employee_id.like("EMP%")) \
-            .order_by(Employee.employee_id.desc()).first()
-        if last_employee and last_employee.employee_id[3:].isdigit():
-            next_num = int(last_employee.employee_id[3:]) + 1
-        else:
-            next_num = 1
-        new_employee_id = f"EMP{next_num:03d}"
-    else:
-        new_employee_id = employee_data.employee_id
+    if employee_data.employee_id:
+        claim_employee_ids(db, [employee_data.employee_id])
 
     db_employee = Employee(
         user_id=user_id,
         name=employee_data.name,
-        employee_id=new_employee_id,
         phone_number=employee_data.phone_number,
         home_location=employee_data.home_location,
         commute_schedule=employee_data.commute_schedule
     )
-    db.add(db_employee)
-    db.commit()
+    geocode_home_location(db_employee)
+    # A generated ID can still clash with one assigned by hand from another process's block
+    for attempt in range(3):
+        db_employee.employee_id = employee_data.employee_id or format_employee_id(employee_id_sequence.next_value(db))
+        db.add(db_employee)
+        try:
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if employee_data.employee_id or attempt == 2:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Employee ID already exists"
+                )
     db.refresh(db_employee)
     
     return EmployeeResponse(
@@ -53,6 +104,8 @@ async def create_employee(db: Session, user_id: int, employee_data: EmployeeCrea
         employee_id=db_employee.employee_id,
         phone_number=db_employee.phone_number,
         home_location=db_employee.home_location,
+        home_lat=db_employee.home_lat,
+        home_lng=db_employee.home_lng,
         commute_schedule=db_employee.commute_schedule,
         created_at=db_employee.created_at,
         updated_at=db_employee.updated_at
@@ -75,6 +128,8 @@ def get_employee_profile(db: Session, user_id: int) -> EmployeeResponse:
         employee_id=employee.employee_id,
         phone_number=employee.phone_number,
         home_location=employee.home_location,
+        home_lat=employee.home_lat,
+        home_lng=employee.home_lng,
         commute_schedule=employee.commute_schedule,
         created_at=employee.created_at,
         updated_at=employee.updated_at
@@ -91,10 +146,23 @@ def update_employee_profile(db: Session, user_id: int, employee_update: Employee
         )
     
     # Update fields
-    for field, value in employee_update.dict(exclude_unset=True).items():
+    update_data = employee_update.dict(exclude_unset=True)
+    if update_data.get("employee_id"):
+        claim_employee_ids(db, [update_data["employee_id"]])
+    for field, value in update_data.items():
         setattr(employee, field, value)
     
-    db.commit()
+    if "home_location" in update_data:
+        geocode_home_location(employee)
+    
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Employee ID already exists"
+        )
     db.refresh(employee)
     
     return EmployeeResponse(
@@ -104,6 +172,8 @@ def update_employee_profile(db: Session, user_id: int, employee_update: Employee
         employee_id=employee.employee_id,
         phone_number=employee.phone_number,
         home_location=employee.home_location,
+        home_lat=employee.home_lat,
+        home_lng=employee.home_lng,
         commute_schedule=employee.commute_schedule,
         created_at=employee.created_at,
         updated_at=employee.updated_at
@@ -169,7 +239,135 @@ def get_employee_by_id(db: Session, employee_id: int) -> EmployeeResponse:
         employee_id=employee.employee_id,
         phone_number=employee.phone_number,
         home_location=employee.home_location,
+        home_lat=employee.home_lat,
+        home_lng=employee.home_lng,
+        commute_schedule=employee.commute_schedule,
+        created_at=employee.created_at,
+        updated_at=employee.updated_at
+    )
+
+
+def get_employee_by_employee_id(db: Session, employee_id: str) -> EmployeeResponse:
+    """Get employee by employee ID (e.g. EMP001)"""
+    employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
+    if not employee:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Employee not found"
+        )
+    
+    return EmployeeResponse(
+        id=employee.id,
+        user_id=employee.user_id,
+        name=employee.name,
+        employee_id=employee.employee_id,
+        phone_number=employee.phone_number,
+        home_location=employee.home_location,
+        home_lat=employee.home_lat,
+        home_lng=employee.home_lng,
+        commute_schedule=employee.commute_schedule,
+        created_at=employee.created_at,
+        updated_at=employee.updated_at
+    )
+
+
+def search_employees(db: Session, query: str, limit: int = 10) -> List[EmployeeResponse]:
+    """Search employees by name or employee ID (prefix and substring matches)"""
+    from database import employee_search_backend
+    
+    term = query.strip().lower()
+    if not term:
+        return []
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+    
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    name = func.lower(Employee.name)
+    code = func.lower(Employee.employee_id)
+    
+    search = db.query(Employee)
+    if employee_search_backend == "fts5" and len(term) >= 3:
+        # Trigram FTS matches substrings of 3+ characters in either column
+        phrase = '"' + term.replace('"', '""') + '"'
+        search = search.filter(Employee.id.in_(
+            text("SELECT rowid FROM employees_fts WHERE employees_fts MATCH :phrase").bindparams(phrase=phrase)
+        ))
+    else:
+        # LIKE '%term%' on lower(...) is served by the pg_trgm GIN indexes on Postgres
+        search = search.filter(or_(
+            name.like(f"%{escaped}%", escape="\\"),
+            code.like(f"%{escaped}%", escape="\\")
+        ))
+    
+    # Exact ID, then ID prefix, then name prefix, then word prefix, then substring
+    rank = case(
+        (code == term, 0),
+        (code.like(f"{escaped}%", escape="\\"), 1),
+        (name.like(f"{escaped}%", escape="\\"), 2),
+        (name.like(f"% {escaped}%", escape="\\"), 3),
+        else_=4
+    )
+    order_by = [rank]
+    if employee_search_backend == "pg_trgm":
+        order_by.append(func.similarity(name, term).desc())
+    order_by.extend([func.length(Employee.name), Employee.name])
+    
+    employees = search.order_by(*order_by).limit(limit).all()
+    
+    return [EmployeeResponse(
+        id=employee.id,
+        user_id=employee.user_id,
+        name=employee.name,
+        employee_id=employee.employee_id,
+        phone_number=employee.phone_number,
+        home_location=employee.home_location,
+        home_lat=employee.home_lat,
+        home_lng=employee.home_lng,
         commute_schedule=employee.commute_schedule,
         created_at=employee.created_at,
         updated_at=employee.updated_at
-    )
\ No newline at end of file
+    ) for employee in employees]
+
+
+def get_employees_by_user_ids(db: Session, user_ids: List[int]) -> List[EmployeeResponse]:
+    """Get employee profiles for a batch of auth user IDs (unknown IDs are skipped)"""
+    if not user_ids:
+        return []
+    if len(user_ids) > MAX_BATCH_LOOKUP:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_LOOKUP} user IDs per request"
+        )
+    
+    employees = db.query(Employee).filter(Employee.user_id.in_(set(user_ids))).all()
+    
+    return [EmployeeResponse(
+        id=employee.id,
+        user_id=employee.user_id,
+        name=employee.name,
+        employee_id=employee.employee_id,
+        phone_number=employee.phone_number,
+        home_location=employee.home_location,
+        home_lat=employee.home_lat,
+        home_lng=employee.home_lng,
+        commute_schedule=employee.commute_schedule,
+        created_at=employee.created_at,
+        updated_at=employee.updated_at
+    ) for employee in employees]
+
+
+def get_commute_schedules(db: Session, after_id: int = 0, limit: int = 1000) -> List[dict]:
+    """Page through employee commute schedules by internal ID (keyset pagination)"""
+    limit = max(1, min(limit, MAX_SCHEDULE_PAGE))
+    rows = db.query(
+        Employee.id, Employee.user_id, Employee.home_location, Employee.commute_schedule
+    ).filter(Employee.id > after_id).order_by(Employee.id).limit(limit).all()
+    
+    return [
+        {
+            "id": employee_id,
+            "user_id": user_id,
+            "home_location": home_location,
+            "commute_schedule": commute_schedule
+        }
+        for employee_id, user_id, home_location, commute_schedule in rows
+    ]
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+import os
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.driver import Driver
+from models.upload_job import UploadJob
+from shared.utils.document_preview import extract_metadata, render_preview
+from typing import List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "2"))
+UPLOAD_JOB_MAX_ATTEMPTS = 3
+
+
+def preview_path_for(source_path: str, sha256: str) -> str:
+    """Previews live next to the originals: <store root>/previews/<aa>/<sha256>.jpg"""
+    store_root = os.path.dirname(os.path.dirname(source_path))
+    return os.path.join(store_root, "previews", sha256[:2], f"{sha256}.jpg")
+
+
+class UploadJobQueue:
+    """In-process background queue for upload preprocessing
+
+    Jobs are persisted in the upload_jobs table before they are queued, so
+    anything still pending or running when the service stops is picked up
+    again on the next start. A small pool of asyncio workers pulls job ids and
+    runs the CPU-heavy rendering in threads, keeping upload requests fast.
+    """
+
+    def __init__(self, session_factory, workers: int = UPLOAD_JOB_WORKERS):
+        self._session_factory = session_factory
+        self._workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the workers and re-queue unfinished jobs from the table"""
+        self._queue = asyncio.Queue()
+        db = self._session_factory()
+        try:
+            unfinished = db.query(UploadJob.id).filter(
+                UploadJob.status.in_(["pending", "running"])
+            ).order_by(UploadJob.id).all()
+        finally:
+            db.close()
+        for (job_id,) in unfinished:
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._workers)]
+        if unfinished:
+            logger.info(f"Resumed {len(unfinished)} unfinished upload jobs")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, db: Session, source_path: str, sha256: str) -> UploadJob:
+        """Record a preprocessing job for a stored upload and queue it
+
+        Content that was already processed (or is queued) reuses the earlier job.
+        """
+        existing = db.query(UploadJob).filter(
+            UploadJob.sha256 == sha256, UploadJob.status != "failed"
+        ).order_by(UploadJob.id.desc()).first()
+        if existing:
+            if existing.status == "done":
+                attach_preview(db, existing.source_path, existing.preview_path)
+                db.commit()
+            return existing
+
+        job = UploadJob(source_path=source_path, sha256=sha256, status="pending", attempts=0)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        if self._queue is not None:
+            self._queue.put_nowait(job.id)
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception(f"Upload job {job_id} crashed")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: int) -> None:
+        db = self._session_factory()
+        try:
+            job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
+            if not job or job.status == "done":
+                return
+            job.status = "running"
+            job.attempts = (job.attempts or 0) + 1
+            db.commit()
+
+            try:
+                metadata, preview_path = await asyncio.to_thread(
+                    process_upload, job.source_path, preview_path_for(job.source_path, job.sha256)
+                )
+            except Exception as e:
+                job.error = str(e)
+                if job.attempts < UPLOAD_JOB_MAX_ATTEMPTS:
+                    job.status = "pending"
+                    db.commit()
+                    self._queue.put_nowait(job.id)
+                else:
+                    job.status = "failed"
+                    db.commit()
+                    logger.warning(f"Upload job {job.id} failed: {e}")
+                return
+
+            job.status = "done"
+            job.error = None
+            job.preview_path = preview_path
+            job.file_metadata = json.dumps(metadata)
+            attach_preview(db, job.source_path, preview_path)
+            db.commit()
+        finally:
+            db.close()
+
+
+def process_upload(source_path: str, preview_path: str) -> tuple:
+    """Extract metadata and render a preview thumbnail (runs in a worker thread)"""
+    metadata = extract_metadata(source_path)
+    return metadata, render_preview(source_path, preview_path)
+
+
+def attach_preview(db: Session, source_path: str, preview_path: Optional[str]) -> None:
+    """Point every driver whose identity proof is this file at its preview"""
+    if preview_path is None:
+        return
+    db.query(Driver).filter(Driver.identity_proof_url == source_path).update(
+        {Driver.identity_proof_preview_url: preview_path}, synchronize_session=False
+    )
+
+
+upload_job_queue = UploadJobQueue(SessionLocal)
@@ -4,12 +4,15 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import logging
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from shared.config import UserServiceSettings
 from shared.database.base import create_database_engine, create_session_factory, Base
 
 
 settings = UserServiceSettings()
+logger = logging.getLogger(__name__)
 
 
 engine = create_database_engine(settings.DATABASE_URL, echo=settings.DEBUG)
@@ -23,5 +26,58 @@ def get_database_session():
     finally:
         db.close()
 
+def create_search_indexes(engine) -> str:
+    """Create substring-search indexes for employees; returns the backend in use"""
+    try:
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_employees_name_trgm "
+                    "ON employees USING gin (lower(name) gin_trgm_ops)"
+                ))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_employees_employee_id_trgm "
+                    "ON employees USING gin (lower(employee_id) gin_trgm_ops)"
+                ))
+            return "pg_trgm"
+        
+        if engine.dialect.name == "sqlite":
+            with engine.begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employees_fts'"
+                )).first()
+                conn.execute(text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5("
+                    "name, employee_id, content='employees', content_rowid='id', tokenize='trigram')"
+                ))
+                conn.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS employees_fts_ai AFTER INSERT ON employees BEGIN "
+                    "INSERT INTO employees_fts(rowid, name, employee_id) VALUES (new.id, new.name, new.employee_id); "
+                    "END"
+                ))
+                conn.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS employees_fts_ad AFTER DELETE ON employees BEGIN "
+                    "INSERT INTO employees_fts(employees_fts, rowid, name, employee_id) "
+                    "VALUES ('delete', old.id, old.name, old.employee_id); "
+                    "END"
+                ))
+                conn.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS employees_fts_au AFTER UPDATE ON employees BEGIN "
+                    "INSERT INTO employees_fts(employees_fts, rowid, name, employee_id) "
+                    "VALUES ('delete', old.id, old.name, old.employee_id); "
+                    "INSERT INTO employees_fts(rowid, name, employee_id) VALUES (new.id, new.name, new.employee_id); "
+                    "END"
+                ))
+                if not exists:
+                    conn.execute(text("INSERT INTO employees_fts(employees_fts) VALUES ('rebuild')"))
+            return "fts5"
+    except Exception as e:
+        logger.warning(f"Employee search index unavailable, falling back to LIKE scans: {e}")
+    
+    return "like"
+
+
 # Create all tables
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+Base.metadata.create_all(bind=engine)
+employee_search_backend = create_search_indexes(engine)
\ No newline at end of file
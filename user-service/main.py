@@ -10,7 +10,11 @@ from models.driver import Driver
 from models.employee import Employee
 from models.vehicle import Vehicle
 from models.admin import Admin
-from database import engine, Base
+from models.id_counter import IdCounter
+from models.upload_job import UploadJob
+from database import engine, Base, SessionLocal
+from api.driver import load_driver_index
+from api.upload_jobs import upload_job_queue
 import uvicorn
 
 # Initialize settings
@@ -38,6 +42,24 @@ app.add_middleware(
 # Include routers
 app.include_router(user_router, prefix="/users", tags=["Users"])
 
+@app.on_event("startup")
+async def load_in_memory_indexes():
+    """Build in-memory driver indexes from the database"""
+    db = SessionLocal()
+    try:
+        load_driver_index(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def start_upload_job_queue():
+    """Start background upload preprocessing workers"""
+    await upload_job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_upload_job_queue():
+    await upload_job_queue.stop()
+
 @app.get("/")
 async def root():
     return {"service": "User Service", "status": "running", "version": "1.0.0"}
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from shared.config import UserServiceSettings
+from shared.utils.geocoder import geocode_location
+
+def add_location_columns(conn):
+    """Add geocoded coordinate and identity proof preview columns"""
+    add_columns_sql = [
+        "ALTER TABLE employees ADD COLUMN IF NOT EXISTS home_lat DOUBLE PRECISION;",
+        "ALTER TABLE employees ADD COLUMN IF NOT EXISTS home_lng DOUBLE PRECISION;",
+        "ALTER TABLE drivers ADD COLUMN IF NOT EXISTS service_lat DOUBLE PRECISION;",
+        "ALTER TABLE drivers ADD COLUMN IF NOT EXISTS service_lng DOUBLE PRECISION;",
+        "ALTER TABLE drivers ADD COLUMN IF NOT EXISTS identity_proof_preview_url VARCHAR;"
+    ]
+    for sql in add_columns_sql:
+        conn.execute(text(sql))
+        print(f"✅ Executed: {sql}")
+
+def backfill_coordinates(conn):
+    """Geocode existing profiles that don't have coordinates yet"""
+    employees = conn.execute(text(
+        "SELECT id, home_location FROM employees WHERE home_lat IS NULL"
+    )).fetchall()
+    resolved = 0
+    for employee_id, home_location in employees:
+        coordinates = geocode_location(home_location)
+        if coordinates:
+            conn.execute(
+                text("UPDATE employees SET home_lat = :lat, home_lng = :lng WHERE id = :id"),
+                {"lat": coordinates["lat"], "lng": coordinates["lng"], "id": employee_id}
+            )
+            resolved += 1
+    print(f"📍 Geocoded {resolved}/{len(employees)} employee home locations")
+
+    drivers = conn.execute(text(
+        "SELECT id, service_area FROM drivers WHERE service_lat IS NULL AND service_area IS NOT NULL"
+    )).fetchall()
+    resolved = 0
+    for driver_id, service_area in drivers:
+        coordinates = geocode_location(service_area)
+        if coordinates:
+            conn.execute(
+                text("UPDATE drivers SET service_lat = :lat, service_lng = :lng WHERE id = :id"),
+                {"lat": coordinates["lat"], "lng": coordinates["lng"], "id": driver_id}
+            )
+            resolved += 1
+    print(f"📍 Geocoded {resolved}/{len(drivers)} driver service areas")
+
+def migrate():
+    """Apply schema changes for the user service"""
+    settings = UserServiceSettings()
+
+    print(f"🔧 Connecting to database: {settings.DATABASE_URL[:50]}...")
+    engine = create_engine(settings.DATABASE_URL)
+
+    try:
+        with engine.begin() as conn:
+            add_location_columns(conn)
+            backfill_coordinates(conn)
+    except Exception as e:
+        print(f"❌ Error during migration: {e}")
+        return False
+
+    return True
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("🚀 User Service Database Migration")
+    print("=" * 60)
+
+    success = migrate()
+
+    if success:
+        print("\n✅ Migration completed successfully!")
+    else:
+        print("\n❌ Migration failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
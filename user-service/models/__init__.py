@@ -2,4 +2,6 @@
 from .driver import Driver
 from .employee import Employee
 from .vehicle import Vehicle
-from .admin import Admin
\ No newline at end of file
+from .admin import Admin
+from .id_counter import IdCounter
+from .upload_job import UploadJob
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float
 from sqlalchemy.sql import func
 from shared.database.base import Base
 
@@ -15,7 +15,10 @@ class Driver(Base):
     is_available = Column(Boolean, default=True)
     identity_proof_url = Column(String, nullable=True)
     identity_proof_status = Column(String, default="pending")
+    identity_proof_preview_url = Column(String, nullable=True)  # Thumbnail made by the upload job queue
     service_area = Column(String, nullable=True)
+    service_lat = Column(Float, nullable=True)  # Geocoded from service_area on profile write
+    service_lng = Column(Float, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Float
 from sqlalchemy.sql import func
 from shared.database.base import Base
 
@@ -12,6 +12,8 @@ class Employee(Base):
     employee_id = Column(String, unique=True, nullable=False)
     phone_number = Column(String, nullable=False)
     home_location = Column(String, nullable=False)
+    home_lat = Column(Float, nullable=True)  # Geocoded from home_location on profile write
+    home_lng = Column(Float, nullable=True)
     commute_schedule = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, BigInteger
+from shared.database.base import Base
+
+
+class IdCounter(Base):
+    __tablename__ = "id_counters"
+
+    name = Column(String, primary_key=True)  # e.g. "employee_id"
+    next_value = Column(BigInteger, nullable=False)  # First value not yet handed out
+
+    def __repr__(self):
+        return f"<IdCounter(name='{self.name}', next_value={self.next_value})>"
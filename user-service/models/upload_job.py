@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from shared.database.base import Base
+
+
+class UploadJob(Base):
+    __tablename__ = "upload_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_path = Column(String, nullable=False)  # Stored upload the job works on
+    sha256 = Column(String, nullable=False, index=True)
+    status = Column(String, default="pending", index=True)  # pending, running, done, failed
+    attempts = Column(Integer, default=0)
+    preview_path = Column(String, nullable=True)
+    file_metadata = Column(Text, nullable=True)  # JSON: size, type, dimensions, page count
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UploadJob(id={self.id}, sha256='{self.sha256[:12]}', status='{self.status}')>"
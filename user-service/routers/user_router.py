@@ -4,23 +4,27 @@ from sqlalchemy.orm import Session
 from api.driver import (
     get_driver_profile, update_driver_profile, get_all_drivers,
     update_availability, search_drivers_by_location, verify_driver_identity,
-    upload_identity_proof, create_driver
+    upload_identity_proof, create_driver, identity_proof_store,
+    MAX_IDENTITY_PROOF_BYTES, driver_availability
 )
 from api.employee import (
     get_employee_profile, update_employee_profile,
-    get_employee_by_id, create_employee
+    get_employee_by_id, create_employee, search_employees,
+    get_employee_by_employee_id, get_employees_by_user_ids, get_commute_schedules
 )
 from api.admin import (
     create_admin, get_admin_profile, update_admin_profile,
     get_all_drivers, get_all_employees, assign_driver_to_employee,
     get_all_trips, toggle_user_status, get_admin_dashboard
 )
+from api.bulk_import import import_profiles
+from api.upload_jobs import upload_job_queue
 from shared.schemas.user import (
     DriverResponse, DriverUpdate, DriverWithUser, EmployeeResponse, 
     EmployeeUpdate, EmployeeWithUser, LocationBasedDriverSearch,
     IdentityVerificationUpdate, DriverCreate, EmployeeCreate,
     AdminResponse, AdminUpdate, AdminWithUser, AdminCreate,
-    UserStatusUpdate, SystemStatistics
+    UserStatusUpdate, SystemStatistics, EmployeeBatchLookup
 )
 from typing import List, Optional
 import os
@@ -114,7 +118,7 @@ async def search_drivers_by_location_endpoint(
     """Search drivers by location (admin only)"""
     if user_context["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
-    return search_drivers_by_location(db, search_request.employee_location)
+    return search_drivers_by_location(db, search_request.employee_location, search_request.limit)
 
 
 @router.put("/drivers/{driver_id}/verify-identity")
@@ -141,29 +145,24 @@ async def upload_identity_proof_endpoint(
     db: Session = Depends(get_db)
 ):
     """Upload identity proof document"""
-    # Validate file type
-    allowed_types = ["application/pdf", "image/jpeg", "image/png", "image/jpg"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=400, 
-            detail="Invalid file type. Only PDF, JPG, PNG allowed."
-        )
-    
-    # Save file
-    upload_dir = "uploads/identity_proofs"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    file_path = f"{upload_dir}/{user_context['user_id']}_{file.filename}"
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Stream to content-addressed storage (validates type and size while reading)
+    stored = await identity_proof_store.save_upload(file, MAX_IDENTITY_PROOF_BYTES)
     
     # Update driver record
-    success = upload_identity_proof(db, user_context["user_id"], file_path)
+    success = upload_identity_proof(db, user_context["user_id"], stored.path)
     if not success:
         raise HTTPException(status_code=404, detail="Driver not found")
     
-    return {"message": "Identity proof uploaded successfully", "file_path": file_path}
+    # Thumbnail and metadata are produced in the background
+    upload_job_queue.enqueue(db, stored.path, stored.sha256)
+    
+    return {
+        "message": "Identity proof uploaded successfully",
+        "file_path": stored.path,
+        "sha256": stored.sha256,
+        "size": stored.size,
+        "deduplicated": stored.deduplicated
+    }
 
 
 # Employee endpoints
@@ -207,6 +206,58 @@ async def list_all_employees(
     return await get_all_employees(db)
 
 
+@router.get("/employees/search", response_model=List[EmployeeResponse])
+async def search_employees_endpoint(
+    q: str,
+    limit: int = 10,
+    user_context: dict = Depends(get_user_context),
+    db: Session = Depends(get_db)
+):
+    """Search employees by name or employee ID (ranked, limited; admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return search_employees(db, q, limit)
+
+
+@router.get("/employees/by-employee-id/{employee_id}", response_model=EmployeeResponse)
+async def get_employee_by_employee_id_endpoint(
+    employee_id: str,
+    user_context: dict = Depends(get_user_context),
+    db: Session = Depends(get_db)
+):
+    """Get employee by employee ID, e.g. EMP001 (admin or the employee themselves)"""
+    if user_context["role"] not in ("admin", "employee"):
+        raise HTTPException(status_code=403, detail="You can only view your own profile")
+    employee = get_employee_by_employee_id(db, employee_id)
+    if user_context["role"] != "admin" and employee.user_id != user_context["user_id"]:
+        raise HTTPException(status_code=403, detail="You can only view your own profile")
+    return employee
+
+
+@router.get("/employees/by-user/{user_id}", response_model=EmployeeResponse)
+async def get_employee_by_user_id_endpoint(
+    user_id: int,
+    user_context: dict = Depends(get_user_context),
+    db: Session = Depends(get_db)
+):
+    """Get employee profile by auth user ID (admin or the employee themselves)"""
+    if user_context["role"] != "admin" and user_context["user_id"] != user_id:
+        raise HTTPException(status_code=403, detail="You can only view your own profile")
+    return get_employee_profile(db, user_id)
+
+
+@router.post("/employees/by-user", response_model=List[EmployeeResponse])
+async def get_employees_by_user_ids_endpoint(
+    lookup: EmployeeBatchLookup,
+    user_context: dict = Depends(get_user_context),
+    db: Session = Depends(get_db)
+):
+    """Get employee profiles for a batch of auth user IDs (admin only)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return get_employees_by_user_ids(db, lookup.user_ids)
+
+
 @router.get("/employees/{employee_id}", response_model=EmployeeResponse)
 async def get_employee_by_id_endpoint(
     employee_id: int,
@@ -264,6 +315,41 @@ async def admin_list_all_drivers(
     return await get_all_drivers(db)
 
 
+@router.get("/admin/commute-schedules", response_model=List[dict])
+async def admin_list_commute_schedules(
+    after_id: int = 0,
+    limit: int = 1000,
+    user_context: dict = Depends(get_user_context),
+    db: Session = Depends(get_db)
+):
+    """Admin: Employee commute schedules, paged by employee ID (used by trip scheduling)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return get_commute_schedules(db, after_id, limit)
+
+
+@router.get("/admin/drivers/availability")
+async def admin_driver_availability_snapshot(
+    user_context: dict = Depends(get_user_context)
+):
+    """Admin: Current availability of every driver by zone, with a cursor for the change feed"""
+    if user_context["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return {**driver_availability.snapshot(), "counts": driver_availability.counts()}
+
+
+@router.get("/admin/drivers/availability/changes")
+async def admin_driver_availability_changes(
+    since: int = 0,
+    limit: int = 1000,
+    user_context: dict = Depends(get_user_context)
+):
+    """Admin: Availability changes after a cursor (reset=true means re-read the snapshot)"""
+    if user_context["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return driver_availability.changes_since(since, max(1, min(limit, 1000)))
+
+
 @router.get("/admin/employees", response_model=List[dict])
 async def admin_list_all_employees(
     user_context: dict = Depends(get_user_context),
@@ -313,6 +399,20 @@ async def admin_toggle_user_status(
     return await toggle_user_status(db, user_id, user_type, new_status)
 
 
+@router.post("/admin/import/{import_type}")
+async def admin_bulk_import(
+    import_type: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    user_context: dict = Depends(get_user_context),
+    db: Session = Depends(get_db)
+):
+    """Admin: Bulk-import employees or drivers from a CSV or JSONL upload"""
+    if user_context["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await import_profiles(db, import_type, file, format)
+
+
 @router.get("/admin/dashboard")
 async def admin_get_dashboard(
     user_context: dict = Depends(get_user_context),
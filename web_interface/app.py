@@ -4,7 +4,7 @@ Interactive Web Interface for WNS Bangalore Transport Management
 Enhanced with real-time tracking, zone visualization, and client presentation features
 """
 
-from fastapi import FastAPI, Request, Depends, HTTPException
+from fastapi import FastAPI, Request, Depends, Header, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, JSONResponse
@@ -14,12 +14,15 @@ import httpx
 import json
 from datetime import datetime, timedelta
 import asyncio
+import hmac
 
 # Import our enhanced features
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from enhanced_features import BangaloreTransportEnhancer, RealTimeTracker, get_dashboard_data, BANGALORE_ZONES, WNS_OFFICE
+from shared.utils.event_bus import IdempotencyFilter
+from shared.utils.fanout_hub import FanoutHub
 
 # Get service URLs from environment or default to service names
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8001")
@@ -27,6 +30,8 @@ API_GATEWAY_URL = os.getenv("API_GATEWAY_URL", "http://api-gateway:8000")
 USER_SERVICE_URL = os.getenv("USER_SERVICE_URL", "http://user-service:8002")
 TRIP_SERVICE_URL = os.getenv("TRIP_SERVICE_URL", "http://trip-service:8003")
 NOTIFICATION_SERVICE_URL = os.getenv("NOTIFICATION_SERVICE_URL", "http://notification-service:8004")
+# Shared with the backend services; trip-service sends it as X-Service-Key when relaying events
+SERVICE_API_KEY = os.getenv("SERVICE_API_KEY", "your-service-key-here-change-in-production")
 
 app = FastAPI(title="WNS Bangalore Transport Management", version="2.0.0")
 
@@ -37,6 +42,36 @@ templates = Jinja2Templates(directory="templates")
 # Initialize enhanced features
 enhancer = BangaloreTransportEnhancer()
 tracker = RealTimeTracker()
+# Trip events are delivered at least once; remember which ones were applied
+applied_trip_events = IdempotencyFilter()
+
+async def fetch_trip_position(trip_id: int) -> Optional[Dict]:
+    """Latest GPS fix reported by the trip's driver, if any"""
+    async with httpx.AsyncClient() as client:
+        response = await client.get(
+            f"{TRIP_SERVICE_URL}/api/locations/trips/{trip_id}/latest",
+            headers={"x-user-id": "1", "x-user-role": "admin"},
+            timeout=2
+        )
+    return response.json() if response.status_code == 200 else None
+
+async def produce_tracking_update(trip_id: int) -> str:
+    """Refresh a trip's live position once and encode it for every watcher"""
+    if trip_id in tracker.active_trips:
+        try:
+            position = await fetch_trip_position(trip_id)
+            if position:
+                tracker.update_position(trip_id, position)
+        except httpx.HTTPError:
+            pass
+    return json.dumps(await tracker.get_live_updates(trip_id))
+
+# One producer per watched trip, fanned out to all of its sockets
+tracking_hub = FanoutHub(
+    produce_tracking_update,
+    interval=float(os.getenv("TRACKING_UPDATE_INTERVAL_SECONDS", "5")),
+    queue_size=int(os.getenv("TRACKING_SOCKET_QUEUE_SIZE", "16"))
+)
 
 # Pydantic models
 class TripRequest(BaseModel):
@@ -93,35 +128,26 @@ async def login_api(login_data: LoginRequest):
                 auth_data = response.json()
                 
                 # If user is an employee, fetch employee details from user service
-                if auth_data.get("user", {}).get("role") == "employee":
+                user = auth_data.get("user", {})
+                if user.get("role") == "employee":
                     try:
-                        # Search for employee by email in user service
+                        # Single indexed lookup on employees.user_id
                         emp_response = await client.get(
-                            f"{USER_SERVICE_URL}/users/employees",
+                            f"{USER_SERVICE_URL}/users/employees/by-user/{user['id']}",
+                            headers={
+                                "x-user-id": str(user["id"]),
+                                "x-user-role": user["role"],
+                                "x-user-email": user.get("email", "")
+                            },
                             timeout=5.0
                         )
                         if emp_response.status_code == 200:
-                            employees_data = emp_response.json()
-                            
-                            # Find employee by email (we need to get user info first)
-                            user_response = await client.get(
-                                f"{AUTH_SERVICE_URL}/auth/users/{auth_data['user']['id']}",
-                                timeout=5.0
-                            )
-                            if user_response.status_code == 200:
-                                user_info = user_response.json()
-                                user_email = user_info.get("email")
-                                
-                                # Find matching employee
-                                for emp in employees_data:
-                                    # We need to match by user_id since employee table has user_id
-                                    if emp.get("user_id") == auth_data["user"]["id"]:
-                                        # Add employee info to user data
-                                        auth_data["user"]["employee_id"] = emp.get("employee_id")
-                                        auth_data["user"]["employee_name"] = emp.get("name")
-                                        auth_data["user"]["phone_number"] = emp.get("phone_number")
-                                        auth_data["user"]["home_location"] = emp.get("home_location")
-                                        break
+                            emp = emp_response.json()
+                            # Add employee info to user data
+                            user["employee_id"] = emp.get("employee_id")
+                            user["employee_name"] = emp.get("name")
+                            user["phone_number"] = emp.get("phone_number")
+                            user["home_location"] = emp.get("home_location")
                     except Exception as e:
                         print(f"Error fetching employee details: {e}")
                         # Continue without employee details if there's an error
@@ -316,8 +342,7 @@ async def get_optimal_drivers(location: str, shift_time: str = "09:00"):
 @app.get("/api/eta/calculate")
 async def calculate_eta(pickup_location: str, shift_time: str = "09:00"):
     """Calculate ETA for pickup"""
-    # Mock coordinates for demo
-    pickup_coords = {"lat": 12.9716, "lng": 77.5946}
+    pickup_coords = enhancer.get_coordinates_for_location(pickup_location)
     eta_info = enhancer.calculate_eta(pickup_location, pickup_coords, shift_time)
     return eta_info
 
@@ -548,19 +573,44 @@ async def get_dashboard_stats():
     
     return stats
 
+async def fetch_trip_kpis(client: httpx.AsyncClient, headers: Dict[str, str], window: str) -> httpx.Response:
+    """Pre-aggregated KPI series from the trip service rollups, as the calling admin"""
+    return await client.get(
+        f"{API_GATEWAY_URL}/trips/kpis",
+        params={"window": window},
+        headers=headers,
+        timeout=5
+    )
+
+@app.get("/api/admin/kpis")
+async def get_admin_kpi_series(request: Request, window: str = "24h"):
+    """Trip counters and active trip/driver gauges per minute or hour, e.g. ?window=6h or ?window=7d"""
+    headers = get_caller_auth_headers(request)
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await fetch_trip_kpis(client, headers, window)
+            return JSONResponse(status_code=response.status_code, content=response.json())
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"error": f"KPI service error: {str(e)}", "window": window, "totals": {}, "series": []}
+        )
+
 @app.get("/api/admin/dashboard/kpis")
-async def get_admin_kpis():
+async def get_admin_kpis(request: Request):
     """Get KPI data for admin dashboard"""
+    headers = get_caller_auth_headers(request)
     try:
         # Try to get real data from services
         async with httpx.AsyncClient() as client:
             try:
-                # Get trip data
-                trips_response = await client.get(f"{API_GATEWAY_URL}/api/trips", timeout=5)
+                # Currently active trips come from the trip service's sampled gauge
+                kpis_response = await fetch_trip_kpis(client, headers, "1h")
+                if kpis_response.status_code in (401, 403):
+                    return JSONResponse(status_code=kpis_response.status_code, content=kpis_response.json())
                 active_trips = 0
-                if trips_response.status_code == 200:
-                    trips_data = trips_response.json()
-                    active_trips = len([t for t in trips_data if t.get('status') == 'active'])
+                if kpis_response.status_code == 200:
+                    active_trips = kpis_response.json()["totals"].get("active_trips") or 0
                 
                 # Get user data
                 users_response = await client.get(f"{USER_SERVICE_URL}/api/users/count", timeout=5)
@@ -658,38 +708,45 @@ async def get_bangalore_policy():
         ]
     }
 
+def get_caller_auth_headers(request: Request) -> Dict[str, str]:
+    """The caller's own Bearer token, to forward through the gateway; 401 when there is none"""
+    authorization = request.headers.get("authorization", "")
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return {"Authorization": authorization}
+
 @app.get("/api/employees/search")
-async def search_employees(q: str = ""):
+async def search_employees(request: Request, q: str = ""):
     """Search employees by name or employee ID"""
+    headers = get_caller_auth_headers(request)
     try:
         if len(q) < 2:  # Minimum 2 characters for search
             return {"employees": []}
         
-        # Try to get employees from user service
+        # Search is done server-side by the user service (indexed, ranked, limited; admin only)
         async with httpx.AsyncClient() as client:
             try:
-                response = await client.get(f"{USER_SERVICE_URL}/users/employees", timeout=5)
+                response = await client.get(
+                    f"{API_GATEWAY_URL}/employees/search",
+                    params={"q": q, "limit": 10},
+                    headers=headers,
+                    timeout=5
+                )
+                if response.status_code in (401, 403):
+                    return JSONResponse(status_code=response.status_code, content=response.json())
                 if response.status_code == 200:
-                    employees_data = response.json()
-                    
-                    # Filter employees based on search query
-                    filtered_employees = []
-                    q_lower = q.lower()
-                    
-                    for emp in employees_data:
-                        name_match = q_lower in emp.get('name', '').lower()
-                        id_match = q in str(emp.get('employee_id', ''))
-                        
-                        if name_match or id_match:
-                            filtered_employees.append({
+                    return {
+                        "employees": [
+                            {
                                 "id": emp.get('id'),
                                 "name": emp.get('name'),
                                 "employee_id": emp.get('employee_id'),
                                 "phone_number": emp.get('phone_number'),
                                 "home_location": emp.get('home_location')
-                            })
-                    
-                    return {"employees": filtered_employees[:10]}  # Limit to 10 results
+                            }
+                            for emp in response.json()
+                        ]
+                    }
                     
             except Exception as e:
                 print(f"Error searching employees: {e}")
@@ -716,29 +773,32 @@ async def search_employees(q: str = ""):
         return {"error": str(e), "employees": []}
 
 @app.get("/api/employees/{employee_id}")
-async def get_employee_by_id(employee_id: str):
+async def get_employee_by_id(employee_id: str, request: Request):
     """Get employee details by employee ID"""
+    headers = get_caller_auth_headers(request)
     try:
-        # Try to get employee from user service
+        # Try to get employee from user service (admin or the employee themselves)
         async with httpx.AsyncClient() as client:
             try:
-                response = await client.get(f"{USER_SERVICE_URL}/users/employees", timeout=5)
+                response = await client.get(
+                    f"{API_GATEWAY_URL}/employees/by-employee-id/{employee_id}",
+                    headers=headers,
+                    timeout=5
+                )
+                if response.status_code in (401, 403):
+                    return JSONResponse(status_code=response.status_code, content=response.json())
                 if response.status_code == 200:
-                    employees_data = response.json()
-                    
-                    # Find employee by employee_id
-                    for emp in employees_data:
-                        if str(emp.get('employee_id')) == str(employee_id):
-                            return {
-                                "employee": {
-                                    "id": emp.get('id'),
-                                    "name": emp.get('name'),
-                                    "employee_id": emp.get('employee_id'),
-                                    "phone_number": emp.get('phone_number'),
-                                    "home_location": emp.get('home_location')
-                                }
-                            }
-                    
+                    emp = response.json()
+                    return {
+                        "employee": {
+                            "id": emp.get('id'),
+                            "name": emp.get('name'),
+                            "employee_id": emp.get('employee_id'),
+                            "phone_number": emp.get('phone_number'),
+                            "home_location": emp.get('home_location')
+                        }
+                    }
+                if response.status_code == 404:
                     return {"error": "Employee not found", "employee": None}
                     
             except Exception as e:
@@ -761,22 +821,43 @@ async def get_employee_by_id(employee_id: str):
     except Exception as e:
         return {"error": str(e), "employee": None}
 
+class TripEventBatch(BaseModel):
+    events: List[Dict]
+
+@app.post("/api/trip-events")
+async def receive_trip_events(batch: TripEventBatch, x_service_key: Optional[str] = Header(None)):
+    """Apply trip lifecycle events relayed from trip-service to live tracking"""
+    if not x_service_key or not hmac.compare_digest(x_service_key, SERVICE_API_KEY):
+        raise HTTPException(status_code=403, detail="Internal endpoint")
+    fresh = applied_trip_events.fresh(batch.events)
+    for event in fresh:
+        await tracker.apply_trip_event(event)
+        trip_id = event["aggregate_id"]
+        # Push status changes to watchers now instead of at the next tick
+        if tracking_hub.has_subscribers(trip_id) and trip_id in tracker.active_trips:
+            tracking_hub.publish(trip_id, json.dumps(tracker.active_trips[trip_id]))
+    applied_trip_events.remember(event["event_id"] for event in fresh)
+    return {"received": len(batch.events), "applied": len(fresh)}
+
 # WebSocket endpoint for real-time updates
 @app.websocket("/ws/{trip_id}")
-async def websocket_endpoint(websocket, trip_id: int):
+async def websocket_endpoint(websocket: WebSocket, trip_id: int):
     """WebSocket for real-time trip updates"""
     await websocket.accept()
+    subscription = tracking_hub.subscribe(trip_id)
     
     try:
         while True:
-            # Send live updates every 5 seconds
-            tracking_data = await tracker.get_live_updates(trip_id)
-            await websocket.send_json(tracking_data)
-            await asyncio.sleep(5)
+            # Updates are produced once per trip by the hub and already JSON encoded
+            await websocket.send_text(await subscription.get())
             
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
         await websocket.close()
+    finally:
+        tracking_hub.unsubscribe(subscription)
 
 if __name__ == "__main__":
     import uvicorn